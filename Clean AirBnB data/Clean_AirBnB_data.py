@@ -1,5 +1,11 @@
-import numpy as np
-import pandas as pd
+import os
+import sys
+
+try:
+    import data_wrangling # installed package (pip install ., see pyproject.toml)
+except ImportError: # run from a checkout, the package is at the repository root
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_wrangling.clean_airbnb import clean_airbnb
 
 '''
 Case:
@@ -16,36 +22,10 @@ Case:
   4. Drop duplicates data (if any)
 '''
 
-airbnb_data = pd.read_csv("Airbnb_Open_Data.csv") # import data
-
-# delete data in 'neighbourhood group' and 'price' column with missing value
-airbnb_data = airbnb_data.dropna(subset=['neighbourhood group', 'price'])
-
-# Removing the unconsitency value in 'neighborhood group'
-map_value_ng = {
-    'brookln' : 'Brooklyn',
-    'manhatan' : 'Brooklyn'
-}
-airbnb_data['neighbourhood group'] = airbnb_data['neighbourhood group'].replace(map_value_ng)
-
-# convert value in 'price' column into int for handling outlier
-airbnb_data['price'] = airbnb_data['price'].str.replace('$', '')
-airbnb_data['price'] = airbnb_data['price'].str.replace(',', '')
-airbnb_data['price'] = airbnb_data['price'].astype('int')
-
-# handle outlier using IQR method and replace outlier with median value
-upper_limit_price = airbnb_data['price'].quantile(q=0.75) * 1.5
-median_price = airbnb_data['price'].median()
-airbnb_data.loc[airbnb_data['price'] > upper_limit_price, 'price'] = median_price
-
-# handle outlier with delete data in column 'availability 365', value in this column
-# has to be in range 0-365
-avail_365_condition = airbnb_data[(airbnb_data['availability 365'] > 365) | (airbnb_data['availability 365'] < 0) ].index
-airbnb_data.drop(avail_365_condition, inplace=True)
-airbnb_data = airbnb_data.dropna(subset=['availability 365'])
-
-# delete duplicates data
-airbnb_data = airbnb_data.drop_duplicates(keep='first')
+if __name__ == '__main__': # the example runs only when the script is executed
+    # for a listing dump larger than the memory, use clean_airbnb_streaming() from
+    # data_wrangling.clean_airbnb, it applies the same rules chunk by chunk in fixed memory
+    airbnb_data = clean_airbnb("Airbnb_Open_Data.csv")
 
-# print message contain shape of cleaned data
-print(f'Clean data shape : {airbnb_data.shape}')
+    # print message contain shape of cleaned data
+    print(f'Clean data shape : {airbnb_data.shape}')
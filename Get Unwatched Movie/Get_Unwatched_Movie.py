@@ -1,5 +1,11 @@
-import numpy as np
-import pandas as pd
+import os
+import sys
+
+try:
+    import data_wrangling # installed package (pip install ., see pyproject.toml)
+except ImportError: # run from a checkout, the package is at the repository root
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_wrangling.unwatched_movie import get_unwatched_movie
 
 '''
 Case:
@@ -17,44 +23,18 @@ Case:
 - The dataset originally comes from **MovieLens**
 '''
 
-def get_unwatched_movie(userId, config):
-    '''
-  Function to get unwatched movie from specific movie
-
-  Parameters
-  ----------
-  userId (int)  :   The targeted user ID
-  config (dict) :   The configuration files where the engineering team store
-                    the user-data and movie metadata
-
-  Returns
-  --------
-  unwatched_movie_df :  pandas DataFrame type with movieId as an index
-                        and two columns of title and genres
-
-    '''
-
-    user_data_df = pd.read_csv(config['path']['user_data'], index_col='userId') # create user_data dataframe
-    metadata_df = pd.read_csv(config['path']['metadata'], index_col='movieId')  # create metadata dataframe
-
-    # create list of watched movie by specific user
-    watched_movie_list = (user_data_df.loc[userId][['movieId']])['movieId'].values.tolist()
-
-    # delete list of watched movie and remain the unwatched movie
-    unwatched_movie_df = metadata_df.drop(watched_movie_list)
-    return unwatched_movie_df # return data
-
-'Input Example'
-# Define CONFIG variable
-CONFIG = {
-    'path': {
-        'user_data': 'ratings.csv',
-        'metadata': 'movies.csv'
+if __name__ == '__main__': # the example runs only when the script is executed
+    'Input Example'
+    # Define CONFIG variable
+    CONFIG = {
+        'path': {
+            'user_data': 'ratings.csv',
+            'metadata': 'movies.csv'
+        }
     }
-}
 
-unwatched_data = get_unwatched_movie(userId = 10,
-                                     config = CONFIG)
+    unwatched_data = get_unwatched_movie(userId = 10,
+                                         config = CONFIG)
 
-print('Data shape:', unwatched_data.shape)
-unwatched_data.sample(n=5, random_state=42)
\ No newline at end of file
+    print('Data shape:', unwatched_data.shape)
+    unwatched_data.sample(n=5, random_state=42)
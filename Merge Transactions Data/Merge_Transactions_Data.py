@@ -1,5 +1,11 @@
-import numpy as np
-import pandas as pd
+import os
+import sys
+
+try:
+    import data_wrangling # installed package (pip install ., see pyproject.toml)
+except ImportError: # run from a checkout, the package is at the repository root
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_wrangling.merge_transactions import import_data
 
 '''
 Case:
@@ -8,51 +14,17 @@ Case:
 - Your task is to create a function to join multiple transaction files.
 '''
 
-def import_data(filenames):
-    '''
-  Function to combine separated data (supported .csv & .xlxs only)
-
-  Parameters
-  ----------
-  filenames : list
-     separated file name
-
-  Returns
-  --------
-  data : dataframe
-      combine data
-
-    '''
-
-    data_csv, data_excel = [], [] # create empty list for collecting data from each format
-
-    for filename in filenames: # collecting data for each format
-
-        if ".csv" in filename:
-            data_csv.append(pd.read_csv(filename, sep=';'))
-        elif ".xlsx" in filename:
-            data_excel.append(pd.read_excel(filename))
-        else:
-          print('format not available, please use .csv or .xlsx only')
-
-    # combine data for each format
-    data_csv = pd.concat(data_csv, ignore_index=True)
-    data_excel = pd.concat(data_excel, ignore_index=True)
-
-    # combine for all data available
-    data = pd.concat([data_excel, data_csv])
-    return data #return data
-
-'Input Example'
-filenames = [
-    'branch_A.xlsx',
-    'branch_B.csv',
-    'branch_C.csv'
-]
+if __name__ == '__main__': # the example runs only when the script is executed (also needed by the process pool)
+    'Input Example'
+    filenames = [
+        'branch_A.xlsx',
+        'branch_B.csv',
+        'branch_C.csv'
+    ]
 
-# Import data
-data = import_data(filenames = filenames)
+    # Import data
+    data = import_data(filenames = filenames)
 
-# Validasi hasil
-print('Data shape:', data.shape)
-data.head(5)
\ No newline at end of file
+    # Validasi hasil
+    print('Data shape:', data.shape)
+    data.head(5)
@@ -1,5 +1,11 @@
-import numpy as np
-import pandas as pd
+import os
+import sys
+
+try:
+    import data_wrangling # installed package (pip install ., see pyproject.toml)
+except ImportError: # run from a checkout, the package is at the repository root
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_wrangling.month_over_month import monthly_sales, read_orders, sales_change, to_report
 
 '''
 Case:
@@ -8,21 +14,22 @@ Case:
 rounded to the 2nd decimal point, and sorted by `order-date` in ascending order.
 '''
 
-# import data
-filename = 'Global_Superstore2.csv'
-superstore_data = pd.read_csv(filename,
-                                 engine = 'python',
-                                 encoding = 'cp1252', parse_dates=['Order Date'])
+if __name__ == '__main__': # the example runs only when the script is executed
+    # import data, only 'Order Date' & 'Sales' are needed and the default C parser is used
+    filename = 'Global_Superstore2.csv'
+    superstore_data = read_orders(filename)
 
-# conver data in column 'Order Date' (datetime) into 'yyyy-mm' format
-superstore_data['Order Date'] = superstore_data['Order Date'].dt.strftime('%Y-%m')
+    # total sales of each month, grouped on integer month key (year * 12 + month - 1)
+    monthly_sales_total = monthly_sales(superstore_data)
 
-# crate new dataframe contain only column 'Order Date' & 'Sales' which already added up
-# for each month
-superstore_monthly_sales = superstore_data[['Order Date', 'Sales']].groupby('Order Date').sum().reset_index()
+    # calculate Month-Over-Month Percentage Change, then format the month into 'yyyy-mm'
+    # 'Order Date' column and the change into new column 'Sales Change'
+    superstore_monthly_sales = to_report(monthly_sales_total, sales_change(monthly_sales_total))
 
-# calculate Month-Over-Month Percentage Change and added it up to new column 'Sales Change'
-superstore_monthly_sales['Sales Change'] = round(superstore_monthly_sales['Sales'].pct_change() *100, 2)
+    # for daily new orders, MonthlySalesStore from data_wrangling.month_over_month keeps the
+    # monthly totals and only updates the months of the new rows, and for week-over-week,
+    # quarter-over-quarter or a breakdown by Category / Region, build_sales_cube() builds a
+    # day to year sales cube once and answers every variant without reading the orders again
 
-print(f"Data shape : {superstore_monthly_sales.shape}") # print message contain data shape
-superstore_monthly_sales.head(12) # display 12 first row of data
+    print(f"Data shape : {superstore_monthly_sales.shape}") # print message contain data shape
+    superstore_monthly_sales.head(12) # display 12 first row of data
@@ -1,9 +1,11 @@
-import numpy as np
-import pandas as pd
-from datetime import date,datetime
+import os
+import sys
 
-import seaborn as sns
-import matplotlib.pyplot as plt
+try:
+    import data_wrangling # installed package (pip install ., see pyproject.toml)
+except ImportError: # run from a checkout, the package is at the repository root
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_wrangling.retail_orders import build_report, load_data, plot_report
 
 '''
 Case:
@@ -26,139 +28,40 @@ Case:
   Definition of active loyal customer is the customer who order more than 3 times and order in 3 latest months.
 '''
 
-# input data
-data_orders = pd.read_csv('orders.csv')
-data_product = pd.read_csv('product_supplier.csv')
+PLOT = True # set to False for a headless run (e.g. nightly batch job), nothing is plotted
 
-# convert column Date Order was placed and Delivery Date into datetime64
-data_orders['Date Order was placed'] = pd.to_datetime(data_orders['Date Order was placed'], dayfirst=True)
-data_orders['Delivery Date'] = pd.to_datetime(data_orders['Delivery Date'], dayfirst=True)
+if __name__ == '__main__': # the example runs only when the script is executed
+    # input data with the declared compact dtypes, the csv files are parsed only once into
+    # a memory-mapped columnar cache (orders.csv.cols/ & product_supplier.csv.cols/), then
+    # the order x product data is cleaned & combined once, only Product Category is needed
+    # by the report (other product attributes can be attached the same way when needed)
+    data = load_data('orders.csv', 'product_supplier.csv', product_columns=['Product Category'])
 
-# combine data based on Product ID
-data = pd.merge(data_orders, data_product, on='Product ID')
+    # answer all business questions from shared aggregates
+    report = build_report(data)
 
-# remove inconsistency from column Customer Status
-replace_map = {
-    'SILVER' : 'Silver',
-    'GOLD' : 'Gold',
-    'PLATINUM' : 'Platinum'
-}
-data['Customer Status'] = data['Customer Status'].replace(replace_map)
+    print('Top 5 product category with biggest profit percentage :')
+    print(report['profit_percentage'].head(5), '\n')
 
-# create new column for Month and Year for help data selection
-data['Month'] = data['Date Order was placed'].dt.month
-data['Year'] = data['Date Order was placed'].dt.year
+    # other periods or a breakdown (e.g. quarter over quarter profit of every Product Category)
+    # are answered from order_cube(data) from data_wrangling.retail_orders
+    print('Profit month over month of every year :')
+    print(report['profit_mom'], '\n')
 
-# add column unit price from column Total Retail Price for This Order divide by Quantity Ordered
-data['Unit Price'] = data['Total Retail Price for This Order'] / data['Quantity Ordered']
-# add column unit price from column Unit price minus cost price per unit
-data['Profit'] = data['Unit Price'] - data['Cost Price Per Unit']
-# add column profit percentage from profit divide by cost price per unit
-data['Profit Percentage'] = data['Profit'] / data['Cost Price Per Unit']*100
+    print('Correlation :')
+    print(report['correlation'], '\n')
 
-# show figure for top 5 product category with biggest profit percentage
-data_profit_percentage = data[['Product Category', 'Profit Percentage']].groupby('Product Category').mean() # create new dataframe with grouped product category and contain profit percentage
-plt.figure(figsize=(8,4)) # create figure size
-sns.barplot(data= data_profit_percentage.nlargest(5, 'Profit Percentage'), # create figure with top 5 profit percentage in product category
-            x = 'Product Category',
-            y = 'Profit Percentage',
-            hue= 'Product Category')
-x=[]
-for y in range(0,201,25): # create sequence number for profit percentage ticks
-    x.append(y)
-plt.yticks(x)
-plt.show()
+    print('Top 3 most favorite product category in the latest year :')
+    print(report['top_products'], '\n')
 
-# show figure for profit obtained month over month of every year
+    print('Order-to-delivery length of every month in the latest year :')
+    print(report['delivery_length'], '\n')
 
-data_profit_MoM = data[['Date Order was placed', 'Profit']]
-data_profit_MoM['Date Order was placed'] = data_profit_MoM['Date Order was placed'].dt.strftime('%Y-%m')
-data_profit_MoM = data_profit_MoM.groupby('Date Order was placed').sum().reset_index()
-data_profit_MoM['Date Order was placed'] = pd.to_datetime(data_profit_MoM['Date Order was placed'], yearfirst=True)
+    # for a daily promo job, LoyalCustomerTracker from data_wrangling.retail_orders keeps a
+    # rolling window of customer order counts and only needs the new orders of each day
+    print('Active loyal customer :')
+    print(report['loyal_customers'], '\n')
+    print(report['loyal_proportion'])
 
-plt.figure(figsize=(6,4))
-sns.lineplot(data = data_profit_MoM,
-             x = data_profit_MoM['Date Order was placed'].dt.month,
-             y = 'Profit',
-             hue= data_profit_MoM['Date Order was placed'].dt.year)
-plt.xlabel('Month')
-plt.ylabel('profit')
-
-plt.show()
-
-# create sub-plots for correlation figure
-fig, ax = plt.subplots(nrows = 1, ncols = 2, figsize=(8,4))
-
-# show figure for correlation between cost and profit
-sns.scatterplot(data=data,
-                x = 'Cost Price Per Unit',
-                y = 'Total Retail Price for This Order',
-                ax = ax[0])
-
-
-# show figure for correlation unit price and unit ordered
-sns.scatterplot(data=data,
-                y = 'Quantity Ordered',
-                x = 'Unit Price',
-                ax= ax[1])
-ax[0].set_ylabel('profit')
-plt.show()
-
-# show figure for top 3 product category with most quantity ordered
-data_quantity_ordered = data[['Product Category', 'Quantity Ordered']][data['Year'] == 2021].groupby('Product Category').sum()
-sns.barplot(data= data_quantity_ordered.nlargest(3, 'Quantity Ordered'),
-            x = 'Product Category',
-            y = 'Quantity Ordered',
-            hue= 'Product Category')
-plt.show()
-
-# show figure for order-to-delivery length of every month in the latest year
-data_order_delivery = data[['Date Order was placed', 'Delivery Date']][data['Year'] == 2021] # filtering data for the latest year
-data_order_delivery['order to delivery length'] = data_order_delivery['Delivery Date'] - data_order_delivery['Date Order was placed'] # create new column contain length time for order to delivery
-
-data_order_delivery['Date Order was placed'] = data_order_delivery['Date Order was placed'].dt.strftime('%m')
-
-data_order_delivery = data_order_delivery[['Date Order was placed', 'order to delivery length']].groupby('Date Order was placed').agg(['median', 'max']).reset_index()
-
-data_order_delivery.columns = ['Month', 'order_to_delivery_length', 'the_longest_order_to_delivery_length']
-data_order_delivery.set_index('Month', inplace=True)
-display(data_order_delivery)
-
-# Show figure for proportion of active loyal customer and list of active loyal customer
-
-data_customer = data[['Customer ID', 'Customer Status']].loc[(data['Year'] == 2021) & (data['Month'] > 9)] # filtering data for the latest year and last 3 month
-
-# count total orders for each customer
-cust_id = data_customer['Customer ID'].value_counts().keys().tolist()
-count = data_customer['Customer ID'].value_counts().to_list()
-cust_count = {'Customer ID' :  cust_id,
-              'Order Count' : count}
-order_count = pd.DataFrame(data=cust_count)
-data_customer_count = pd.merge(data_customer, order_count, on='Customer ID')
-
-data_customer_count = data_customer_count[['Customer ID', 'Customer Status']].loc[data_customer_count['Order Count'] > 3] # filtering customer with more than 3 total orders
-
-# Create additional column for help define proportion of customer status
-data_customer_count['Customer Status (num)'] = data_customer_count['Customer Status']
-replace_map = {
-    'Silver' : 1,
-    'Gold' : 2,
-    'Platinum' : 3
-}
-data_customer_count['Customer Status (num)'] = data_customer_count['Customer Status (num)'].replace(replace_map)
-
-data_customer_count = data_customer_count.groupby('Customer ID').max().reset_index() # group customer with most high customer status for each customer
-
-# create table contain active loyal customer
-data_customer = data_customer_count.drop(['Customer Status', 'Customer Status (num)'], axis=1)
-display(data_customer)
-
-# count proportion of customer status in active loyal customer
-data_customer_proportion = data_customer_count[['Customer Status', 'Customer ID']].groupby('Customer Status').nunique().reset_index()
-data_customer_proportion['percentage'] = (data_customer_proportion['Customer ID'] / data_customer_proportion['Customer ID'].sum()) * 100
-
-# create figure for proportion of active loyal customer
-sns.barplot(data=data_customer_proportion.sort_values(by=['Customer ID'], ascending=False),
-            x= 'Customer Status',
-            y = 'percentage',
-            hue='Customer Status')
\ No newline at end of file
+    if PLOT: # seaborn & matplotlib are imported only here
+        plot_report(report, data)
@@ -1,5 +1,11 @@
-import numpy as np
-import pandas as pd
+import os
+import sys
+
+try:
+    import data_wrangling # installed package (pip install ., see pyproject.toml)
+except ImportError: # run from a checkout, the package is at the repository root
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_wrangling.time_to_purchase import read_events, run_funnels, time_to_purchase
 
 '''
 Case:
@@ -11,38 +17,22 @@ Case:
 - The ouput should include `user_id` and their `view_purchase_duration` in minutes.
 '''
 
-data = pd.read_csv('event_samples.csv', parse_dates=['event_time']) # import data
-
-# split data for 'view' & 'purchase', each data contain column 'event_time' & 'user_id'
-view_data = data[['event_time', 'user_id']].loc[data['event_type'] == 'view']
-purchase_data = data[['event_time', 'user_id']].loc[data['event_type'] == 'purchase']
-
-# define earliest data for each user for purchase data
-purchase_data = purchase_data.groupby('user_id').max().reset_index()
-# formula & calculation for view data is still wrong, because it still not define earliest
-# value before user purchase. i hope i can get some enlightment for this one from checker mentor
-# because iam already stuck
-view_data = view_data.groupby('user_id').min().reset_index()
-
-# rename column for event_time column for each view and purchase data (preparation for data merging)
-view_data.rename(columns= {'event_time' : 'event_time_view'}, inplace=True)
-purchase_data.rename(columns= {'event_time' : 'event_time_purchase'}, inplace=True)
-
-# merge purchase and view data
-view_to_purchase = pd.merge(purchase_data, view_data, on='user_id')
-
-# calculate difference / view to purchase time for each user
-view_to_purchase['view_purchase_duration'] = round((view_to_purchase['event_time_purchase'] - view_to_purchase['event_time_view']) / pd.Timedelta(minutes=1), 3)
+if __name__ == '__main__': # the example runs only when the script is executed
+    data = read_events('event_samples.csv') # import data (only event_time, event_type & user_id)
 
-# delete event_time column from each data
-view_to_purchase.drop(['event_time_purchase', 'event_time_view'], axis=1, inplace=True)
+    # take for each user the earliest purchase and the earliest view (two min aggregations
+    # grouped by user, no sort), the view is used only if it happened before the purchase
+    view_to_purchase = time_to_purchase(data)
 
-# delete difference / view to purchase time with less than 0 value
-view_to_purchase.drop(view_to_purchase[view_to_purchase['view_purchase_duration'] < 0].index, inplace=True)
+    # calculate central tendency for difference / view to purchase time value
+    median_view_to_purchase = round(view_to_purchase['view_purchase_duration'].median(), 1)
 
-# calculate central tendency for difference / view to purchase time value
-median_view_to_purchase = round(view_to_purchase['view_purchase_duration'].median(), 1)
+    # print message contain data shape & central tendency value (median)
+    print(f'Data shape : {view_to_purchase.shape}')
+    print(f"Summary of user's view to purchase duration : {median_view_to_purchase} minutes")
 
-# print message contain data shape & central tendency value (median)
-print(f'Data shape : {view_to_purchase.shape}')
-print(f"Summary of user's view to purchase duration : {median_view_to_purchase} minutes")
+    # longer funnels, e.g. view -> cart -> purchase, sort the event log once by user & event_time
+    # then give per-step durations and drop-off counts
+    funnels = run_funnels(data, {'view-cart-purchase': ['view', 'cart', 'purchase']})
+    funnel_per_user, funnel_summary = funnels['view-cart-purchase']
+    print(funnel_summary)
@@ -0,0 +1,34 @@
+'''
+Shared code & importable library of the data wrangling tasks.
+- `schemas`         : declared dtype schema of every input dataset and `read_dataset`
+- `column_cache`    : memory-mapped columnar cache of the input files and `load_dataset`
+- `instrumentation` : per-stage wall / cpu time, peak memory & row count of the pipelines
+- `parallel`        : multi-core groupby over hash partitions of the rows (shared memory)
+- `quality`         : declarative data quality rules fused into one row mask (`RuleSet`)
+- `sales_cube`      : day to year rollup cube of the period-over-period queries (`SalesCube`)
+- `benchmark`       : synthetic data generators and benchmark suite of every task
+- one subpackage per task (`unwatched_movie`, `house_recommendation`, `promising_state`,
+  `merge_transactions`, `clean_airbnb`, `month_over_month`, `retail_orders`, `time_to_purchase`),
+  the task scripts are thin wrappers around them
+- `python -m data_wrangling <task>` runs a task from the command line
+
+Every attribute is imported lazily, `import data_wrangling` does not import numpy or pandas.
+'''
+
+from ._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'load_cached': '.column_cache',
+    'load_dataset': '.column_cache',
+    'instrument': '.instrumentation',
+    'stage': '.instrumentation',
+    'partitioned_groupby': '.parallel',
+    'RuleSet': '.quality',
+    'SalesCube': '.sales_cube',
+    'DATASETS': '.schemas',
+    'read_dataset': '.schemas',
+    'get_unwatched_movie': '.unwatched_movie.unwatched',
+    'get_user_recommendation': '.house_recommendation.recommendation',
+    'export_promising_state': '.promising_state.export',
+    'import_data': '.merge_transactions.merge',
+})
@@ -0,0 +1,232 @@
+import argparse
+import sys
+
+'''
+Command line of the data wrangling tasks, e.g.
+  python -m data_wrangling unwatched_movie --user-id 10 --ratings ratings.csv --metadata movies.csv
+  python -m data_wrangling house_recommendation --latitude -6.2734 --longitude 106.7364 --size 30
+  python -m data_wrangling export_promising_state --input "Amazon Sale Report.csv" --thresh 0.10
+  python -m data_wrangling merge_transactions branch_A.xlsx branch_B.csv branch_C.csv
+  python -m data_wrangling month_over_month --level quarter --by Category
+A task module is imported only when its command runs, thus `--help` and the start of
+every command do not pay for numpy, pandas or the other tasks.
+Set DATA_WRANGLING_PROFILE=1 to print the stage timings of the run at exit.
+Once the package is installed (`pip install .`, see pyproject.toml) the same commands are
+the `data-wrangling` script, and every task also has its own script, e.g.
+  data-wrangling-merge-transactions branch_A.xlsx branch_B.csv branch_C.csv
+'''
+
+LEVELS = ['day', 'week', 'month', 'quarter', 'year'] # periods of the sales cube (data_wrangling.sales_cube)
+WORKERS_HELP = 'number of process of the groupby aggregations (large data only), default is the number of cpu'
+
+def _unwatched_movie(args):
+    from .unwatched_movie.unwatched import get_top_unwatched_movies, get_unwatched_movie
+
+    config = {'path': {'user_data': args.ratings, 'metadata': args.metadata, 'index': args.index}}
+    if args.top is None:
+        movies = get_unwatched_movie(userId=args.user_id, config=config)
+    else:
+        movies = get_top_unwatched_movies(args.user_id, config, k=args.top, page=args.page,
+                                          genre=args.genre, rank_by=args.rank_by)
+    print('Data shape:', movies.shape)
+    print(movies.head(args.show).to_string())
+
+def _house_recommendation(args):
+    from .house_recommendation.recommendation import get_user_recommendation
+
+    user_config = {
+        'preferences': {
+            'property_type': args.property_type,
+            'size': args.size,
+            'capacity': args.capacity,
+            'is_furnished': args.is_furnished,
+            'yearly_price': args.yearly_price
+        },
+        'location': {'latitude': args.latitude, 'longitude': args.longitude}
+    }
+    recommendation = get_user_recommendation(n=args.n, user_config=user_config, data_config={'path': args.data})
+    print('Data Shape:', recommendation.shape)
+    print(recommendation.to_string())
+
+def _export_promising_state(args):
+    from .promising_state.export import export_promising_state
+
+    config_file = {'path': {'input': args.input, 'output': args.output}}
+    export_promising_state(config_file=config_file, thresh=args.thresh, workers=args.workers,
+                           compression=args.compression, chunksize=args.chunksize)
+
+def _merge_transactions(args):
+    from .merge_transactions.merge import import_data, ingest_data
+
+    if args.store is not None:
+        data = ingest_data(args.filenames, args.store, workers=args.workers)
+    else:
+        data = import_data(filenames=args.filenames, workers=args.workers, output=args.output, cache=args.cache)
+    print('Data shape:', data.shape)
+    print(data.head(args.show).to_string())
+
+def _clean_airbnb(args):
+    if args.chunksize is not None: # fixed memory, the clean rows are written into the output file
+        from .clean_airbnb.streaming_cleaner import clean_airbnb_streaming
+
+        report = clean_airbnb_streaming(args.input, args.output or 'Airbnb_Open_Data_clean.csv', chunksize=args.chunksize)
+        print(f"Clean data rows : {report['rows_out']}")
+        print(f"Approximate median price : {report['median_price']} (rank error {report['median_rank_error']:.4%})")
+        print(f"Approximate 3rd quartile price : {report['q3_price']} (rank error {report['q3_rank_error']:.4%})")
+        return
+
+    from .clean_airbnb.cleaning import clean_airbnb
+
+    airbnb_data, report = clean_airbnb(args.input, report=True)
+    print(f'Clean data shape : {airbnb_data.shape}')
+    print(report.to_string())
+    if args.output is not None:
+        airbnb_data.to_csv(args.output, index=False)
+
+def _month_over_month(args):
+    if args.level is not None or args.by: # other periods or a breakdown, answered from the sales cube
+        from .month_over_month.monthly_sales_store import build_sales_cube
+
+        cube = build_sales_cube(args.input, dimensions=args.by or (), workers=args.workers)
+        change = cube.period_over_period(args.measure, level=args.level or 'month', by=args.by or ())
+        print(f"Data shape : {change.shape}")
+        print(change.head(args.show).to_string(index=False))
+        return
+
+    from .month_over_month.monthly_sales_store import month_over_month
+
+    superstore_monthly_sales = month_over_month(args.input, workers=args.workers)
+    print(f"Data shape : {superstore_monthly_sales.shape}")
+    print(superstore_monthly_sales.head(args.show).to_string(index=False))
+
+def _retail_orders(args):
+    from .retail_orders.retail_report import build_report, load_data, plot_report
+
+    data = load_data(args.orders, args.products)
+    report = build_report(data, workers=args.workers)
+    for key, value in report.items():
+        print(f'{key} :')
+        print(value, '\n')
+    if args.level is not None: # profit change of other periods, answered from the order cube
+        from .retail_orders.retail_report import order_cube
+
+        cube = order_cube(data, dimensions=args.by or (), workers=args.workers)
+        print(f'profit_{args.level}_change :')
+        print(cube.period_over_period('Profit', level=args.level, by=args.by or ()), '\n')
+    if args.plot: # seaborn & matplotlib are only imported for the plots
+        plot_report(report, data)
+
+def _time_to_purchase(args):
+    from .time_to_purchase.funnel import run_funnels
+    from .time_to_purchase.purchase_duration import read_events, time_to_purchase
+
+    data = read_events(args.input)
+    view_to_purchase = time_to_purchase(data, workers=args.workers)
+    median_view_to_purchase = round(view_to_purchase['view_purchase_duration'].median(), 1)
+    print(f'Data shape : {view_to_purchase.shape}')
+    print(f"Summary of user's view to purchase duration : {median_view_to_purchase} minutes")
+    if args.funnel:
+        funnels = run_funnels(data, {'-'.join(args.funnel): args.funnel})
+        print(funnels['-'.join(args.funnel)][1])
+
+def main(argv=None, prog='python -m data_wrangling'):
+    parser = argparse.ArgumentParser(prog=prog, description='run a data wrangling task')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('unwatched_movie', help='unwatched movies of a user')
+    command.add_argument('--user-id', type=int, required=True)
+    command.add_argument('--ratings', default='ratings.csv')
+    command.add_argument('--metadata', default='movies.csv')
+    command.add_argument('--index', help='folder of the watched movie index, default is next to the ratings')
+    command.add_argument('--top', type=int, help='only the k best ranked unwatched movies (a page of k movies)')
+    command.add_argument('--page', type=int, default=1)
+    command.add_argument('--genre', help="only movies of this genre, e.g. 'Comedy' (with --top)")
+    command.add_argument('--rank-by', choices=['popularity', 'rating'], default='popularity')
+    command.add_argument('--show', type=int, default=5, help='number of rows printed')
+    command.set_defaults(run=_unwatched_movie)
+
+    command = commands.add_parser('house_recommendation', help='nearest houses matching the user preferences')
+    command.add_argument('--latitude', type=float, required=True)
+    command.add_argument('--longitude', type=float, required=True)
+    command.add_argument('-n', type=int, default=10, help='maximum number of recommendation')
+    command.add_argument('--data', default='travelio_dki_jakarta.csv')
+    command.add_argument('--property-type')
+    command.add_argument('--size', type=float)
+    command.add_argument('--capacity', type=int)
+    command.add_argument('--is-furnished')
+    command.add_argument('--yearly-price', type=int)
+    command.set_defaults(run=_house_recommendation)
+
+    command = commands.add_parser('export_promising_state', help='export the sales data of every promising state')
+    command.add_argument('--input', default='Amazon Sale Report.csv')
+    command.add_argument('--output', default='sales_data/', help='prefix of the state files')
+    command.add_argument('--thresh', type=float, default=0.10, help='market share threshold')
+    command.add_argument('--workers', type=int, default=4, help='number of thread writing the files, and of process counting the orders')
+    command.add_argument('--compression', choices=['gzip', 'bz2', 'xz'])
+    command.add_argument('--chunksize', type=int, help='stream the sales report chunk by chunk')
+    command.set_defaults(run=_export_promising_state)
+
+    command = commands.add_parser('merge_transactions', help='combine the transaction files of every branch')
+    command.add_argument('filenames', nargs='+')
+    command.add_argument('--workers', type=int, help='number of process, default is number of cpu')
+    command.add_argument('--output', help='.parquet / .feather path of the combined data')
+    command.add_argument('--store', help='add only the new files into this persistent store folder')
+    command.add_argument('--cache', action='store_true', help='keep a columnar cache of the files for the next runs')
+    command.add_argument('--show', type=int, default=5, help='number of rows printed')
+    command.set_defaults(run=_merge_transactions)
+
+    command = commands.add_parser('clean_airbnb', help='clean the AirBnB data')
+    command.add_argument('--input', default='Airbnb_Open_Data.csv')
+    command.add_argument('--output', help='.csv path of the clean data')
+    command.add_argument('--chunksize', type=int, help='clean chunk by chunk in fixed memory')
+    command.set_defaults(run=_clean_airbnb)
+
+    command = commands.add_parser('month_over_month', help='month-over-month percentage change in sales')
+    command.add_argument('--input', default='Global_Superstore2.csv')
+    command.add_argument('--show', type=int, default=12, help='number of rows printed')
+    command.add_argument('--workers', type=int, help=WORKERS_HELP)
+    command.add_argument('--level', choices=LEVELS, help='period of the change, answered from the sales cube')
+    command.add_argument('--by', nargs='+', help="breakdown dimensions, e.g. Category Region")
+    command.add_argument('--measure', choices=['Sales', 'Profit'], default='Sales')
+    command.set_defaults(run=_month_over_month)
+
+    command = commands.add_parser('retail_orders', help='online store retail orders report')
+    command.add_argument('--orders', default='orders.csv')
+    command.add_argument('--products', default='product_supplier.csv')
+    command.add_argument('--plot', action='store_true', help='plot the report (needs seaborn & matplotlib)')
+    command.add_argument('--workers', type=int, help=WORKERS_HELP)
+    command.add_argument('--level', choices=LEVELS, help='also print the profit change of this period')
+    command.add_argument('--by', nargs='+', help="breakdown dimensions of the profit change, e.g. 'Product Category'")
+    command.set_defaults(run=_retail_orders)
+
+    command = commands.add_parser('time_to_purchase', help='view to purchase duration of every user')
+    command.add_argument('--input', default='event_samples.csv')
+    command.add_argument('--funnel', nargs='+', help='event types of a longer funnel, e.g. view cart purchase')
+    command.add_argument('--workers', type=int, help=WORKERS_HELP)
+    command.set_defaults(run=_time_to_purchase)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+    return 0
+
+def _script(command=None):
+    '''
+  entry point of an installed script, the command line of one task (or of every task)
+    '''
+
+    def run():
+        return main(([command] if command else []) + sys.argv[1:], prog='data-wrangling')
+    return run
+
+script = _script()
+unwatched_movie = _script('unwatched_movie')
+house_recommendation = _script('house_recommendation')
+export_promising_state = _script('export_promising_state')
+merge_transactions = _script('merge_transactions')
+clean_airbnb = _script('clean_airbnb')
+month_over_month = _script('month_over_month')
+retail_orders = _script('retail_orders')
+time_to_purchase = _script('time_to_purchase')
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import importlib
+import sys
+
+'''
+Lazy attributes of a package (PEP 562 module `__getattr__`).
+The module exporting an attribute is imported on its first access, thus importing a
+package (e.g. in a worker) costs only its own file, numpy & pandas are imported when
+a function that needs them is first used.
+'''
+
+def lazy_exports(package, exports):
+    '''
+  Module `__getattr__` & `__dir__` of a package with lazily imported attributes
+
+  Parameters
+  ----------
+  package (str)  :   package name, `__name__` of the package
+  exports (dict) :   attribute name and the module exporting it (relative to the
+                     package), e.g. {'stage': '.instrumentation'}
+
+  Returns
+  --------
+  __getattr__, __dir__ :  functions to assign in the package namespace
+    '''
+
+    def __getattr__(name):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(module, package), name)
+        setattr(sys.modules[package], name, value) # next access is a plain attribute lookup
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,19 @@
+'''
+Benchmark suite of the data wrangling tasks.
+- `generators` : seeded synthetic data generators following every input schema
+- `suite`      : time & memory profile of each task entry points, JSON result and `compare`
+Run it with `python -m data_wrangling.benchmark run` (see `--help`).
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'BUNDLED_ROWS': '.generators',
+    'GENERATORS': '.generators',
+    'generate': '.generators',
+    'TASKS': '.suite',
+    'compare': '.suite',
+    'ensure_datasets': '.suite',
+    'run_suite': '.suite',
+    'run_task': '.suite',
+})
@@ -0,0 +1,62 @@
+import argparse
+import json
+import sys
+
+import pandas as pd
+
+from .suite import TASKS, compare, run_suite
+
+'''
+Command line of the benchmark suite, e.g.
+  python -m data_wrangling.benchmark run --scale 10 --output before.json
+  python -m data_wrangling.benchmark run --scale 10 --output after.json
+  python -m data_wrangling.benchmark compare before.json after.json
+'''
+
+def _summary(result):
+    rows = [{'task': task, 'stage': stage, **measure}
+            for task, task_result in result['tasks'].items() for stage, measure in task_result['stages'].items()]
+    return pd.DataFrame(rows).to_string(index=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m data_wrangling.benchmark', description='benchmark suite of the data wrangling tasks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='generate the synthetic data (if needed) and benchmark the tasks')
+    run.add_argument('--data-dir', default='benchmark_data', help='folder of the generated data, reused between runs')
+    run.add_argument('--tasks', nargs='+', choices=list(TASKS), help='default is every task')
+    run.add_argument('--rows', type=int, help='number of rows of every dataset')
+    run.add_argument('--scale', type=float, default=1.0, help='multiplier of the original dataset sizes')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--repeat', type=int, default=3, help='number of timed run of each task')
+    run.add_argument('--no-memory', action='store_true', help='skip the peak memory run')
+    run.add_argument('--output', help='path of the JSON result, default is benchmark-<commit>.json')
+
+    comparison = commands.add_parser('compare', help='compare two JSON results stage by stage')
+    comparison.add_argument('old')
+    comparison.add_argument('new')
+    comparison.add_argument('--threshold', type=float, default=0.10, help='relative slowdown flagged as regression')
+    comparison.add_argument('--fail', action='store_true', help='exit with status 1 when a stage regressed')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        result = run_suite(args.data_dir, tasks=args.tasks, rows=args.rows, scale=args.scale, seed=args.seed,
+                           repeat=args.repeat, memory=not args.no_memory)
+        output = args.output or f'benchmark-{(result["commit"] or "unknown")[:10]}.json'
+        with open(output, 'w') as file:
+            json.dump(result, file, indent=2)
+        print(_summary(result))
+        print(f'\nresult saved into "{output}"')
+        return 0
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    result = compare(old, new, threshold=args.threshold)
+    print(f'{old["commit"]} -> {new["commit"]}')
+    print(result.round(3).to_string(index=False))
+    return 1 if args.fail and result['regression'].any() else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,482 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+'''
+Seeded synthetic data generators, one per input dataset of the tasks.
+Every generator writes the same columns & text formats as the original file (date format,
+'$1,060 ' prices, ';' separator, mixed case status, typos & duplicates to clean, ...),
+thus the task code runs unchanged on it. The rows are generated and written chunk by
+chunk, memory is bounded by `chunk_rows` and a file can be scaled to 10M+ rows.
+Each chunk has its own random generator seeded from (seed, chunk number), the same
+(rows, seed, chunk_rows) always give the same files.
+'''
+
+# approximate size of the original datasets, the default scale of the benchmark
+BUNDLED_ROWS = {
+    'movielens': 100_836,
+    'travelio': 3_725,
+    'branch': 1_000,
+    'amazon_sales': 128_975,
+    'airbnb': 102_599,
+    'superstore': 51_290,
+    'orders': 951_669,
+    'events': 885_129,
+}
+
+GENERATOR_VERSION = 1 # bump when a generator output change, thus the generated data is not reused
+
+XLSX_MAX_ROWS = 100_000 # branch A is written as .xlsx up to this size, .csv above (openpyxl is slow)
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Children', 'Comedy', 'Crime', 'Documentary', 'Drama',
+          'Fantasy', 'Film-Noir', 'Horror', 'IMAX', 'Musical', 'Mystery', 'Romance', 'Sci-Fi',
+          'Thriller', 'War', 'Western']
+JAKARTA_CITIES = ['Jakarta Selatan', 'Jakarta Pusat', 'Jakarta Barat', 'Jakarta Utara', 'Jakarta Timur']
+INDIAN_STATES = ['MAHARASHTRA', 'KARNATAKA', 'TAMIL NADU', 'TELANGANA', 'UTTAR PRADESH', 'DELHI', 'KERALA',
+                 'WEST BENGAL', 'ANDHRA PRADESH', 'GUJARAT', 'HARYANA', 'RAJASTHAN', 'MADHYA PRADESH',
+                 'BIHAR', 'ODISHA', 'PUNJAB', 'ASSAM', 'UTTARAKHAND', 'JHARKHAND', 'GOA']
+NEIGHBOURHOOD_GROUPS = ['Manhattan', 'Brooklyn', 'Queens', 'Bronx', 'Staten Island', 'brookln', 'manhatan']
+MARKETS = {'APAC': 'Oceania', 'EU': 'Central', 'US': 'West', 'LATAM': 'South', 'Africa': 'Africa',
+           'EMEA': 'EMEA', 'Canada': 'Canada'}
+PRODUCT_LINES = {
+    'Children': ['Children Outdoors', 'Children Sports'],
+    'Clothes & Shoes': ['Clothes', 'Shoes'],
+    'Outdoors': ['Outdoors'],
+    'Sports': ['Assorted Sports Articles', 'Golf', 'Racket Sports', 'Running - Jogging', 'Swim Sports',
+               'Team Sports', 'Winter Sports'],
+}
+
+def _pick(rng, values, size, p=None):
+    '''
+  random categorical column of `values`, written as its string values
+    '''
+
+    if p is not None:
+        p = np.asarray(p, dtype=float) / np.sum(p)
+    return pd.Categorical.from_codes(rng.choice(len(values), size=size, p=p), categories=values)
+
+def _with_missing(rng, values, ratio):
+    '''
+  copy of the values with a random `ratio` of them set to missing
+    '''
+
+    values = pd.Series(values)
+    return values.mask(rng.random(len(values)) < ratio)
+
+def _date_text(rng, start, end, size, date_format):
+    '''
+  random dates between start & end formatted as text, every distinct day is formatted once
+    '''
+
+    days = pd.date_range(start, end, freq='D')
+    return np.asarray(days.strftime(date_format), dtype=object)[rng.integers(len(days), size=size)]
+
+def _duplicate_rows(rng, data, ratio):
+    '''
+  replace a random `ratio` of the rows with a copy of an earlier row
+    '''
+
+    take = np.arange(len(data))
+    duplicate = np.flatnonzero(rng.random(len(data)) < ratio)
+    take[duplicate] = (duplicate * rng.random(len(duplicate))).astype(int)
+    return data.iloc[take].reset_index(drop=True)
+
+def _write_chunks(path, rows, chunk_rows, seed, make_chunk, **to_csv_options):
+    '''
+  Write a csv file chunk by chunk
+
+  Parameters
+  ----------
+  path (str)            :   output .csv path
+  rows (int)            :   total number of rows
+  chunk_rows (int)      :   number of rows generated at once
+  seed (int)            :   random seed, each chunk use the generator of (seed, chunk number)
+  make_chunk (function) :   make_chunk(rng, start, size) return the dataframe of rows start
+                            to start + size
+  to_csv_options        :   other DataFrame.to_csv argument (sep, encoding, ...)
+
+  Returns
+  --------
+  path :  the written path
+    '''
+
+    header = True
+    for number, start in enumerate(range(0, max(rows, 1), chunk_rows)):
+        size = min(chunk_rows, rows - start)
+        chunk = make_chunk(np.random.default_rng([seed, number]), start, max(size, 0))
+        chunk.to_csv(path, mode='w' if header else 'a', header=header, index=False, **to_csv_options)
+        header = False
+    return path
+
+def generate_movielens(directory, rows=BUNDLED_ROWS['movielens'], seed=42, chunk_rows=1_000_000):
+    '''
+  ratings.csv (userId, movieId, rating, timestamp) & movies.csv (movieId, title, genres),
+  each user rate 150 distinct movies, the catalogue has about one movie per 10 ratings
+    '''
+
+    n_movies = max(rows // 10, 100)
+    per_user = min(150, n_movies)
+    stride = 7919 # coprime with n_movies, thus the movies of a user are distinct
+    while math.gcd(stride, n_movies) != 1:
+        stride += 2
+
+    def movies_chunk(rng, start, size):
+        movie_id = np.arange(start + 1, start + size + 1)
+        year = rng.integers(1920, 2020, size=size)
+        genres = ['|'.join(GENRES[i] for i in np.flatnonzero(row)) or '(no genres listed)'
+                  for row in rng.random((size, len(GENRES))) < 0.12]
+        return pd.DataFrame({'movieId': movie_id,
+                             'title': [f'Movie {movie} ({y})' for movie, y in zip(movie_id, year)],
+                             'genres': genres})
+
+    def ratings_chunk(rng, start, size):
+        row = np.arange(start, start + size)
+        user = row // per_user
+        first_movie = (user * 2_654_435_761) % n_movies # movies of a user start at a scattered id
+        movie = (first_movie + (row % per_user) * stride) % n_movies
+        rating = rng.integers(1, 11, size=size) / 2
+        timestamp = rng.integers(828_000_000, 1_540_000_000, size=size)
+        return pd.DataFrame({'userId': user + 1, 'movieId': movie + 1, 'rating': rating, 'timestamp': timestamp})
+
+    return {
+        'ratings': _write_chunks(os.path.join(directory, 'ratings.csv'), rows, chunk_rows, seed, ratings_chunk),
+        'movies': _write_chunks(os.path.join(directory, 'movies.csv'), n_movies, chunk_rows, seed + 1, movies_chunk),
+    }
+
+def generate_travelio(directory, rows=BUNDLED_ROWS['travelio'], seed=42, chunk_rows=1_000_000):
+    '''
+  travelio_dki_jakarta.csv, apartment & house listings around Jakarta
+    '''
+
+    n_buildings = max(rows // 5, 1)
+
+    def make_chunk(rng, start, size):
+        building = rng.integers(n_buildings, size=size)
+        bedrooms = _pick(rng, ['Studio', '1', '2', '3'], size, p=[30, 45, 20, 5])
+        return pd.DataFrame({
+            'ads_name': [f'Listing {row} By Travelio' for row in range(start, start + size)],
+            'property_type': _pick(rng, ['apartment', 'house'], size, p=[92, 8]),
+            'apartment_name': [f'Apartemen {b}' for b in building],
+            'area': [f'Area {b % 120}' for b in building],
+            'region': 'DKI Jakarta',
+            'city': _pick(rng, JAKARTA_CITIES, size),
+            'latitude': rng.uniform(-6.37, -6.09, size=size),
+            'longitude': rng.uniform(106.68, 106.98, size=size),
+            'bedrooms': bedrooms,
+            'bathrooms': rng.integers(1, 4, size=size),
+            'size': _with_missing(rng, np.round(rng.uniform(18, 160, size=size), 1), 0.03),
+            'is_furnished': _pick(rng, ['Full Furnished', 'Unfurnished'], size, p=[85, 15]),
+            'capacity': rng.integers(1, 9, size=size),
+            'rating': _with_missing(rng, np.round(rng.uniform(3.5, 5.0, size=size), 1), 0.38),
+            'yearly_price': rng.integers(10, 300, size=size) * 1_000_000 + rng.integers(0, 1000, size=size) * 500,
+            'property_management_type': _pick(rng, ['TPM', 'Non-TPM'], size, p=[80, 20]),
+        })
+
+    path = os.path.join(directory, 'travelio_dki_jakarta.csv')
+    return {'travelio': _write_chunks(path, rows, chunk_rows, seed, make_chunk)}
+
+def _branch_rows(rng, start, size, branch, city):
+    unit_price = np.round(rng.uniform(10, 100, size=size), 2)
+    quantity = rng.integers(1, 11, size=size)
+    cogs = np.round(unit_price * quantity, 2)
+    tax = np.round(cogs * 0.05, 4)
+    invoice = rng.integers(100_000_000, 1_000_000_000, size=size).astype(str)
+    return pd.DataFrame({
+        'Invoice ID': [f'{i[:3]}-{i[3:5]}-{i[5:]}' for i in invoice],
+        'Branch': branch,
+        'City': city,
+        'Customer type': _pick(rng, ['Member', 'Normal'], size),
+        'Gender': _pick(rng, ['Female', 'Male'], size),
+        'Product line': _pick(rng, ['Electronic accessories', 'Fashion accessories', 'Food and beverages',
+                                    'Health and beauty', 'Home and lifestyle', 'Sports and travel'], size),
+        'Unit price': unit_price,
+        'Quantity': quantity,
+        'Tax 5%': tax,
+        'Total': np.round(cogs + tax, 4),
+        'Date': _date_text(rng, '2019-01-01', '2019-03-30', size, '%m/%d/%Y'),
+        'Time': [f'{h}:{m:02d}' for h, m in zip(rng.integers(10, 21, size=size), rng.integers(0, 60, size=size))],
+        'Payment': _pick(rng, ['Cash', 'Credit card', 'Ewallet'], size),
+        'cogs': cogs,
+        'gross margin percentage': 4.761904762,
+        'gross income': tax,
+        'Rating': np.round(rng.uniform(4, 10, size=size), 1),
+    })
+
+def generate_branch(directory, rows=BUNDLED_ROWS['branch'], seed=42, chunk_rows=1_000_000):
+    '''
+  branch_A (.xlsx up to XLSX_MAX_ROWS rows, else .csv), branch_B.csv & branch_C.csv with ';'
+  separator, the rows are split evenly across the 3 branches
+    '''
+
+    paths = {}
+    for number, (branch, city) in enumerate((('A', 'Yangon'), ('B', 'Mandalay'), ('C', 'Naypyitaw'))):
+        branch_rows = rows // 3 + (number < rows % 3)
+        make_chunk = lambda rng, start, size, branch=branch, city=city: _branch_rows(rng, start, size, branch, city)
+        if branch == 'A' and branch_rows <= XLSX_MAX_ROWS:
+            data = make_chunk(np.random.default_rng([seed + number, 0]), 0, branch_rows)
+            data['Date'] = pd.to_datetime(data['Date'], format='%m/%d/%Y') # excel keep a real date cell
+            path = os.path.join(directory, 'branch_A.xlsx')
+            data.to_excel(path, index=False)
+        else:
+            path = _write_chunks(os.path.join(directory, f'branch_{branch}.csv'), branch_rows, chunk_rows,
+                                 seed + number, make_chunk, sep=';')
+        paths[f'branch_{branch}'] = path
+    return paths
+
+def generate_amazon_sales(directory, rows=BUNDLED_ROWS['amazon_sales'], seed=42, chunk_rows=1_000_000):
+    '''
+  Amazon Sale Report.csv, 'ship-state' is written in mixed case (e.g. 'Goa' & 'GOA')
+    '''
+
+    state_weight = 1 / np.arange(1, len(INDIAN_STATES) + 1) # a few big states, a long tail
+    states = INDIAN_STATES + [state.title() for state in INDIAN_STATES]
+
+    def make_chunk(rng, start, size):
+        state = rng.choice(len(INDIAN_STATES), size=size, p=state_weight / state_weight.sum())
+        state = np.where(rng.random(size) < 0.1, state + len(INDIAN_STATES), state) # 10% in title case
+        order = np.char.zfill(rng.integers(0, 10**17, size=size).astype(str), 17)
+        return pd.DataFrame({
+            'index': np.arange(start, start + size),
+            'Order ID': [f'{o[:3]}-{o[3:10]}-{o[10:]}' for o in order], # e.g. 405-8078784-5731545
+            'Date': _date_text(rng, '2022-03-31', '2022-06-29', size, '%m-%d-%y'),
+            'Status': _pick(rng, ['Shipped', 'Shipped - Delivered to Buyer', 'Cancelled', 'Pending'], size,
+                            p=[60, 25, 12, 3]),
+            'Fulfilment': _pick(rng, ['Amazon', 'Merchant'], size, p=[70, 30]),
+            'Sales Channel': 'Amazon.in',
+            'ship-service-level': _pick(rng, ['Expedited', 'Standard'], size, p=[70, 30]),
+            'Style': [f'SET{s}' for s in rng.integers(100, 500, size=size)],
+            'SKU': [f'SKU{s}' for s in rng.integers(1000, 9000, size=size)],
+            'Category': _pick(rng, ['Set', 'kurta', 'Western Dress', 'Top', 'Ethnic Dress', 'Blouse'], size),
+            'Size': _pick(rng, ['XS', 'S', 'M', 'L', 'XL', 'XXL', '3XL', 'Free'], size),
+            'ASIN': [f'B0{a}' for a in rng.integers(10**7, 10**8, size=size)],
+            'Courier Status': _with_missing(rng, _pick(rng, ['Shipped', 'Unshipped', 'Cancelled'], size), 0.05),
+            'Qty': rng.integers(0, 4, size=size),
+            'currency': 'INR',
+            'Amount': np.round(rng.uniform(200, 2500, size=size), 2),
+            'ship-city': [f'CITY {c}' for c in rng.integers(0, 500, size=size)],
+            'ship-state': pd.Categorical.from_codes(state, categories=states),
+            'ship-postal-code': rng.integers(110_000, 860_000, size=size).astype(float),
+            'ship-country': 'IN',
+            'promotion-ids': None,
+            'B2B': rng.random(size) < 0.01,
+            'fulfilled-by': _with_missing(rng, pd.Series('Easy Ship', index=range(size)), 0.7),
+            'Unnamed: 22': _with_missing(rng, pd.Series(False, index=range(size), dtype=object), 0.4),
+        })
+
+    path = os.path.join(directory, 'Amazon Sale Report.csv')
+    return {'amazon_sales': _write_chunks(path, rows, chunk_rows, seed, make_chunk)}
+
+def generate_airbnb(directory, rows=BUNDLED_ROWS['airbnb'], seed=42, chunk_rows=1_000_000):
+    '''
+  Airbnb_Open_Data.csv with the dirty values to clean: '$1,060 ' prices, missing
+  neighbourhood group & price, 'brookln' / 'manhatan' typos, availability outside 0-365
+  and about 0.5% duplicated rows
+    '''
+
+    def make_chunk(rng, start, size):
+        price = rng.integers(50, 1200, size=size)
+        price[rng.random(size) < 0.02] *= 8 # outliers
+        data = pd.DataFrame({
+            'id': 1_000_000 + np.arange(start, start + size),
+            'NAME': [f'Listing {row}' for row in range(start, start + size)],
+            'host id': rng.integers(10**10, 10**11, size=size),
+            'host_identity_verified': _with_missing(rng, _pick(rng, ['verified', 'unconfirmed'], size), 0.003),
+            'host name': _pick(rng, ['Alberta', 'Sara', 'John', 'Maria', 'Michael', 'David'], size),
+            'neighbourhood group': _with_missing(rng, _pick(rng, NEIGHBOURHOOD_GROUPS, size,
+                                                            p=[42, 41, 13, 2.6, 1.4, 0.05, 0.05]), 0.003),
+            'neighbourhood': [f'Neighbourhood {n}' for n in rng.integers(0, 220, size=size)],
+            'lat': np.round(rng.uniform(40.50, 40.92, size=size), 5),
+            'long': np.round(rng.uniform(-74.25, -73.70, size=size), 5),
+            'country': 'United States',
+            'country code': 'US',
+            'instant_bookable': rng.random(size) < 0.5,
+            'cancellation_policy': _pick(rng, ['flexible', 'moderate', 'strict'], size),
+            'room type': _pick(rng, ['Entire home/apt', 'Private room', 'Shared room', 'Hotel room'], size,
+                               p=[52, 45, 2, 1]),
+            'Construction year': rng.integers(2003, 2023, size=size).astype(float),
+            'price': _with_missing(rng, pd.Series([f'${p:,} ' for p in price]), 0.002),
+            'service fee': [f'${round(p * 0.2):,} ' for p in price],
+            'minimum nights': rng.integers(1, 31, size=size).astype(float),
+            'number of reviews': rng.integers(0, 500, size=size).astype(float),
+            'last review': _date_text(rng, '2015-01-01', '2022-05-21', size, '%m/%d/%Y'),
+            'reviews per month': np.round(rng.uniform(0, 10, size=size), 2),
+            'review rate number': rng.integers(1, 6, size=size).astype(float),
+            'calculated host listings count': rng.integers(1, 30, size=size).astype(float),
+            'availability 365': _with_missing(rng, np.where(rng.random(size) < 0.02, rng.integers(-10, 427, size=size),
+                                                            rng.integers(0, 366, size=size)).astype(float), 0.004),
+            'house_rules': _pick(rng, ['No smoking', 'No pets', 'No parties', ''], size),
+            'license': None,
+        })
+        return _duplicate_rows(rng, data, 0.005)
+
+    path = os.path.join(directory, 'Airbnb_Open_Data.csv')
+    return {'airbnb': _write_chunks(path, rows, chunk_rows, seed, make_chunk)}
+
+def generate_superstore(directory, rows=BUNDLED_ROWS['superstore'], seed=42, chunk_rows=1_000_000):
+    '''
+  Global_Superstore2.csv (cp1252), orders from 2011 to 2014 with mm/dd/yyyy dates
+    '''
+
+    markets = list(MARKETS)
+
+    def make_chunk(rng, start, size):
+        market = rng.integers(len(markets), size=size)
+        order_date = pd.Timestamp('2011-01-01') + pd.to_timedelta(rng.integers(0, 1461, size=size), unit='D')
+        ship_date = order_date + pd.to_timedelta(rng.integers(0, 8, size=size), unit='D')
+        sales = np.round(rng.gamma(1.2, 200, size=size), 3)
+        return pd.DataFrame({
+            'Row ID': np.arange(start + 1, start + size + 1),
+            'Order ID': [f'CA-{y}-{o}' for y, o in zip(order_date.year, rng.integers(100_000, 200_000, size=size))],
+            'Order Date': order_date.strftime('%m/%d/%Y'),
+            'Ship Date': ship_date.strftime('%m/%d/%Y'),
+            'Ship Mode': _pick(rng, ['Standard Class', 'Second Class', 'First Class', 'Same Day'], size,
+                               p=[60, 20, 15, 5]),
+            'Customer ID': [f'CU-{c}' for c in rng.integers(10_000, 20_000, size=size)],
+            'Customer Name': _pick(rng, ['Aaron Bergman', 'Justin Ritter', 'Craig Reiter', 'Zoë Müller'], size),
+            'Segment': _pick(rng, ['Consumer', 'Corporate', 'Home Office'], size, p=[52, 30, 18]),
+            'City': [f'City {c}' for c in rng.integers(0, 3600, size=size)],
+            'State': [f'State {s}' for s in rng.integers(0, 1000, size=size)],
+            'Country': [f'Country {c}' for c in rng.integers(0, 147, size=size)],
+            'Postal Code': _with_missing(rng, rng.integers(1000, 99999, size=size).astype(float), 0.8),
+            'Market': pd.Categorical.from_codes(market, categories=markets),
+            'Region': pd.Categorical.from_codes(market, categories=list(MARKETS.values())),
+            'Product ID': [f'TEC-AC-{p}' for p in rng.integers(10_000_000, 10_010_000, size=size)],
+            'Category': _pick(rng, ['Office Supplies', 'Technology', 'Furniture'], size, p=[61, 20, 19]),
+            'Sub-Category': _pick(rng, ['Binders', 'Storage', 'Art', 'Paper', 'Chairs', 'Phones'], size),
+            'Product Name': [f'Product {p}' for p in rng.integers(0, 3800, size=size)],
+            'Sales': sales,
+            'Quantity': rng.integers(1, 15, size=size),
+            'Discount': _pick(rng, ['0', '0.1', '0.2', '0.5'], size, p=[60, 15, 20, 5]),
+            'Profit': np.round(sales * rng.uniform(-0.3, 0.4, size=size), 4),
+            'Shipping Cost': np.round(sales * rng.uniform(0.02, 0.15, size=size), 2),
+            'Order Priority': _pick(rng, ['Medium', 'High', 'Critical', 'Low'], size, p=[57, 30, 8, 5]),
+        })
+
+    path = os.path.join(directory, 'Global_Superstore2.csv')
+    return {'superstore': _write_chunks(path, rows, chunk_rows, seed, make_chunk, encoding='cp1252')}
+
+def generate_orders(directory, rows=BUNDLED_ROWS['orders'], seed=42, chunk_rows=1_000_000):
+    '''
+  orders.csv & product_supplier.csv (utf-8 with BOM), the Customer Status is written in
+  mixed case (e.g. 'GOLD' & 'Gold') and a few orders are duplicated or miss a value
+    '''
+
+    n_products = max(rows // 170, 50)
+    n_customers = max(rows // 13, 10)
+    lines = [(line, category) for line, categories in PRODUCT_LINES.items() for category in categories]
+    product_ids = 210_100_100_001 + np.arange(n_products) * 1_013
+
+    def products_chunk(rng, start, size):
+        line = rng.integers(len(lines), size=size)
+        supplier = rng.integers(0, 64, size=size)
+        return pd.DataFrame({
+            'Product ID': product_ids[start:start + size],
+            'Product Line': [lines[l][0] for l in line],
+            'Product Category': [lines[l][1] for l in line],
+            'Product Group': [f'{lines[l][1]}, Group {g}' for l, g in zip(line, rng.integers(0, 5, size=size))],
+            'Product Name': [f'Product {p}' for p in range(start, start + size)],
+            'Supplier Country': _pick(rng, ['US', 'NO', 'ES', 'GB', 'DE', 'SE', 'NL', 'FR'], size),
+            'Supplier Name': [f'Supplier {s}' for s in supplier],
+            'Supplier ID': supplier * 97 + 50,
+        })
+
+    # same status of a customer in every order, written in mixed case
+    customer_status = np.random.default_rng([seed, 1 << 20]).choice(3, size=n_customers, p=[0.6, 0.3, 0.1])
+
+    def orders_chunk(rng, start, size):
+        customer = rng.integers(n_customers, size=size)
+        status = customer_status[customer] + 3 * (rng.random(size) < 0.1) # 10% in upper case
+        order_date = pd.Timestamp('2017-01-01') + pd.to_timedelta(rng.integers(0, 1826, size=size), unit='D')
+        delivery_date = order_date + pd.to_timedelta(rng.integers(0, 30, size=size), unit='D')
+        quantity = rng.integers(1, 6, size=size)
+        cost = np.round(rng.uniform(2, 300, size=size), 2)
+        data = pd.DataFrame({
+            'Customer ID': customer + 1,
+            'Customer Status': pd.Categorical.from_codes(status, categories=['Silver', 'Gold', 'Platinum',
+                                                                             'SILVER', 'GOLD', 'PLATINUM']),
+            'Date Order was placed': order_date.strftime('%d-%b-%y'),
+            'Delivery Date': delivery_date.strftime('%d-%b-%y'),
+            'Order ID': 1_230_000_000 + np.arange(start, start + size),
+            'Product ID': product_ids[rng.integers(n_products, size=size)],
+            'Quantity Ordered': quantity,
+            'Total Retail Price for This Order': np.round(cost * quantity * rng.uniform(1.2, 2.5, size=size), 2),
+            'Cost Price Per Unit': cost,
+        })
+        data = _duplicate_rows(rng, data, 0.001)
+        data['Quantity Ordered'] = _with_missing(rng, data['Quantity Ordered'], 0.0005).astype('Int64')
+        return data
+
+    return {
+        'orders': _write_chunks(os.path.join(directory, 'orders.csv'), rows, chunk_rows, seed, orders_chunk),
+        'product_supplier': _write_chunks(os.path.join(directory, 'product_supplier.csv'), n_products,
+                                          chunk_rows, seed + 1, products_chunk, encoding='utf-8-sig'),
+    }
+
+def generate_events(directory, rows=BUNDLED_ROWS['events'], seed=42, chunk_rows=1_000_000):
+    '''
+  event_samples.csv, e-commerce view / cart / purchase events of about 8 events per user,
+  the users of a chunk are mostly new users
+    '''
+
+    start_time = np.datetime64('2020-09-24T11:57:06', 's')
+    window = 150 * 86_400 # events within 150 days
+
+    def make_chunk(rng, start, size):
+        # users of this chunk, plus a few returning users of the earlier chunks
+        user = (start + rng.integers(size, size=size)) // 8
+        user = np.where(rng.random(size) < 0.05, rng.integers(max(start + size, 1), size=size) // 8, user)
+        seconds = rng.integers(window, size=size)
+        product = rng.integers(1_000_000, 1_000_000 + 50_000, size=size)
+        event_time = pd.Series(np.datetime_as_string(start_time + seconds, unit='s'))
+        return pd.DataFrame({
+            'event_time': event_time.str.replace('T', ' ', regex=False) + ' UTC',
+            'event_type': _pick(rng, ['view', 'cart', 'purchase'], size, p=[86, 8, 6]),
+            'product_id': product,
+            'category_id': 2_144_415_922_528_452_715 + (product % 400) * 1_000_003,
+            'category_code': _with_missing(rng, _pick(rng, ['electronics.smartphone', 'computers.notebook',
+                                                            'electronics.audio.headphone', 'computers.peripherals.mouse'],
+                                                      size), 0.27),
+            'brand': _with_missing(rng, _pick(rng, ['samsung', 'apple', 'xiaomi', 'logitech', 'asus', 'sony'], size), 0.2),
+            'price': np.round(rng.gamma(1.5, 100, size=size), 2),
+            'user_id': 1_515_915_625_353_226_922 + user,
+            'user_session': [f'{s:016x}' for s in rng.integers(0, 2**62, size=size)],
+        })
+
+    path = os.path.join(directory, 'event_samples.csv')
+    return {'events': _write_chunks(path, rows, chunk_rows, seed, make_chunk)}
+
+GENERATORS = {
+    'movielens': generate_movielens,
+    'travelio': generate_travelio,
+    'branch': generate_branch,
+    'amazon_sales': generate_amazon_sales,
+    'airbnb': generate_airbnb,
+    'superstore': generate_superstore,
+    'orders': generate_orders,
+    'events': generate_events,
+}
+
+def generate(name, directory, rows=None, seed=42, chunk_rows=1_000_000):
+    '''
+  Generate a synthetic dataset
+
+  Parameters
+  ----------
+  name (str)       :   dataset name in GENERATORS, e.g. 'orders'
+  directory (str)  :   output folder, created if it does not exist
+  rows (int)       :   number of rows, default is the size of the original dataset (BUNDLED_ROWS)
+  seed (int)       :   random seed
+  chunk_rows (int) :   number of rows generated & written at once
+
+  Returns
+  --------
+  paths :  dict of file name and its path
+    '''
+
+    if name not in GENERATORS:
+        raise KeyError(f'unknown dataset {name}, available: {", ".join(GENERATORS)}')
+    os.makedirs(directory, exist_ok=True)
+    rows = BUNDLED_ROWS[name] if rows is None else rows
+    return GENERATORS[name](directory, rows, seed=seed, chunk_rows=chunk_rows)
@@ -0,0 +1,428 @@
+import contextlib
+import gc
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .. import instrumentation
+from ..column_cache import CACHE_DIR_ENV
+from ..schemas import read_dataset
+from .generators import BUNDLED_ROWS, GENERATOR_VERSION, generate
+
+'''
+Benchmark suite of the data wrangling tasks.
+Every task runs its entry points (the functions the task scripts & the command line call,
+e.g. get_unwatched_movie or import_data) on synthetic data, stage by stage:
+- wall & cpu time of each stage are measured without any profiler, the best of `repeat`
+  runs is kept (the median is also reported)
+- peak memory of each stage is measured in one more run under tracemalloc (python & numpy
+  allocations), the maximum resident memory of the process is reported per task
+- every run is cold, the columnar caches & indexes built next to the data are removed first
+  and the data & indexes a task keeps loaded in the process are emptied
+- the first timed run also records the instrumented stages of the engines (see
+  data_wrangling.instrumentation) as the breakdown of every stage
+The result is a JSON document (commit, versions, data size and the numbers of every
+stage), `compare` put two results side by side, e.g. before & after a commit.
+'''
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CACHE_PATTERNS = ('*.cols', '*.csr') # columnar caches & watched movies index built next to the data
+
+def _clear_loaded(*caches):
+    '''
+  empty the data & indexes a task keeps loaded in the process, thus every run is cold
+    '''
+
+    for cache in caches:
+        cache.clear()
+
+def _unwatched_stages(paths, work_dir, state):
+    from ..unwatched_movie import unwatched, watched_index
+
+    _clear_loaded(unwatched._metadata_cache, unwatched._ranking_cache, watched_index._index_cache)
+    config = {'path': {'user_data': paths['ratings'], 'metadata': paths['movies'],
+                       'index': os.path.join(work_dir, 'ratings.csr')}}
+    first_user = int(read_dataset('ratings', paths['ratings'], columns=['userId'], nrows=1)['userId'].iloc[0])
+
+    def first_call(): # build the watched movies index & load the metadata
+        return len(unwatched.get_unwatched_movie(first_user, config))
+
+    def unwatched_movie():
+        index = watched_index.load_watched_index(paths['ratings'], config['path']['index'])
+        state['users'] = np.random.default_rng(0).choice(index.users, size=min(1000, len(index.users)), replace=False)
+        return sum(len(unwatched.get_unwatched_movie(user_id, config)) for user_id in state['users'])
+
+    def top_unwatched():
+        users = state.pop('users')
+        return sum(len(unwatched.get_top_unwatched_movies(user_id, config, k=10)) for user_id in users)
+
+    return [('first_call', first_call), ('get_unwatched_movie', unwatched_movie),
+            ('get_top_unwatched_movies', top_unwatched)]
+
+def _house_stages(paths, work_dir, state):
+    from ..house_recommendation import recommendation
+    from ..house_recommendation.recommendation_service import RecommendationService, make_requests
+
+    _clear_loaded(recommendation._listing_cache)
+    data_config = {'path': paths['travelio']}
+    requests = make_requests(read_dataset('travelio', paths['travelio'], columns=['latitude', 'longitude']),
+                             count=2000, hot_ratio=0)
+
+    def first_call(): # load the listings & build their indexes
+        n, user_config = requests[0]
+        return len(recommendation.get_user_recommendation(n, user_config, data_config))
+
+    def user_recommendation():
+        return sum(len(recommendation.get_user_recommendation(n, user_config, data_config))
+                   for n, user_config in requests)
+
+    def service():
+        service = RecommendationService(data_config)
+        service.load()
+        keys = list(dict.fromkeys(service.cache_key(n, user_config) for n, user_config in requests))
+        return len(service.compute(keys))
+
+    return [('first_call', first_call), ('get_user_recommendation', user_recommendation), ('service_batch', service)]
+
+def _export_stages(paths, work_dir, state, thresh=0.10, chunksize=100_000):
+    from ..promising_state.export import export_promising_state
+
+    def export(name, **options):
+        output_dir = os.path.join(work_dir, name)
+        os.makedirs(output_dir, exist_ok=True)
+        config_file = {'path': {'input': paths['amazon_sales'], 'output': output_dir + os.sep}}
+        with contextlib.redirect_stdout(io.StringIO()): # the export prints every state file
+            export_promising_state(config_file, thresh, workers=4, **options)
+        return len(os.listdir(output_dir))
+
+    def in_memory():
+        return export('in_memory')
+
+    def streaming():
+        return export('streaming', chunksize=chunksize)
+
+    return [('export_promising_state', in_memory), ('export_streaming', streaming)]
+
+def _merge_stages(paths, work_dir, state):
+    from ..merge_transactions.merge import import_data
+
+    filenames = [paths[name] for name in sorted(paths)]
+
+    def cold(): # parse the files & build their columnar caches
+        return len(import_data(filenames, workers=1, cache=True))
+
+    def cached():
+        return len(import_data(filenames, workers=1, cache=True))
+
+    return [('import_data', cold), ('import_data_cached', cached)]
+
+def _airbnb_stages(paths, work_dir, state):
+    from ..clean_airbnb.cleaning import clean_airbnb
+    from ..clean_airbnb.streaming_cleaner import clean_airbnb_streaming
+
+    def in_memory(): # columnar cache & the fused RuleSet
+        return len(clean_airbnb(paths['airbnb']))
+
+    def clean_streaming():
+        report = clean_airbnb_streaming(paths['airbnb'], os.path.join(work_dir, 'airbnb_clean.csv'))
+        return report['rows_out']
+
+    return [('clean_airbnb', in_memory), ('clean_streaming', clean_streaming)]
+
+def _mom_stages(paths, work_dir, state):
+    from ..month_over_month.monthly_sales_store import month_over_month
+
+    def cold(): # parse the orders & build their columnar cache
+        return len(month_over_month(paths['superstore']))
+
+    def cached():
+        return len(month_over_month(paths['superstore']))
+
+    return [('month_over_month', cold), ('month_over_month_cached', cached)]
+
+def _retail_stages(paths, work_dir, state):
+    from ..retail_orders.retail_report import build_report, load_data
+
+    def load():
+        state['data'] = load_data(paths['orders'], paths['product_supplier'])
+        return len(state['data'])
+
+    def report():
+        return len(build_report(state.pop('data'))['loyal_customers'])
+
+    return [('load_data', load), ('build_report', report)]
+
+def _events_stages(paths, work_dir, state):
+    from ..time_to_purchase.funnel import run_funnels
+    from ..time_to_purchase.purchase_duration import read_events, time_to_purchase
+
+    def read():
+        state['events'] = read_events(paths['events'])
+        return len(state['events'])
+
+    def purchase_duration():
+        return len(time_to_purchase(state['events']))
+
+    def funnels():
+        per_user, _ = run_funnels(state.pop('events'), {'funnel': ['view', 'cart', 'purchase']})['funnel']
+        return len(per_user)
+
+    return [('read_events', read), ('time_to_purchase', purchase_duration), ('funnels', funnels)]
+
+# task name, its synthetic datasets and the function returning its stages
+TASKS = {
+    'unwatched_movie': (['movielens'], _unwatched_stages),
+    'house_recommendation': (['travelio'], _house_stages),
+    'export_promising_state': (['amazon_sales'], _export_stages),
+    'merge_transactions': (['branch'], _merge_stages),
+    'clean_airbnb': (['airbnb'], _airbnb_stages),
+    'month_over_month': (['superstore'], _mom_stages),
+    'retail_orders': (['orders'], _retail_stages),
+    'time_to_purchase': (['events'], _events_stages),
+}
+
+def ensure_datasets(data_dir, datasets, rows=None, scale=1.0, seed=42):
+    '''
+  Generate the synthetic datasets, a dataset already generated with the same size, seed
+  and generator version (recorded in `<data_dir>/manifest.json`) is reused
+
+  Parameters
+  ----------
+  data_dir (str)   :   folder of the generated data
+  datasets (list)  :   dataset names, see generators.GENERATORS
+  rows (int)       :   number of rows of every dataset (optional)
+  scale (float)    :   multiplier of the original dataset size, used when rows is not given
+  seed (int)       :   random seed
+
+  Returns
+  --------
+  manifest :  dict of dataset name and its rows, seed and file paths
+    '''
+
+    os.makedirs(data_dir, exist_ok=True)
+    manifest_path = os.path.join(data_dir, 'manifest.json')
+    try:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        manifest = {}
+
+    for name in datasets:
+        dataset_rows = rows if rows is not None else max(int(BUNDLED_ROWS[name] * scale), 1)
+        entry = manifest.get(name)
+        if entry is None or (entry['rows'], entry['seed'], entry.get('version')) != (dataset_rows, seed, GENERATOR_VERSION) \
+                or not all(os.path.exists(path) for path in entry['paths'].values()):
+            manifest.pop(name, None) # the files are being rewritten
+            with open(manifest_path, 'w') as file:
+                json.dump(manifest, file, indent=2)
+            paths = generate(name, os.path.join(data_dir, name), rows=dataset_rows, seed=seed)
+            manifest[name] = {'rows': dataset_rows, 'seed': seed, 'version': GENERATOR_VERSION, 'paths': paths}
+            with open(manifest_path, 'w') as file:
+                json.dump(manifest, file, indent=2)
+    return {name: manifest[name] for name in datasets}
+
+def _clear_caches(data_dir, work_dir):
+    cache_root = os.environ.get(CACHE_DIR_ENV) # columnar caches kept out of the data folder
+    for directory in [data_dir] + ([cache_root] if cache_root else []):
+        for pattern in CACHE_PATTERNS:
+            for path in glob.glob(os.path.join(directory, '**', pattern), recursive=True):
+                shutil.rmtree(path, ignore_errors=True)
+    shutil.rmtree(work_dir, ignore_errors=True)
+    os.makedirs(work_dir, exist_ok=True)
+
+def _run_stages(stages_of, paths, data_dir, work_dir, trace=False):
+    '''
+  one cold run of a task, return the measure of every stage
+    '''
+
+    _clear_caches(data_dir, work_dir)
+    state = {}
+    measures = {}
+    for name, stage in stages_of(paths, work_dir, state):
+        gc.collect()
+        if trace:
+            tracemalloc.start()
+        wall, cpu = time.perf_counter(), time.process_time()
+        with instrumentation.stage(name):
+            rows_out = stage()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            measures[name] = {'peak_mb': peak / 2**20}
+        else:
+            measures[name] = {'wall_s': wall, 'cpu_s': cpu, 'rows_out': int(rows_out)}
+    return measures
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError: # not available on windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10 # bytes on macOS, KB on linux
+
+def run_task(name, manifest, data_dir, work_dir, repeat=3, memory=True):
+    '''
+  Benchmark one task
+
+  Parameters
+  ----------
+  name (str)       :   task name in TASKS
+  manifest (dict)  :   output of ensure_datasets, contains the datasets of the task
+  data_dir (str)   :   folder of the generated data
+  work_dir (str)   :   scratch folder for the task outputs
+  repeat (int)     :   number of timed run
+  memory (bool)    :   measure the peak memory of each stage in one more run
+
+  Returns
+  --------
+  result :  dict of the rows of every dataset (`rows_in`), the total wall time (`wall_s`),
+            the maximum resident memory of the process (`max_rss_mb`), the best & median
+            wall time, cpu time, peak memory and rows out of every stage (`stages`) and the
+            instrumented stages of the first run (`breakdown`)
+    '''
+
+    datasets, stages_of = TASKS[name]
+    paths = {key: path for dataset in datasets for key, path in manifest[dataset]['paths'].items()}
+
+    instrumentation.enable(memory=False) # breakdown of the first run, without tracemalloc
+    try:
+        runs = [_run_stages(stages_of, paths, data_dir, work_dir)]
+    finally:
+        registry = instrumentation.disable()
+    runs += [_run_stages(stages_of, paths, data_dir, work_dir) for _ in range(repeat - 1)]
+    traced = _run_stages(stages_of, paths, data_dir, work_dir, trace=True) if memory else {}
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    stages = {}
+    for stage in runs[0]:
+        walls = [run[stage]['wall_s'] for run in runs]
+        stages[stage] = {
+            'wall_s': round(min(walls), 6),
+            'wall_s_median': round(statistics.median(walls), 6),
+            'cpu_s': round(min(run[stage]['cpu_s'] for run in runs), 6),
+            'peak_mb': round(traced[stage]['peak_mb'], 3) if stage in traced else None,
+            'rows_out': runs[0][stage]['rows_out'],
+        }
+    return {
+        'rows_in': {dataset: manifest[dataset]['rows'] for dataset in datasets},
+        'wall_s': round(sum(stage['wall_s'] for stage in stages.values()), 6),
+        'max_rss_mb': _max_rss_mb(),
+        'stages': stages,
+        'breakdown': [{key: round(value, 6) if isinstance(value, float) else value for key, value in stage.items()
+                       if key != 'peak_mb'} for stage in registry.aggregate()],
+    }
+
+def _git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip() != ''
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+def run_suite(data_dir, tasks=None, rows=None, scale=1.0, seed=42, repeat=3, memory=True, output=None):
+    '''
+  Generate the synthetic data (if needed) and benchmark the tasks
+
+  Parameters
+  ----------
+  data_dir (str)   :   folder of the generated data, reused between runs
+  tasks (list)     :   task names in TASKS, default is every task
+  rows (int)       :   number of rows of every dataset (optional)
+  scale (float)    :   multiplier of the original dataset size, used when rows is not given
+  seed (int)       :   random seed of the data
+  repeat (int)     :   number of timed run of each task
+  memory (bool)    :   measure the peak memory of each stage
+  output (str)     :   path of the JSON result (optional)
+
+  Returns
+  --------
+  result :  dict of the environment and the result of every task
+    '''
+
+    tasks = list(TASKS) if tasks is None else tasks
+    unknown = [name for name in tasks if name not in TASKS]
+    if unknown:
+        raise KeyError(f'unknown task {unknown}, available: {", ".join(TASKS)}')
+
+    manifest = ensure_datasets(data_dir, sorted({dataset for name in tasks for dataset in TASKS[name][0]}),
+                               rows=rows, scale=scale, seed=seed)
+    commit, dirty = _git_commit()
+    result = {
+        'commit': commit,
+        'dirty': dirty,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'repeat': repeat,
+        'tasks': {},
+    }
+    for name in tasks:
+        result['tasks'][name] = run_task(name, manifest, data_dir, os.path.join(data_dir, 'work', name),
+                                         repeat=repeat, memory=memory)
+
+    if output is not None:
+        with open(output, 'w') as file:
+            json.dump(result, file, indent=2)
+    return result
+
+def compare(old, new, threshold=0.10, min_seconds=0.01):
+    '''
+  Compare two benchmark results stage by stage
+
+  Parameters
+  ----------
+  old (dict)          :   baseline result (output of run_suite or its JSON file)
+  new (dict)          :   new result
+  threshold (float)   :   relative slowdown (or memory growth) flagged as a regression
+  min_seconds (float) :   a slowdown smaller than this is timer noise, not a regression
+
+  Returns
+  --------
+  comparison :  dataframe of task, stage, old & new wall time / peak memory, their ratio
+                (new / old) and a regression flag, only the stages of both results
+    '''
+
+    rows = []
+    for task, new_task in new['tasks'].items():
+        old_task = old['tasks'].get(task)
+        if old_task is None:
+            continue
+        for stage, new_stage in new_task['stages'].items():
+            old_stage = old_task['stages'].get(stage)
+            if old_stage is None:
+                continue
+            row = {'task': task, 'stage': stage}
+            for measure in ('wall_s', 'peak_mb'):
+                before, after = old_stage.get(measure), new_stage.get(measure)
+                row[f'old_{measure}'], row[f'new_{measure}'] = before, after
+                row[f'{measure}_ratio'] = after / before if before and after is not None else np.nan
+            rows.append(row)
+
+    comparison = pd.DataFrame(rows, columns=['task', 'stage', 'old_wall_s', 'new_wall_s', 'wall_s_ratio',
+                                             'old_peak_mb', 'new_peak_mb', 'peak_mb_ratio'])
+    slower = (comparison['wall_s_ratio'] > 1 + threshold) & \
+             (comparison['new_wall_s'] - comparison['old_wall_s'] > min_seconds)
+    comparison['regression'] = slower | (comparison['peak_mb_ratio'] > 1 + threshold)
+    return comparison
@@ -0,0 +1,10 @@
+'''
+Clean AirBnB data task, in memory (`clean_airbnb`) or chunk by chunk (`clean_airbnb_streaming`)
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'clean_airbnb': '.cleaning',
+    'clean_airbnb_streaming': '.streaming_cleaner',
+})
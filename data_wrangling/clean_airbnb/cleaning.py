@@ -0,0 +1,64 @@
+from ..column_cache import load_dataset
+from ..instrumentation import instrument
+from ..quality import Duplicates, MapValues, Missing, Normalize, Outlier, Range, RuleSet
+
+'''
+Cleaning of the AirBnB guests & hosts reviews: missing value, unconsistency in
+`neighbourhood group`, price & `availability 365` outliers and duplicates, declared as
+the data quality rules of AIRBNB_RULES (quality.py).
+For a listing dump larger than the memory, clean_airbnb_streaming() (streaming_cleaner.py)
+applies the same rules chunk by chunk in fixed memory.
+'''
+
+# Removing the unconsitency value in 'neighborhood group'
+MAP_VALUE_NG = {
+    'brookln' : 'Brooklyn',
+    'manhatan' : 'Brooklyn'
+}
+AVAILABILITY_RANGE = (0, 365) # a listing is available for 0-365 days during the year
+
+def parse_price(price):
+    '''
+  convert price text (e.g. '$1,060') into int
+    '''
+
+    return price.str.replace('$', '').str.replace(',', '').astype('int')
+
+AIRBNB_RULES = RuleSet([
+    # delete data in 'neighbourhood group' and 'price' column with missing value
+    Missing(['neighbourhood group', 'price']),
+    MapValues('neighbourhood group', MAP_VALUE_NG),
+    # convert value in 'price' column into int for handling outlier
+    Normalize('price', parse_price),
+    # handle outlier using IQR method and replace outlier with median value
+    Outlier('price', quantile=0.75, factor=1.5, replace='median'),
+    # handle outlier with delete data in column 'availability 365', value in this column
+    # has to be in range 0-365
+    Range('availability 365', *AVAILABILITY_RANGE),
+    # delete duplicates data
+    Duplicates(),
+])
+
+@instrument
+def clean_airbnb(path, report=False):
+    '''
+  Clean the AirBnB data
+
+  Parameters
+  ----------
+  path (str)    :   path of Airbnb_Open_Data.csv
+  report (bool) :   also return the number of rows rejected & normalized by every rule
+
+  Returns
+  --------
+  airbnb_data :  cleaned dataframe
+  report      :  dataframe with the rows rejected & normalized by every rule (if report)
+    '''
+
+    airbnb_data = load_dataset('airbnb', path) # import data, parsed once into a columnar cache
+
+    # every rule is applied in one pass: one row mask, the kept rows are copied once
+    airbnb_data, rule_report = AIRBNB_RULES.apply(airbnb_data)
+    if report:
+        return airbnb_data, rule_report
+    return airbnb_data
@@ -0,0 +1,232 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from ..instrumentation import instrument, stage
+from ..quality import replace_values
+from ..schemas import DATASETS
+from .cleaning import AVAILABILITY_RANGE, MAP_VALUE_NG, parse_price
+
+'''
+Bounded-memory version of the AirBnB cleaning (same rules as clean_airbnb, cleaning.py).
+The chunks are read with the declared dtypes of the dataset (schemas.py) and the price
+is parsed by the same parse_price as the in-memory cleaning, the undeclared columns are
+kept as text thus every chunk has the same dtypes. The data is read chunk by chunk twice:
+  1. first pass read only 'neighbourhood group' & 'price', the price of every valid row
+     is fed to a t-digest sketch, thus the 3rd quartile & median are known in fixed memory.
+  2. second pass apply every cleaning rule to each chunk and append the clean rows to
+     the output file. Duplicates are removed with a filter of 64 bit hashes of the
+     cleaned rows (8 bytes per unique row instead of keeping the rows).
+The second pass also count how many price is below the approximate quartile & median,
+thus the rank error of the approximation (compared to the exact quantile) is reported.
+'''
+
+class TDigest:
+    '''
+  Merging t-digest, approximate quantile sketch with bounded number of centroid
+
+  Parameters
+  ----------
+  compression (int) :   maximum number of centroid, bigger is more accurate
+    '''
+
+    def __init__(self, compression=200):
+        self.compression = compression
+        self.means, self.weights = np.empty(0), np.empty(0)
+        self.count, self.min, self.max = 0, np.inf, -np.inf
+
+    def update(self, values):
+        '''
+  add a batch of values into the sketch
+        '''
+
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.min, self.max = min(self.min, values.min()), max(self.max, values.max())
+
+        # sort new values together with the existing centroids
+        means = np.concatenate((self.means, values))
+        weights = np.concatenate((self.weights, np.ones(len(values))))
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        # group neighbour points by the t-digest scale function, small group near the tails
+        total = weights.sum()
+        q = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / np.pi * np.arcsin(2 * q - 1) + self.compression / 2
+        group = np.floor(k).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        '''
+  approximate value at quantile q (0 - 1)
+        '''
+
+        if self.count == 0:
+            return np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.r_[0, centers, self.count]
+        values = np.r_[self.min, self.means, self.max]
+        return float(np.interp(q * self.count, positions, values))
+
+class RowHashFilter:
+    '''
+  Set of 64 bit row hashes kept as sorted runs, a new run is merged with the previous
+  runs of similar size, thus adding & checking N hashes cost O(N log N) in total
+    '''
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self.runs)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.runs:
+            position = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[position] == hashes
+        return found
+
+    def add(self, hashes):
+        run = np.unique(hashes)
+        while self.runs and len(self.runs[-1]) <= len(run):
+            run = np.union1d(self.runs.pop(), run)
+        self.runs.append(run)
+
+def read_chunks(input_path, chunksize, columns=None):
+    '''
+  reader of chunks of the AirBnB data, with the declared dtypes of the dataset and the
+  other columns as text
+    '''
+
+    dtype = defaultdict(lambda: 'str', DATASETS['airbnb']['dtype'])
+    return pd.read_csv(input_path, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+def row_hashes(chunk):
+    '''
+  64 bit hash of every row of a cleaned chunk, the numbers are hashed as float64 thus a
+  value has the same hash whatever the dtype it has in its chunk (e.g. int or float price)
+    '''
+
+    columns = {column: values.astype('float64') if pd.api.types.is_numeric_dtype(values.dtype) else values
+               for column, values in chunk.items()}
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+def _valid_rows(chunk):
+    return chunk.dropna(subset=['neighbourhood group', 'price'])
+
+@instrument
+def price_sketch(input_path, chunksize=100_000, compression=200):
+    '''
+  First pass, build the t-digest of the valid listing prices
+
+  Parameters
+  ----------
+  input_path (str)  :   path of Airbnb_Open_Data.csv
+  chunksize (int)   :   number of rows read at once
+  compression (int) :   t-digest compression
+
+  Returns
+  --------
+  digest :  TDigest of price
+    '''
+
+    digest = TDigest(compression)
+    for chunk in read_chunks(input_path, chunksize, columns=['neighbourhood group', 'price']):
+        digest.update(parse_price(_valid_rows(chunk)['price']))
+    return digest
+
+@instrument
+def clean_airbnb_streaming(input_path, output_path, chunksize=100_000, compression=200):
+    '''
+  Clean the AirBnB data in fixed memory and write the clean data into output_path
+
+  Parameters
+  ----------
+  input_path (str)  :   path of Airbnb_Open_Data.csv
+  output_path (str) :   path of the clean .csv file
+  chunksize (int)   :   number of rows read at once
+  compression (int) :   t-digest compression, bigger is more accurate
+
+  Returns
+  --------
+  report :  dict contains number of rows, the approximate limit & median price and
+            their rank error against the exact quantile
+    '''
+
+    digest = price_sketch(input_path, chunksize, compression)
+    upper_limit_price = digest.quantile(0.75) * 1.5
+    q3_price, median_price = digest.quantile(0.75), digest.quantile(0.5)
+
+    report = {'rows_in': 0, 'rows_out': 0, 'missing': 0, 'price_outliers': 0,
+              'availability_outliers': 0, 'duplicates': 0}
+    below = {'q3': [0, 0], 'median': [0, 0]} # count of price < and <= the approximation
+    seen_hashes = RowHashFilter()
+
+    header = True
+    for chunk in read_chunks(input_path, chunksize):
+        with stage('clean_chunk', rows_in=len(chunk)) as record:
+            report['rows_in'] += len(chunk)
+
+            # delete data in 'neighbourhood group' and 'price' column with missing value
+            valid = _valid_rows(chunk)
+            report['missing'] += len(chunk) - len(valid)
+            chunk = valid.copy()
+
+            # Removing the unconsitency value in 'neighborhood group'
+            chunk['neighbourhood group'] = replace_values(chunk['neighbourhood group'], MAP_VALUE_NG)
+
+            # convert value in 'price' column into int & measure the sketch rank error
+            chunk['price'] = parse_price(chunk['price'])
+            for name, value in (('q3', q3_price), ('median', median_price)):
+                below[name][0] += int((chunk['price'] < value).sum())
+                below[name][1] += int((chunk['price'] <= value).sum())
+
+            # replace price outlier with median value
+            outlier = chunk['price'] > upper_limit_price
+            report['price_outliers'] += int(outlier.sum())
+            chunk['price'] = chunk['price'].where(~outlier, median_price)
+
+            # delete data with 'availability 365' outside 0-365 or missing
+            in_range = chunk['availability 365'].between(*AVAILABILITY_RANGE)
+            report['availability_outliers'] += int((~in_range).sum())
+            chunk = chunk[in_range.values]
+
+            # delete duplicates data (compared on the cleaned values), also against rows of
+            # the previous chunks
+            hashes = row_hashes(chunk)
+            _, first = np.unique(hashes, return_index=True)
+            keep = np.zeros(len(chunk), dtype=bool)
+            keep[first] = True
+            keep &= ~seen_hashes.contains(hashes)
+            report['duplicates'] += int((~keep).sum())
+            seen_hashes.add(hashes[keep])
+            chunk = chunk[keep]
+
+            chunk.to_csv(output_path, mode='w' if header else 'a', header=header, index=False)
+            header = False
+            report['rows_out'] += len(chunk)
+            record.rows_out = len(chunk)
+
+    # rank error: distance between the target quantile and the rank of the approximation
+    n_price = digest.count
+    for name, q, value in (('q3', 0.75, q3_price), ('median', 0.5, median_price)):
+        low, high = below[name][0] / max(n_price, 1), below[name][1] / max(n_price, 1)
+        report[f'{name}_price'] = value
+        report[f'{name}_rank_error'] = 0.0 if low <= q <= high else min(abs(q - low), abs(q - high))
+    report['upper_limit_price'] = upper_limit_price
+    return report
+
+if __name__ == '__main__':
+    report = clean_airbnb_streaming('Airbnb_Open_Data.csv', 'Airbnb_Open_Data_clean.csv')
+    print(f"Clean data rows : {report['rows_out']}")
+    print(f"Approximate median price : {report['median_price']} (rank error {report['median_rank_error']:.4%})")
+    print(f"Approximate 3rd quartile price : {report['q3_price']} (rank error {report['q3_rank_error']:.4%})")
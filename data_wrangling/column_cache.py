@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .instrumentation import stage
+from .schemas import DATASETS, read_dataset
+
+'''
+Memory-mapped columnar cache of the input files.
+The first read of a source file parse it (csv or xlsx) and save every column as a .npy
+file in `<source>.cols/`, later reads open the columns memory-mapped instead of parsing:
+- numeric, bool & datetime columns are mapped as is (zero-copy, the dataframe is built
+  without consolidating the columns)
+- categorical columns keep their codes mapped, the categories are in columns.json
+- nullable integer / boolean columns are mapped as values + mask
+- string (object) columns are stored dictionary encoded and rebuilt from their unique values
+Every process reading the same cache share one page-cached copy of the columns.
+The cache is in `<source>.cols/` next to the source, or under the folder given by the
+DATA_WRANGLING_CACHE_DIR environment variable (e.g. when the data folder is read-only),
+a cache that can not be written is skipped and the parsed source is returned as is.
+The cache is rebuilt when the source size or modified time change, unless the sha256 of
+the source is still the same (e.g. the file was only touched or copied).
+Every file of the cache is written into a temporary file, flushed to the disk and renamed,
+the column files first, then columns.json and last source.json (the signature of the source
+and the id of the build). A rebuild removes source.json before it replaces any column, a
+reader opens the columns of the build of the source.json it validated, then checks that
+columns.json & source.json still have this build, thus it never mixes two builds (it parses
+the source instead), and a source changed while it is parsed is not cached.
+'''
+
+CACHE_VERSION = 2 # bump when the cache layout change, thus old cache is rebuilt
+CACHE_DIR_ENV = 'DATA_WRANGLING_CACHE_DIR'
+
+def default_cache_dir(path):
+    '''
+  `<path>.cols`, or a folder named after the source (file name & hash of its absolute path)
+  in the DATA_WRANGLING_CACHE_DIR folder when the variable is set
+    '''
+
+    root = os.environ.get(CACHE_DIR_ENV)
+    if not root:
+        return path + '.cols'
+    digest = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(root, f'{os.path.basename(path)}.{digest}.cols')
+
+def file_hash(path, block_size=1 << 20):
+    '''
+  sha256 of a file content
+    '''
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _source_signature(path, key):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'key': key, 'version': CACHE_VERSION}
+
+def _column_file(cache_dir, position, part):
+    return os.path.join(cache_dir, f'{position}.{part}.npy')
+
+def _write_file(path, write, mode='w'):
+    '''
+  write a file into a temporary file flushed to the disk, then rename it to path, thus
+  the file is either the old or the new one, never half written
+    '''
+
+    temporary = path + '.tmp'
+    with open(temporary, mode) as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def _encode_column(values):
+    '''
+  split a column into its .npy arrays and json metadata
+    '''
+
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {'codes': np.asarray(values.cat.codes)}, {
+            'kind': 'category', 'categories': dtype.categories.tolist(),
+            'categories_dtype': str(dtype.categories.dtype), 'ordered': bool(dtype.ordered)}
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        naive = values.dt.tz_convert('UTC').dt.tz_localize(None)
+        return {'values': naive.to_numpy()}, {'kind': 'datetime_tz', 'tz': str(dtype.tz)}
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+        return {'values': values.to_numpy()}, {'kind': 'numpy'}
+    if isinstance(values.array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+        arrays = {'values': values.to_numpy(dtype=dtype.numpy_dtype, na_value=0), 'mask': values.isna().to_numpy()}
+        return arrays, {'kind': 'masked', 'dtype': str(dtype)}
+
+    # string (or other object) column, dictionary encoded, missing value get code -1
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = [value.item() if isinstance(value, np.generic) else value for value in uniques]
+    if not all(isinstance(value, (str, bool, int, float)) for value in uniques):
+        raise TypeError(f'column {values.name} has objects that can not be cached')
+    return {'codes': codes.astype(np.int32)}, {'kind': 'object', 'dtype': str(dtype), 'uniques': uniques}
+
+def _decode_column(arrays, meta):
+    '''
+  rebuild a column from its memory-mapped arrays and json metadata
+    '''
+
+    kind = meta['kind']
+    if kind == 'numpy':
+        return arrays['values']
+    if kind == 'datetime_tz':
+        return pd.DatetimeIndex(arrays['values']).tz_localize('UTC').tz_convert(meta['tz'])
+    if kind == 'masked':
+        array_type = pd.api.types.pandas_dtype(meta['dtype']).construct_array_type()
+        return array_type(arrays['values'], arrays['mask'])
+    if kind == 'category':
+        categories = pd.Index(meta['categories'], dtype=meta['categories_dtype'])
+        dtype = pd.CategoricalDtype(categories, ordered=meta['ordered'])
+        return pd.Categorical.from_codes(arrays['codes'], dtype=dtype, validate=False)
+
+    values = np.array(meta['uniques'] + [np.nan], dtype=object)[arrays['codes']] # code -1 take the NaN
+    return pd.array(values, dtype=meta['dtype'])
+
+def write_cache(data, cache_dir, signature):
+    '''
+  Save a dataframe as memory-mappable column files
+
+  Parameters
+  ----------
+  data (dataframe)   :   parsed source data, the index is not saved
+  cache_dir (str)    :   folder to store the column files
+  signature (dict)   :   signature of the source file, saved as source.json
+
+  Returns
+  --------
+  build :  id of this build of the cache, saved in columns.json & source.json
+    '''
+
+    os.makedirs(cache_dir, exist_ok=True)
+    source_file = os.path.join(cache_dir, 'source.json')
+    if os.path.exists(source_file): # invalidate first, thus a reader never use half written columns
+        os.remove(source_file)
+
+    columns = []
+    for position, name in enumerate(data.columns):
+        arrays, meta = _encode_column(data.iloc[:, position])
+        meta.update({'name': name, 'parts': list(arrays)})
+        for part, array in arrays.items():
+            _write_file(_column_file(cache_dir, position, part),
+                        lambda file, array=array: np.save(file, np.ascontiguousarray(array)), mode='wb')
+        columns.append(meta)
+
+    # the manifest once every column is on the disk, the source signature last
+    build = uuid.uuid4().hex
+    _write_file(os.path.join(cache_dir, 'columns.json'),
+                lambda file: json.dump({'rows': len(data), 'columns': columns, 'build': build}, file))
+    _write_file(source_file, lambda file: json.dump({**signature, 'build': build}, file))
+    return build
+
+def read_cache(cache_dir, columns=None, build=None):
+    '''
+  Open the cached columns memory-mapped
+
+  Parameters
+  ----------
+  cache_dir (str) :   folder of the column files
+  columns (list)  :   only open these columns (optional), default is every column
+  build (str)     :   id of the build the columns must belong to (optional), a ValueError
+                      is raised when the cache was rebuilt before or while the columns
+                      are opened
+
+  Returns
+  --------
+  data :  dataframe backed by the memory-mapped column files
+    '''
+
+    layout = _read_json(os.path.join(cache_dir, 'columns.json'))
+    if build is not None and layout.get('build') != build:
+        raise ValueError(f'the cache {cache_dir} was rebuilt since its source was checked')
+
+    positions = {meta['name']: position for position, meta in enumerate(layout['columns'])}
+    missing = [column for column in (columns or []) if column not in positions]
+    if missing:
+        raise KeyError(f'columns not found in the cache: {missing}')
+
+    data = {}
+    for name in (columns if columns is not None else list(positions)):
+        position = positions[name]
+        meta = layout['columns'][position]
+        arrays = {part: np.load(_column_file(cache_dir, position, part), mmap_mode='r').view(np.ndarray) # still mapped
+                  for part in meta['parts']}
+        data[name] = _decode_column(arrays, meta)
+
+    # a rebuild started meanwhile removed source.json (or replaced it) before any column
+    if build is not None and (_read_json(os.path.join(cache_dir, 'columns.json')).get('build') != build
+                              or _stored_build(cache_dir) != build):
+        raise ValueError(f'the cache {cache_dir} was rebuilt while its columns were opened')
+    return pd.DataFrame(data, index=pd.RangeIndex(layout['rows']), copy=False)
+
+def _read_json(path):
+    with open(path) as file:
+        return json.load(file)
+
+def _stored_build(cache_dir):
+    try:
+        return _read_json(os.path.join(cache_dir, 'source.json')).get('build')
+    except (OSError, ValueError):
+        return None
+
+def _valid_build(path, cache_dir, signature, hash_check):
+    '''
+  build id of the cache when it is valid for the source signature, else None
+    '''
+
+    try:
+        stored = _read_json(os.path.join(cache_dir, 'source.json'))
+    except (OSError, ValueError):
+        return None
+
+    stored_hash, build = stored.pop('sha256', None), stored.pop('build', None)
+    if stored == signature:
+        return build
+
+    # modified time changed but same size & content, refresh the signature only
+    same_key = stored.get('key') == signature['key'] and stored.get('version') == signature['version']
+    if hash_check and same_key and stored.get('size') == signature['size'] \
+            and stored_hash is not None and stored_hash == file_hash(path):
+        try:
+            _write_file(os.path.join(cache_dir, 'source.json'),
+                        lambda file: json.dump({**signature, 'sha256': stored_hash, 'build': build}, file))
+        except OSError: # read-only cache, still valid, the hash is compared again next time
+            pass
+        return build
+    return None
+
+def load_cached(path, read, key='', columns=None, cache_dir=None, hash_check=True):
+    '''
+  Read a source file through its columnar cache, parse it with `read` only when the
+  cache does not exist yet or the source was changed
+
+  Parameters
+  ----------
+  path (str)           :   path of the source file (.csv or .xlsx)
+  read (function)      :   parse the whole source into a dataframe, e.g. lambda: pd.read_csv(path)
+  key (str)            :   description of how the source is parsed (e.g. dataset & schema),
+                           a different key rebuild the cache
+  columns (list)       :   only open these columns (optional)
+  cache_dir (str)      :   folder of the cache, default is `<path>.cols` (see default_cache_dir)
+  hash_check (bool)    :   compare the source sha256 when its modified time changed
+
+  Returns
+  --------
+  data :  dataframe backed by the memory-mapped column files, or the parsed dataframe
+          when the cache can not be written or was rebuilt by another process meanwhile
+    '''
+
+    cache_dir = cache_dir or default_cache_dir(path)
+    signature = _source_signature(path, key)
+    select = lambda data: data if columns is None else data[list(columns)]
+
+    data, build = None, _valid_build(path, cache_dir, signature, hash_check)
+    if build is None:
+        with stage('build_cache') as record:
+            data = read()
+            record.rows_out = len(data)
+            if _source_signature(path, key) != signature: # changed while it was parsed, not cached
+                return select(data)
+            try:
+                build = write_cache(data, cache_dir, {**signature, 'sha256': file_hash(path)})
+            except OSError: # e.g. read-only folder, the parsed data is used without cache
+                return select(data)
+    with stage('open_cache') as record:
+        try:
+            cached = read_cache(cache_dir, columns, build=build)
+        except (OSError, ValueError): # rebuilt by another process meanwhile, parse the source instead
+            cached = select(data if data is not None else read())
+        record.rows_out = len(cached)
+    return cached
+
+def load_dataset(name, path, columns=None, index_col=None, cache_dir=None):
+    '''
+  Read a csv input with the declared schema of the dataset through its columnar cache
+
+  Parameters
+  ----------
+  name (str)       :   dataset name in DATASETS, e.g. 'travelio'
+  path (str)       :   path of the .csv file
+  columns (list)   :   only open these columns (optional), default is every column
+  index_col (str)  :   column used as the index (optional)
+  cache_dir (str)  :   folder of the cache, default is `<path>.cols` (see default_cache_dir)
+
+  Returns
+  --------
+  data :  dataframe with compact dtypes, numeric & categorical columns are memory-mapped
+    '''
+
+    if name not in DATASETS:
+        raise KeyError(f'unknown dataset {name}, available: {", ".join(DATASETS)}')
+    key = json.dumps({'dataset': name, 'schema': DATASETS[name]}, sort_keys=True) # schema change rebuild the cache
+
+    if columns is not None and index_col is not None and index_col not in columns:
+        columns = list(columns) + [index_col]
+    with stage(f'load_dataset[{name}]') as record:
+        data = load_cached(path, lambda: read_dataset(name, path), key=key, columns=columns, cache_dir=cache_dir)
+        data = data.set_index(index_col) if index_col is not None else data
+        record.rows_out = len(data)
+    return data
@@ -0,0 +1,15 @@
+'''
+Get the House Recommendation task, nearest Travelio listings matching the user preferences
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'get_user_recommendation': '.recommendation',
+    'haversine': '.recommendation',
+    'load_listing_index': '.recommendation',
+    'RecommendationService': '.recommendation_service',
+    'BallTree': '.spatial_index',
+    'haversine_np': '.spatial_index',
+    'ListingAttributeIndex': '.attribute_index',
+})
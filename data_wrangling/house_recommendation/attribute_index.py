@@ -0,0 +1,101 @@
+import numpy as np
+
+'''
+Attribute index for the house recommendation preferences.
+- categorical preference (`property_type`, `is_furnished`) is stored as a bitmap per value.
+- numeric preference (`size`, `capacity` as a minimum, `yearly_price` as a maximum)
+  is stored as sorted values with their row position.
+All preferences are resolved together: the most selective one give the first
+candidate rows, then the other preferences only check those candidates.
+'''
+
+class ListingAttributeIndex:
+    '''
+  Prebuilt index over the listing preference columns
+
+  Parameters
+  ----------
+  data (dataframe)    :   housing data
+  categorical (tuple) :   columns that must be equal to the preference
+  at_least (tuple)    :   columns that must be bigger or equal to the preference
+  at_most (tuple)     :   columns that must be smaller or equal to the preference
+    '''
+
+    def __init__(self, data, categorical=('property_type', 'is_furnished'),
+                 at_least=('size', 'capacity'), at_most=('yearly_price',)):
+        self.size = len(data)
+        self._bitmaps, self._counts = {}, {}
+        self._sorted, self._values, self._bound = {}, {}, {}
+
+        for column in categorical:
+            codes, uniques = data[column].factorize() # missing value get code -1, thus never match
+            self._bitmaps[column], self._counts[column] = {}, {}
+            for code, value in enumerate(uniques):
+                match = codes == code
+                self._bitmaps[column][value] = np.packbits(match)
+                self._counts[column][value] = int(match.sum())
+
+        for columns, bound in ((at_least, 'min'), (at_most, 'max')):
+            for column in columns:
+                values = data[column].to_numpy(dtype=float)
+                rows = np.flatnonzero(~np.isnan(values)) # missing value never match the preference
+                order = rows[np.argsort(values[rows], kind='stable')]
+                self._sorted[column] = (values[order], order)
+                self._values[column] = values
+                self._bound[column] = bound
+
+    def _resolve(self, column, value):
+        '''
+  estimate number of row matching a single preference and how to get / check them
+        '''
+
+        if column in self._bitmaps:
+            bitmap = self._bitmaps[column].get(value)
+            if bitmap is None:
+                return 0, lambda: np.empty(0, dtype=np.int64), None
+            rows = lambda: np.flatnonzero(np.unpackbits(bitmap, count=self.size))
+            check = lambda candidates: ((bitmap[candidates >> 3] >> (7 - (candidates & 7))) & 1).astype(bool)
+            return self._counts[column][value], rows, check
+
+        sorted_values, order = self._sorted[column]
+        values = self._values[column]
+        if self._bound[column] == 'min':
+            position = np.searchsorted(sorted_values, value, side='left')
+            rows = lambda: np.sort(order[position:])
+            check = lambda candidates: values[candidates] >= value
+            return len(order) - position, rows, check
+        position = np.searchsorted(sorted_values, value, side='right')
+        rows = lambda: np.sort(order[:position])
+        check = lambda candidates: values[candidates] <= value
+        return position, rows, check
+
+    def candidates(self, preferences):
+        '''
+  find the row position of listing that match all user preferences
+
+  Parameters
+  ----------
+  preferences (dict) :   user preferences, preference with None value is ignored
+
+  Returns
+  --------
+  rows :  sorted array of matching row position, or None if there is no preference
+        '''
+
+        predicates = [self._resolve(key, value) for key, value in preferences.items()
+                      if value is not None and (key in self._bitmaps or key in self._sorted)]
+        if len(predicates) == 0:
+            return None
+
+        # start from the most selective preference, then check the rest only on its rows
+        predicates.sort(key=lambda predicate: predicate[0])
+        count, rows, _ = predicates[0]
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = rows()
+        for _, _, check in predicates[1:]:
+            candidates = candidates[check(candidates)]
+            if len(candidates) == 0:
+                break
+        return candidates
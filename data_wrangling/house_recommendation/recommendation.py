@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+
+from ..column_cache import load_dataset
+from ..instrumentation import instrument, stage
+from .attribute_index import ListingAttributeIndex
+from .spatial_index import BallTree, haversine_np
+
+'''
+Housing recommendation (Travelio listings) by user location & preferences.
+The listings, their BallTree & attribute index are built once and kept until the file is modified.
+For a web backend, RecommendationService (recommendation_service.py) keeps the listings
+warm, batches concurrent requests and caches the latest results (LRU).
+'''
+
+def haversine(lat1, lon1, lat2, lon2):
+    '''
+  Function to get distance from two location using
+  longitude & latitude value from each location
+
+  Parameters
+  ----------
+  lat1 (float)  :   first location latitude value
+  lon1 (float)  :   first location longitude value
+  lat2 (float)  :   second location latitude value
+  lon2 (float)  :   ssecond location longitude value
+
+  Returns
+  --------
+  distance :  distance between two location in kilometer
+    '''
+
+    from math import radians, cos, sin, atan2, sqrt
+
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2]) # convert value to radian
+
+    # haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    r = 6371 # Radius of earth in kilometers. Use 3956 for miles. Determines return value units.
+    return c * r # return distance in kilometers
+
+_listing_cache = {} # loaded listing data & its indexes for each data path
+BRUTE_FORCE_LIMIT = 512 # rank the candidates directly when there are only a few of them
+
+def load_listing_index(data_config):
+    '''
+  Load the housing data and build its spatial & attribute index. The result is cached
+  and reused until the housing data file is modified.
+
+  Parameters
+  ----------
+  data_config (dict): the data configuration that contains the housing data path.
+
+  Returns
+  --------
+  data, tree, attributes :  housing dataframe, BallTree over its latitude & longitude
+                            and ListingAttributeIndex over its preference columns
+    '''
+
+    path = data_config['path']
+    modified_time = os.path.getmtime(path)
+
+    cached = _listing_cache.get(path)
+    if cached is None or cached[0] != modified_time:
+        data = load_dataset('travelio', path) # import data, memory-mapped from its columnar cache
+        with stage('build_indexes', rows_in=len(data)):
+            tree = BallTree(data['latitude'].values, data['longitude'].values)
+            attributes = ListingAttributeIndex(data)
+        _listing_cache[path] = (modified_time, data, tree, attributes)
+
+    return _listing_cache[path][1:]
+
+@instrument
+def get_user_recommendation(n, user_config, data_config):
+    '''
+  housing recommendation for a specific user location & preferences sorted
+  by the nearest distance between user location and house location.
+
+  Parameters
+  ----------
+  n (int)           : the maximum number of recommendation.
+  user_config (dict): the user configuration data. It contains the user
+                      preferences and user current location.
+  data_config (dict): the data configuration that contains the housing data path.
+
+  Returns
+  --------
+  data_reccomendation :  dataframe with housing reccomendation by user preference
+     '''
+
+    data, tree, attributes = load_listing_index(data_config) # import data & indexes
+
+    # define longitude and latitude for haversine formula
+    lat_user, lon_user = user_config['location']['latitude'], user_config['location']['longitude']
+
+    # find the row of house which match all user preference
+    with stage('candidates', rows_in=len(data)) as record:
+        candidates = attributes.candidates(user_config['preferences'])
+        n_candidates = record.rows_out = len(data) if candidates is None else len(candidates)
+
+    with stage('nearest', rows_in=n_candidates) as record:
+        if candidates is None: # no preference, search the n nearest house from all data
+            rows, _ = tree.query(lat_user, lon_user, k=n)
+        elif len(candidates) <= BRUTE_FORCE_LIMIT: # few candidates, calculate their distance directly
+            dist = haversine_np(lat_user, lon_user, data['latitude'].values[candidates], data['longitude'].values[candidates])
+            rows = candidates[np.lexsort((candidates, dist))[:n]]
+        else: # search only the n nearest house among the candidates
+            match = np.zeros(len(data), dtype=bool)
+            match[candidates] = True
+            rows, _ = tree.query(lat_user, lon_user, k=n, mask=match)
+        record.rows_out = len(rows)
+
+    data_reccomendation = data.iloc[rows] # give reccomendation data based on user preference
+
+    return data_reccomendation # return data
@@ -0,0 +1,341 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from ..column_cache import load_dataset
+from ..instrumentation import stage
+from .attribute_index import ListingAttributeIndex
+from .spatial_index import BallTree, haversine_np
+
+'''
+Long-lived house recommendation service (asyncio).
+- the listings and their indexes are loaded once and kept warm for the life of the service.
+- concurrent requests are queued and coalesced into batches. Requests of a batch with the
+  same preferences share their candidate rows, and their distances come from a single
+  (requests x candidates) haversine matrix instead of one computation per request.
+- an LRU cache keyed on the rounded user location, n and the preferences keep the latest
+  result dataframes, the least recently used entry is evicted when the cache is full.
+  A cached dataframe is shared by the callers (copy-on-write keep it unchanged).
+`benchmark` is a load generator reporting p50 / p99 latency and throughput.
+'''
+
+BATCH_CELLS_LIMIT = 4_000_000 # max requests x candidates of one distance matrix, a bigger group use the BallTree
+
+def preference_key(preferences):
+    '''
+  hashable key of the user preferences, preference with None value is ignored
+    '''
+
+    return tuple(sorted((key, value) for key, value in preferences.items() if value is not None))
+
+def nearest_rows(distance, candidates, n):
+    '''
+  row position of the n nearest candidates, equal distance keep the data order
+
+  Parameters
+  ----------
+  distance (array)   :   distance of every candidate
+  candidates (array) :   row position of the candidates
+  n (int)            :   number of recommendation
+    '''
+
+    if n <= 0:
+        return candidates[:0]
+    if len(candidates) > n: # keep only the candidates up to the n-th distance (ties included)
+        near = distance <= np.partition(distance, n - 1)[n - 1]
+        distance, candidates = distance[near], candidates[near]
+    return candidates[np.lexsort((candidates, distance))[:n]]
+
+def _fail_pending(futures, error):
+    '''
+  answer the futures still waiting with the error
+    '''
+
+    for future in futures:
+        if not future.done():
+            future.set_exception(error)
+
+class RecommendationService:
+    '''
+  Warm house recommendation service with request batching and LRU result cache
+
+  Parameters
+  ----------
+  data_config (dict) :   the data configuration that contains the housing data path
+  cache_size (int)   :   maximum number of cached results, 0 disable the cache
+  precision (int)    :   number of decimal of the user latitude & longitude, the request is
+                         answered for the rounded location (4 decimal is about 11 meters)
+  max_batch (int)    :   maximum number of request computed together
+  max_wait (float)   :   seconds to wait for more requests before computing a batch,
+                         0 only batch the requests that are already waiting
+    '''
+
+    def __init__(self, data_config, cache_size=4096, precision=4, max_batch=256, max_wait=0.0):
+        self.data_config = data_config
+        self.cache_size = cache_size
+        self.precision = precision
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self.data = None
+        self._cache = OrderedDict() # cache key -> recommendation dataframe
+        self._queue, self._worker = None, None
+        self.stats = dict.fromkeys(('requests', 'hits', 'misses', 'evictions', 'batches', 'computed'), 0)
+
+    def load(self):
+        '''
+  (re)load the listings & build their indexes, cached results are dropped
+        '''
+
+        self.data = load_dataset('travelio', self.data_config['path'])
+        with stage('build_indexes', rows_in=len(self.data)):
+            self._latitude = self.data['latitude'].to_numpy(dtype=float)
+            self._longitude = self.data['longitude'].to_numpy(dtype=float)
+            self.tree = BallTree(self._latitude, self._longitude)
+            self.attributes = ListingAttributeIndex(self.data)
+        self._cache.clear()
+
+    async def start(self):
+        if self.data is None:
+            self.load()
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        '''
+  stop the worker, the requests still queued or being computed raise RuntimeError
+        '''
+
+        if self._worker is not None:
+            worker, self._worker = self._worker, None # recommend() does not queue any more request
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+            pending = []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait()[1])
+            _fail_pending(pending, RuntimeError('the service is stopped'))
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def cache_key(self, n, user_config):
+        location = user_config['location']
+        return (round(float(location['latitude']), self.precision), round(float(location['longitude']), self.precision),
+                int(n), preference_key(user_config['preferences']))
+
+    async def recommend(self, n, user_config):
+        '''
+  housing recommendation for a user location & preferences, sorted by the nearest
+  distance (same arguments as get_user_recommendation). The request is answered for the
+  location rounded to `precision` decimal, thus the result is the one of
+  get_user_recommendation at the rounded latitude & longitude
+
+  Parameters
+  ----------
+  n (int)           : the maximum number of recommendation.
+  user_config (dict): the user configuration data. It contains the user
+                      preferences and user current location.
+
+  Returns
+  --------
+  data_reccomendation :  dataframe with housing reccomendation by user preference
+        '''
+
+        if self._worker is None:
+            raise RuntimeError('the service is not running, use `await service.start()` or `async with`')
+
+        key = self.cache_key(n, user_config)
+        self.stats['requests'] += 1
+        result = self._cache_get(key)
+        if result is None:
+            future = asyncio.get_running_loop().create_future()
+            self._queue.put_nowait((key, future))
+            result = await future
+        return result
+
+    def _cache_get(self, key):
+        result = self._cache.get(key)
+        if result is None:
+            self.stats['misses'] += 1
+            return None
+        self._cache.move_to_end(key) # most recently used
+        self.stats['hits'] += 1
+        return result
+
+    def _cache_put(self, key, result):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False) # evict the least recently used
+            self.stats['evictions'] += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await asyncio.sleep(self.max_wait) # let the other waiting requests join the batch
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                keys = list(dict.fromkeys(key for key, _ in batch)) # same request in a batch is computed once
+                frames = await loop.run_in_executor(None, self._compute_frames, keys)
+            except asyncio.CancelledError: # stopped, the requests of the batch are not answered
+                _fail_pending([future for _, future in batch], RuntimeError('the service is stopped'))
+                raise
+            except Exception as error: # answer every request of the batch with the error
+                _fail_pending([future for _, future in batch], error)
+                continue
+
+            self.stats['batches'] += 1
+            self.stats['computed'] += len(keys)
+            for key, frame in frames.items():
+                self._cache_put(key, frame)
+            for key, future in batch:
+                if not future.done(): # the caller may be cancelled
+                    future.set_result(frames[key])
+
+    def _compute_frames(self, keys):
+        return {key: self.data.iloc[rows] for key, rows in self.compute(keys).items()} # one take per distinct request
+
+    def compute(self, keys):
+        '''
+  Compute the recommendation of a batch of cache keys
+
+  Parameters
+  ----------
+  keys (list) :   cache keys (latitude, longitude, n, preference key)
+
+  Returns
+  --------
+  results :  dict of cache key and row position of its recommendation
+        '''
+
+        groups = {} # requests with the same preferences share their candidates
+        for key in keys:
+            groups.setdefault(key[3], []).append(key)
+
+        results = {}
+        with stage('compute_batch', rows_in=len(keys)) as record:
+            for preferences, group in groups.items():
+                candidates = self.attributes.candidates(dict(preferences))
+                if candidates is None: # no preference, every listing is a candidate
+                    candidates = np.arange(len(self.data))
+
+                if len(candidates) * len(group) <= BATCH_CELLS_LIMIT:
+                    # one distance matrix for the whole group, a row per request
+                    with stage('haversine_matrix', rows_in=len(candidates) * len(group)):
+                        latitude = np.array([key[0] for key in group])[:, None]
+                        longitude = np.array([key[1] for key in group])[:, None]
+                        distance = haversine_np(latitude, longitude, self._latitude[candidates], self._longitude[candidates])
+                        for key, key_distance in zip(group, distance):
+                            results[key] = nearest_rows(key_distance, candidates, key[2])
+                else:
+                    with stage('tree_query', rows_in=len(candidates) * len(group)):
+                        match = np.zeros(len(self.data), dtype=bool)
+                        match[candidates] = True
+                        for key in group:
+                            results[key], _ = self.tree.query(key[0], key[1], k=key[2], mask=match)
+            record.rows_out = len(results)
+        return results
+
+def make_requests(data, count, n=10, hot_ratio=0.5, hot_requests=100, seed=42):
+    '''
+  Random recommendation requests over the listing area
+
+  Parameters
+  ----------
+  data (dataframe)   :   housing data, the user locations are drawn inside its bounding box
+  count (int)        :   number of request
+  n (int)            :   number of recommendation of each request
+  hot_ratio (float)  :   share of the requests repeating one of the hot requests (cache hit)
+  hot_requests (int) :   number of distinct hot requests
+  seed (int)         :   random seed
+
+  Returns
+  --------
+  requests :  list of (n, user_config)
+    '''
+
+    rng = np.random.default_rng(seed)
+    choices = {
+        'property_type': [None, 'apartment', 'house'],
+        'is_furnished': [None, 'Full Furnished', 'Unfurnished'],
+        'size': [None, 30.0, 50.0],
+        'capacity': [None, 2, 4],
+        'yearly_price': [None, 50_000_000, 100_000_000],
+    }
+    latitude, longitude = data['latitude'].to_numpy(dtype=float), data['longitude'].to_numpy(dtype=float)
+
+    def random_request():
+        preferences = {key: values[rng.integers(len(values))] for key, values in choices.items()}
+        location = {'latitude': float(rng.uniform(latitude.min(), latitude.max())),
+                    'longitude': float(rng.uniform(longitude.min(), longitude.max()))}
+        return n, {'preferences': preferences, 'location': location}
+
+    hot = [random_request() for _ in range(hot_requests)]
+    return [hot[rng.integers(len(hot))] if rng.random() < hot_ratio else random_request() for _ in range(count)]
+
+async def benchmark(service, requests, concurrency=64):
+    '''
+  Load generator, send the requests from concurrent clients and measure each latency
+
+  Parameters
+  ----------
+  service (RecommendationService) :   started service
+  requests (list)                 :   list of (n, user_config), see make_requests
+  concurrency (int)               :   number of concurrent clients
+
+  Returns
+  --------
+  report :  dict of throughput (request / second), p50 & p99 latency (millisecond),
+            cache hit ratio and mean batch size
+    '''
+
+    stats = dict(service.stats)
+    latencies = []
+
+    async def client(client_requests):
+        for n, user_config in client_requests:
+            start = time.perf_counter()
+            await service.recommend(n, user_config)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(requests[i::concurrency]) for i in range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    delta = {key: service.stats[key] - stats[key] for key in stats}
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(requests),
+        'concurrency': concurrency,
+        'seconds': round(seconds, 3),
+        'throughput': round(len(requests) / seconds, 1),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'hit_ratio': round(delta['hits'] / max(delta['requests'], 1), 3),
+        'mean_batch': round(delta['computed'] / max(delta['batches'], 1), 1),
+        'evictions': delta['evictions'],
+    }
+
+if __name__ == '__main__':
+    async def main():
+        async with RecommendationService({'path': 'travelio_dki_jakarta.csv'}) as service:
+            requests = make_requests(service.data, count=5000)
+            for concurrency in (1, 16, 64, 256):
+                service._cache.clear() # every run start cold
+                print(await benchmark(service, requests, concurrency=concurrency))
+
+    asyncio.run(main())
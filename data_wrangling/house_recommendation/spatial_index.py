@@ -0,0 +1,166 @@
+import heapq
+
+import numpy as np
+
+'''
+Spatial index for the house recommendation.
+- `haversine_np` is the vectorized version of `haversine`, it compute the distance
+  from one location to many locations at once.
+- `BallTree` is built once over the listing latitude & longitude, then it can return
+  the n nearest listings without calculating and sorting the distance of every listing.
+'''
+
+EARTH_RADIUS = 6371 # Radius of earth in kilometers, same value used by haversine()
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    '''
+  Vectorized haversine formula, every argument can be a scalar or numpy array
+
+  Parameters
+  ----------
+  lat1 (float / array)  :   first location latitude value
+  lon1 (float / array)  :   first location longitude value
+  lat2 (float / array)  :   second location latitude value
+  lon2 (float / array)  :   second location longitude value
+
+  Returns
+  --------
+  distance :  array of distance between the locations in kilometer
+    '''
+
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2)) # convert value to radian
+
+    # haversine formula
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return c * EARTH_RADIUS # return distance in kilometers
+
+def _unit_vectors(latitude, longitude):
+    '''
+  convert latitude & longitude (in degree) into 3D point on the unit sphere.
+  The straight line (chord) distance between two points is monotone with the
+  great circle distance, so the nearest chord is also the nearest haversine.
+    '''
+
+    lat, lon = np.radians(latitude), np.radians(longitude)
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+class BallTree:
+    '''
+  Ball tree over a set of locations
+
+  Parameters
+  ----------
+  latitude (array)  :   latitude value of each location
+  longitude (array) :   longitude value of each location
+  leaf_size (int)   :   maximum number of location in a leaf node
+    '''
+
+    def __init__(self, latitude, longitude, leaf_size=40):
+        points = _unit_vectors(np.asarray(latitude, dtype=float), np.asarray(longitude, dtype=float))
+        order = np.arange(len(points))
+
+        # split the node on the widest axis until every leaf contain at most leaf_size points
+        start, end, left, right = [0], [len(points)], [-1], [-1]
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            s, e = start[node], end[node]
+            if e - s <= leaf_size:
+                continue
+            node_points = points[order[s:e]]
+            axis = np.argmax(node_points.max(axis=0) - node_points.min(axis=0))
+            mid = (e - s) // 2
+            order[s:e] = order[s:e][np.argpartition(node_points[:, axis], mid)]
+
+            left[node], right[node] = len(start), len(start) + 1
+            for child_start, child_end in ((s, s + mid), (s + mid, e)):
+                start.append(child_start)
+                end.append(child_end)
+                left.append(-1)
+                right.append(-1)
+            stack.extend((left[node], right[node]))
+
+        # store points in tree order, thus each node is a contiguous slice
+        self._order = order
+        self._points = points[order]
+        self._start, self._end = np.array(start), np.array(end)
+        self._left, self._right = np.array(left), np.array(right)
+        self._center = np.empty((len(start), 3))
+        self._radius = np.empty(len(start))
+        for node in range(len(start)):
+            node_points = self._points[start[node]:end[node]]
+            if len(node_points) == 0:
+                self._center[node], self._radius[node] = 0, 0
+                continue
+            self._center[node] = node_points.mean(axis=0)
+            self._radius[node] = np.sqrt(((node_points - self._center[node])**2).sum(axis=1)).max()
+
+    def __len__(self):
+        return len(self._order)
+
+    def query(self, latitude, longitude, k, mask=None):
+        '''
+  find the k nearest locations from a given location
+
+  Parameters
+  ----------
+  latitude (float)  :   query location latitude value
+  longitude (float) :   query location longitude value
+  k (int)           :   number of nearest location
+  mask (array)      :   optional boolean array (in original row order), only
+                        location with True value can be returned
+
+  Returns
+  --------
+  rows, distance :  row position of the nearest locations (sorted by distance)
+                    and their distance in kilometer
+        '''
+
+        query_point = _unit_vectors(np.array([latitude], dtype=float), np.array([longitude], dtype=float))[0]
+
+        # count of allowed points before every position, used to skip a node without candidate
+        allowed = None
+        if mask is not None:
+            allowed = np.asarray(mask, dtype=bool)[self._order]
+            allowed_count = np.concatenate(([0], np.cumsum(allowed)))
+
+        best_dist, best_pos = np.empty(0), np.empty(0, dtype=np.int64)
+        if k <= 0 or len(self) == 0:
+            return best_pos, best_dist
+
+        def lower_bound(node):
+            gap = np.sqrt(((query_point - self._center[node])**2).sum()) - self._radius[node]
+            return max(gap, 0.0)
+
+        heap = [(lower_bound(0), 0)]
+        while heap:
+            bound, node = heapq.heappop(heap)
+            if len(best_dist) == k and bound > best_dist.max():
+                break # no remaining node can contain a nearer location (or a tie)
+            s, e = self._start[node], self._end[node]
+            if allowed is not None and allowed_count[e] == allowed_count[s]:
+                continue
+
+            if self._left[node] == -1: # leaf node, calculate chord distance for all of its points
+                pos = np.arange(s, e)
+                if allowed is not None:
+                    pos = pos[allowed[s:e]]
+                dist = np.sqrt(((self._points[pos] - query_point)**2).sum(axis=1))
+                best_dist = np.concatenate((best_dist, dist))
+                best_pos = np.concatenate((best_pos, pos))
+                if len(best_dist) > k: # equal distance keep the first rows of the data
+                    keep = np.lexsort((self._order[best_pos], best_dist))[:k]
+                    best_dist, best_pos = best_dist[keep], best_pos[keep]
+            else:
+                for child in (self._left[node], self._right[node]):
+                    heapq.heappush(heap, (lower_bound(child), child))
+
+        rows = self._order[best_pos]
+        ranking = np.lexsort((rows, best_dist)) # equal distance (same building) keep the data order
+        rows, best_dist = rows[ranking], best_dist[ranking]
+        distance = 2 * np.arcsin(np.clip(best_dist / 2, 0, 1)) * EARTH_RADIUS # chord to great circle distance
+        return rows, distance
@@ -0,0 +1,352 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+'''
+Per-stage instrumentation of the pipelines.
+A named stage is wrapped with the `stage` context manager (or the `instrument` decorator),
+when instrumentation is enabled every stage records its wall time, cpu time, peak memory
+(tracemalloc, above the memory already used when the stage started) and rows in / out:
+
+    with stage('read_csv') as record:
+        data = pd.read_csv(path)
+        record.rows_out = len(data)
+
+Stages can be nested, a record keeps its path (e.g. 'export;read_csv'), and every thread
+has its own stack. The records are kept in a registry and emitted as JSON (`to_json`),
+a flame-style tree (`summary`) or folded stacks for flamegraph tools (`folded`).
+When disabled (the default) `stage` return a shared no-op record, the cost is one
+function call. Set the environment variable DATA_WRANGLING_PROFILE to enable it for
+a whole run: '1' print the summary at exit, a .json path write the records into it.
+'''
+
+class StageRecord:
+    '''
+  Measure of one stage run, `rows_in` & `rows_out` can be set inside the stage
+    '''
+
+    __slots__ = ('name', 'path', 'depth', 'thread', 'start_s', 'wall_s', 'cpu_s', 'peak_mb',
+                 'rows_in', 'rows_out', '_wall', '_cpu', '_memory', '_child_peak')
+
+    def __init__(self, name, path, depth, rows_in=None):
+        self.name, self.path, self.depth = name, path, depth
+        self.thread = threading.current_thread().name
+        self.rows_in, self.rows_out = rows_in, None
+        self.start_s = self.wall_s = self.cpu_s = self.peak_mb = None
+
+    def as_dict(self):
+        return {'stage': self.path, 'name': self.name, 'depth': self.depth, 'thread': self.thread,
+                'start_s': self.start_s, 'wall_s': self.wall_s, 'cpu_s': self.cpu_s, 'peak_mb': self.peak_mb,
+                'rows_in': self.rows_in, 'rows_out': self.rows_out}
+
+class _NullRecord:
+    '''
+  record returned while instrumentation is disabled, every measure is ignored
+    '''
+
+    __slots__ = ()
+    rows_in = rows_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NULL_RECORD = _NullRecord()
+
+class Registry:
+    '''
+  Collect the stage records of a run
+
+  Parameters
+  ----------
+  memory (bool) :   measure the peak memory of each stage with tracemalloc (slow down
+                    python allocations, numpy arrays are cheap to trace). tracemalloc has
+                    one peak for the process, thus stages running at the same time in
+                    other threads share their peak
+    '''
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.records = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._started_tracemalloc = False
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def enter(self, name, rows_in=None):
+        stack = self._stack()
+        path = f'{stack[-1].path};{name}' if stack else name
+        record = StageRecord(name, path, len(stack), rows_in)
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack: # keep the peak of the parent stage so far before resetting it
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+            tracemalloc.reset_peak()
+            record._memory, record._child_peak = current, current
+        stack.append(record)
+        record.start_s = time.perf_counter() - self._origin
+        record._cpu, record._wall = time.process_time(), time.perf_counter()
+        return record
+
+    def exit(self, record):
+        wall, cpu = time.perf_counter(), time.process_time()
+        record.wall_s, record.cpu_s = wall - record._wall, cpu - record._cpu
+        stack = self._stack()
+        stack.pop()
+        if self.memory and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], record._child_peak)
+            record.peak_mb = (peak - record._memory) / 2**20
+            if stack:
+                stack[-1]._child_peak = max(stack[-1]._child_peak, peak)
+            tracemalloc.reset_peak()
+        with self._lock:
+            self.records.append(record)
+
+    def aggregate(self):
+        '''
+  Records grouped by stage path, in the order the stages were first entered
+
+  Returns
+  --------
+  stages :  list of dict with stage path, name, depth, calls, total wall & cpu time,
+            self wall time (without the nested stages), max peak memory and total rows
+        '''
+
+        stages = {}
+        for record in sorted(self.records, key=lambda record: record.start_s):
+            stage = stages.setdefault(record.path, {
+                'stage': record.path, 'name': record.name, 'depth': record.depth, 'calls': 0,
+                'wall_s': 0.0, 'self_s': 0.0, 'cpu_s': 0.0, 'peak_mb': None, 'rows_in': None, 'rows_out': None})
+            stage['calls'] += 1
+            stage['wall_s'] += record.wall_s
+            stage['self_s'] += record.wall_s
+            stage['cpu_s'] += record.cpu_s
+            if record.peak_mb is not None:
+                stage['peak_mb'] = max(stage['peak_mb'] or 0.0, record.peak_mb)
+            for key in ('rows_in', 'rows_out'):
+                if getattr(record, key) is not None:
+                    stage[key] = (stage[key] or 0) + int(getattr(record, key))
+
+        for path, stage in stages.items(): # time spent in a nested stage is not the parent self time
+            parent = path.rpartition(';')[0]
+            if parent in stages:
+                stages[parent]['self_s'] -= stage['wall_s']
+        return list(stages.values())
+
+_registry = None # active registry, None while instrumentation is disabled
+
+def enable(memory=True):
+    '''
+  Start recording the stages into a new registry
+
+  Parameters
+  ----------
+  memory (bool) :   also measure the peak memory of each stage
+
+  Returns
+  --------
+  registry :  Registry receiving the records
+    '''
+
+    global _registry
+    disable()
+    _registry = Registry(memory=memory)
+    _registry.start()
+    return _registry
+
+def disable():
+    '''
+  Stop recording, return the registry of the finished run (None if it was not enabled)
+    '''
+
+    global _registry
+    registry, _registry = _registry, None
+    if registry is not None:
+        registry.stop()
+    return registry
+
+def is_enabled():
+    return _registry is not None
+
+def get_registry():
+    return _registry
+
+class _Stage:
+    __slots__ = ('registry', 'name', 'rows_in', 'record')
+
+    def __init__(self, registry, name, rows_in):
+        self.registry, self.name, self.rows_in = registry, name, rows_in
+
+    def __enter__(self):
+        self.record = self.registry.enter(self.name, self.rows_in)
+        return self.record
+
+    def __exit__(self, *exc_info):
+        self.registry.exit(self.record)
+        return False
+
+def stage(name, rows_in=None):
+    '''
+  Context manager measuring a named stage, it yields the StageRecord (or a no-op record
+  when instrumentation is disabled) where `rows_out` (and `rows_in`) can be set
+
+  Parameters
+  ----------
+  name (str)     :   stage name, e.g. 'read_csv'
+  rows_in (int)  :   number of input rows (optional)
+    '''
+
+    registry = _registry
+    if registry is None:
+        return _NULL_RECORD
+    return _Stage(registry, name, rows_in)
+
+def _rows(value):
+    shape = getattr(value, 'shape', None) # dataframe, series or array
+    return shape[0] if shape else None
+
+def instrument(name=None):
+    '''
+  Decorator measuring every call of a function as a stage, rows in is the length of the
+  first dataframe, series or array argument and rows out the length of the result (when
+  it is one of them)
+
+  Parameters
+  ----------
+  name (str) :   stage name, default is the function name
+    '''
+
+    def decorator(function):
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            registry = _registry
+            if registry is None:
+                return function(*args, **kwargs)
+            rows_in = next((rows for rows in map(_rows, args) if rows is not None), None)
+            record = registry.enter(stage_name, rows_in)
+            try:
+                result = function(*args, **kwargs)
+                record.rows_out = _rows(result)
+                return result
+            finally:
+                registry.exit(record)
+        return wrapper
+
+    if callable(name): # used without argument, @instrument
+        function, name = name, None
+        return decorator(function)
+    return decorator
+
+def _resolve(registry):
+    registry = registry or _registry
+    if registry is None:
+        raise RuntimeError('instrumentation is not enabled, call enable() first')
+    return registry
+
+def to_json(path=None, registry=None):
+    '''
+  Records and per-stage totals as a JSON document
+
+  Parameters
+  ----------
+  path (str)            :   write the JSON into this file (optional)
+  registry (Registry)   :   default is the active registry
+
+  Returns
+  --------
+  document :  dict of 'stages' (aggregated per stage path) and 'records' (every stage run)
+    '''
+
+    registry = _resolve(registry)
+    document = {'stages': registry.aggregate(), 'records': [record.as_dict() for record in registry.records]}
+    if path is not None:
+        with open(path, 'w') as file:
+            json.dump(document, file, indent=2)
+    return document
+
+def summary(registry=None, width=30):
+    '''
+  Flame-style text tree of the stages, nested stages are indented under their parent
+  and the bar length is the share of the total wall time
+
+  Parameters
+  ----------
+  registry (Registry)   :   default is the active registry
+  width (int)           :   length of the bar of the slowest root stage
+    '''
+
+    stages = _resolve(registry).aggregate()
+    total = sum(stage['wall_s'] for stage in stages if stage['depth'] == 0) or 1.0
+    children = {}
+    for stage in stages:
+        children.setdefault(stage['stage'].rpartition(';')[0], []).append(stage)
+
+    def number(value, digits):
+        return '-' if value is None else f'{value:,.{digits}f}' if isinstance(value, float) else f'{value:,}'
+
+    lines = [f'{"stage":<40} {"calls":>6} {"wall_s":>9} {"cpu_s":>9} {"peak_mb":>9} {"rows_in":>12} {"rows_out":>12}']
+    def walk(parent):
+        for stage in children.get(parent, []):
+            label = '  ' * stage['depth'] + stage['name']
+            bar = '#' * max(round(width * stage['wall_s'] / total), 1)
+            lines.append(f'{label:<40} {stage["calls"]:>6} {number(stage["wall_s"], 4):>9} {number(stage["cpu_s"], 4):>9} '
+                         f'{number(stage["peak_mb"], 1):>9} {number(stage["rows_in"], 0):>12} '
+                         f'{number(stage["rows_out"], 0):>12} {bar}')
+            walk(stage['stage'])
+    walk('')
+    return '\n'.join(lines)
+
+def folded(registry=None):
+    '''
+  Folded stacks ('parent;child self_microseconds' per line), the input format of
+  flamegraph.pl / speedscope
+    '''
+
+    return '\n'.join(f'{stage["stage"].replace(" ", "_")} {max(round(stage["self_s"] * 1e6), 0)}'
+                     for stage in _resolve(registry).aggregate())
+
+def _profile_from_environment():
+    target = os.environ.get('DATA_WRANGLING_PROFILE')
+    if not target or target == '0':
+        return
+    enable(memory=os.environ.get('DATA_WRANGLING_PROFILE_MEMORY', '1') != '0')
+
+    def report():
+        registry = disable()
+        if registry is None or not registry.records:
+            return
+        if target.endswith('.json'):
+            to_json(target, registry)
+        else:
+            print(summary(registry), file=sys.stderr)
+    atexit.register(report)
+
+_profile_from_environment()
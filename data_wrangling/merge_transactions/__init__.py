@@ -0,0 +1,13 @@
+'''
+Merge Transactions Data task, combine the transaction files of every branch
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'import_data': '.merge',
+    'ingest_data': '.merge',
+    'BRANCH_SCHEMA': '.branch_loader',
+    'load_branch_files': '.branch_loader',
+    'BranchStore': '.incremental_store',
+})
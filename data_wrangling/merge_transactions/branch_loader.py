@@ -0,0 +1,157 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from ..column_cache import load_cached
+from ..instrumentation import instrument, stage
+from ..schemas import DATASETS
+
+'''
+Parallel loader for the branch transaction files.
+- every file is parsed in a separate process (read_excel is the slowest part).
+- each file is reconciled to the declared schema: column names are matched without
+  caring about case & spaces, missing columns are added as empty, and dtypes are pinned.
+- all files are concatenated exactly once.
+'''
+
+# declared schema of the transaction data (column name and its dtype), shared with the
+# other datasets in data_wrangling.schemas
+BRANCH_SCHEMA = DATASETS['branch']['dtype']
+DATE_FORMAT = DATASETS['branch']['date_format'] # format of 'Date' column in the .csv files
+CSV_OPTIONS = DATASETS['branch']['options']
+
+SUPPORTED_FORMATS = ('.csv', '.xlsx')
+
+def _normalize(name):
+    return ' '.join(str(name).split()).lower()
+
+def reconcile_columns(data, schema):
+    '''
+  Rename, add and order columns of a branch data following the schema
+
+  Parameters
+  ----------
+  data (dataframe) :   data of one branch file
+  schema (dict)    :   column name and its dtype
+
+  Returns
+  --------
+  data :  dataframe with schema columns first (in schema order), then the extra columns
+    '''
+
+    canonical = {_normalize(column): column for column in schema}
+    data = data.rename(columns=lambda column: canonical.get(_normalize(column), column))
+    for column in schema:
+        if column not in data.columns:
+            data[column] = pd.NA
+    extra = [column for column in data.columns if column not in schema]
+    return data[list(schema) + extra]
+
+def cast_schema(data, schema, categorical=True):
+    '''
+  Pin dtypes of the data following the schema
+
+  Parameters
+  ----------
+  data (dataframe)   :   reconciled data
+  schema (dict)      :   column name and its dtype
+  categorical (bool) :   if False, category columns are kept as string, thus data of
+                         several files can be concatenated before getting its categories
+    '''
+
+    for column, dtype in schema.items():
+        if dtype.startswith('datetime64'):
+            values = data[column]
+            parsed = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+            if values.notna().any() and parsed.isna().all(): # e.g. date cell already parsed by read_excel
+                parsed = pd.to_datetime(values, errors='coerce')
+            data[column] = parsed.astype(dtype)
+        elif dtype == 'category' and not categorical:
+            data[column] = data[column].astype('string')
+        else:
+            data[column] = data[column].astype(dtype)
+    return data
+
+def read_branch_file(filename, schema=BRANCH_SCHEMA, cache=False):
+    '''
+  Read one branch file (.csv with ';' separator or .xlsx) and reconcile it to the schema
+
+  Parameters
+  ----------
+  filename (str) :   path of the branch file
+  schema (dict)  :   column name and its dtype
+  cache (bool)   :   parse the file only once into a memory-mapped columnar cache
+                     (`<filename>.cols` or under DATA_WRANGLING_CACHE_DIR, see
+                     data_wrangling.column_cache), later reads open the cache
+
+  Returns
+  --------
+  data :  dataframe of the branch, category columns are still string
+    '''
+
+    if not filename.endswith(SUPPORTED_FORMATS):
+        raise ValueError(f'format not available for {filename}, please use .csv or .xlsx only')
+    if cache:
+        key = json.dumps({'schema': schema, 'date_format': DATE_FORMAT, 'options': CSV_OPTIONS}, sort_keys=True)
+        return load_cached(filename, lambda: _parse_branch_file(filename, schema), key=key)
+    return _parse_branch_file(filename, schema)
+
+@instrument('parse_branch_file')
+def _parse_branch_file(filename, schema):
+    if filename.endswith('.csv'):
+        data = pd.read_csv(filename, dtype={column: 'string' for column, dtype in schema.items()
+                                            if dtype in ('string', 'category')}, **CSV_OPTIONS)
+    else:
+        data = pd.read_excel(filename)
+
+    return cast_schema(reconcile_columns(data, schema), schema, categorical=False)
+
+def load_branch_files(filenames, schema=BRANCH_SCHEMA, workers=None, cache=False):
+    '''
+  Read every branch file in parallel and combine them with a single concat
+
+  Parameters
+  ----------
+  filenames (list) :   branch file names
+  schema (dict)    :   column name and its dtype
+  workers (int)    :   number of process, default is number of cpu. 1 read the files
+                       in the current process
+  cache (bool)     :   read the files through their columnar cache, see read_branch_file
+
+  Returns
+  --------
+  data :  combined dataframe with pinned dtypes
+    '''
+
+    workers = min(workers or os.cpu_count() or 1, max(len(filenames), 1))
+    with stage('read_branch_files') as record: # stages of the worker processes are not recorded
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                frames = list(executor.map(read_branch_file, filenames, [schema] * len(filenames),
+                                           [cache] * len(filenames)))
+        else:
+            frames = [read_branch_file(filename, schema, cache) for filename in filenames]
+        record.rows_out = sum(len(frame) for frame in frames)
+
+    with stage('concat_cast') as record:
+        if len(frames) == 0: # no file, return an empty data following the schema
+            data = reconcile_columns(pd.DataFrame(), schema)
+        else:
+            data = pd.concat(frames, ignore_index=True)
+        data = cast_schema(data, schema)
+        record.rows_out = len(data)
+    return data
+
+def write_columnar(data, path):
+    '''
+  Write the merged data into a columnar file (.parquet or .feather, need pyarrow)
+    '''
+
+    if path.endswith('.parquet'):
+        data.to_parquet(path, index=False)
+    elif path.endswith('.feather'):
+        data.reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError('columnar output must be a .parquet or .feather file')
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .branch_loader import BRANCH_SCHEMA, cast_schema, read_branch_file
+
+'''
+Incremental store of the merged transaction data.
+- `manifest.json` keep the content hash, size & modified time of every ingested file, a
+  file with the name, size & modified time of an ingested one is skipped without reading
+  it, another file is hashed and skipped when its content was ingested (even if renamed).
+- new rows are stored as one parquet part per ingested file (need pyarrow).
+- the `Invoice ID` of every part are indexed in a sorted array (`part-NNNNN.ids.npy`),
+  a new Invoice ID is searched in the memory-mapped arrays (binary search), thus a run
+  only reads the new files and a few pages of each index, not the whole history.
+A part and its index are written before the manifest, a run stopped in between leave
+files that are not in the manifest and are overwritten by the next run.
+'''
+
+def file_hash(filename, block_size=1 << 20):
+    '''
+  sha256 of the file content
+    '''
+
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class BranchStore:
+    '''
+  Persistent merged store of branch transactions
+
+  Parameters
+  ----------
+  store_dir (str) :   folder of the store, created if not exist
+  schema (dict)   :   column name and its dtype
+    '''
+
+    def __init__(self, store_dir, schema=BRANCH_SCHEMA):
+        self.store_dir = store_dir
+        self.schema = schema
+        os.makedirs(store_dir, exist_ok=True)
+
+        self.manifest = {'files': {}, 'rows': 0}
+        if os.path.exists(self._path('manifest.json')):
+            with open(self._path('manifest.json')) as file:
+                self.manifest = json.load(file)
+
+        # index of a part missing (e.g. a store of an older version), rebuilt from the part
+        for part in self._parts():
+            if not os.path.exists(self._path(self._index_name(part))):
+                self._write_index(part, pd.read_parquet(self._path(part), columns=['Invoice ID'])['Invoice ID'])
+
+    def _path(self, name):
+        return os.path.join(self.store_dir, name)
+
+    def _parts(self):
+        return [entry['part'] for entry in self.manifest['files'].values() if entry['part'] is not None]
+
+    @staticmethod
+    def _index_name(part):
+        return part.replace('.parquet', '.ids.npy')
+
+    @staticmethod
+    def _encode(invoice_ids):
+        keys = [invoice_id.encode('utf-8') for invoice_id in invoice_ids]
+        return np.array(keys, dtype=bytes) if keys else np.empty(0, dtype='S1')
+
+    def _write_index(self, part, invoice_ids):
+        temporary = self._path(self._index_name(part) + '.tmp')
+        with open(temporary, 'wb') as file:
+            np.save(file, np.unique(self._encode(invoice_ids)))
+        os.replace(temporary, self._path(self._index_name(part)))
+
+    def _stored(self, invoice_ids):
+        '''
+  boolean array, True for the Invoice ID already in a part of the store
+        '''
+
+        keys = self._encode(invoice_ids)
+        stored = np.zeros(len(keys), dtype=bool)
+        for part in self._parts():
+            index = np.load(self._path(self._index_name(part)), mmap_mode='r')
+            if len(index) == 0 or len(keys) == 0:
+                continue
+            position = np.minimum(np.searchsorted(index, keys), len(index) - 1)
+            stored |= index[position] == keys
+        return stored
+
+    def _write_manifest(self):
+        with open(self._path('manifest.json.tmp'), 'w') as file:
+            json.dump(self.manifest, file, indent=2)
+        os.replace(self._path('manifest.json.tmp'), self._path('manifest.json'))
+
+    def ingest(self, filenames, workers=None):
+        '''
+  Add only new files into the store, duplicate Invoice ID is rejected
+
+  Parameters
+  ----------
+  filenames (list) :   branch file names
+  workers (int)    :   number of process reading the new files in parallel
+
+  Returns
+  --------
+  new_data, summary :  dataframe of the newly stored rows and dict contains
+                       ingested & skipped file names, rejected duplicate count and
+                       count of row without Invoice ID
+        '''
+
+        summary = {'ingested': [], 'skipped': [], 'duplicates': 0, 'missing': 0}
+
+        ingested = {(entry['file'], entry.get('size'), entry.get('mtime_ns')) for entry in self.manifest['files'].values()}
+        new_files, stats = {}, {}
+        for filename in filenames:
+            stat = os.stat(filename)
+            if (os.path.basename(filename), stat.st_size, stat.st_mtime_ns) in ingested: # not hashed again
+                summary['skipped'].append(filename)
+                continue
+            stats[filename] = stat
+            content_hash = file_hash(filename)
+            if content_hash in self.manifest['files'] or content_hash in new_files:
+                summary['skipped'].append(filename)
+            else:
+                new_files[content_hash] = filename
+
+        hashes, names = list(new_files), list(new_files.values())
+        workers = min(workers or os.cpu_count() or 1, max(len(names), 1))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                frames = list(executor.map(read_branch_file, names, [self.schema] * len(names)))
+        else:
+            frames = [read_branch_file(name, self.schema) for name in names]
+
+        new_frames = []
+        for content_hash, filename, data in zip(hashes, names, frames):
+            # transaction without Invoice ID can not be checked, thus it is rejected
+            missing = data['Invoice ID'].isna()
+            summary['missing'] += int(missing.sum())
+            data = data[~missing.values]
+
+            # keep the first row of each Invoice ID not stored yet
+            invoice_ids = data['Invoice ID'].astype(str).tolist()
+            keep = ~(data['Invoice ID'].duplicated(keep='first').to_numpy() | self._stored(invoice_ids))
+            summary['duplicates'] += int(np.count_nonzero(~keep))
+            data = data[keep]
+
+            part = None
+            if len(data) > 0:
+                part = f'part-{len(self.manifest["files"]):05d}.parquet'
+                data.to_parquet(self._path(part), index=False)
+                self._write_index(part, [invoice_id for invoice_id, kept in zip(invoice_ids, keep) if kept])
+
+            stat = stats[filename]
+            self.manifest['files'][content_hash] = {'file': os.path.basename(filename), 'part': part, 'rows': len(data),
+                                                    'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            self.manifest['rows'] += len(data)
+            self._write_manifest()
+
+            summary['ingested'].append(filename)
+            new_frames.append(data)
+
+        new_data = pd.concat(new_frames, ignore_index=True) if new_frames else pd.DataFrame(columns=list(self.schema))
+        return cast_schema(new_data, self.schema), summary
+
+    def load(self, columns=None):
+        '''
+  Read the whole merged data from the store
+
+  Parameters
+  ----------
+  columns (list) :   only read these columns (optional)
+        '''
+
+        frames = [pd.read_parquet(self._path(part), columns=columns) for part in self._parts()]
+        schema = self.schema if columns is None else {column: self.schema[column] for column in columns if column in self.schema}
+        if len(frames) == 0:
+            return cast_schema(pd.DataFrame(columns=list(schema)), schema)
+        return cast_schema(pd.concat(frames, ignore_index=True), schema)
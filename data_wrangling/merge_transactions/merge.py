@@ -0,0 +1,84 @@
+from .branch_loader import BRANCH_SCHEMA, SUPPORTED_FORMATS, load_branch_files, write_columnar
+from .incremental_store import BranchStore
+
+'''
+Merge the transaction files of every branch (.csv & .xlsx), at once with `import_data`
+or incrementally into a persistent store with `ingest_data`.
+'''
+
+def import_data(filenames, workers=None, schema=BRANCH_SCHEMA, output=None, cache=False):
+    '''
+  Function to combine separated data (supported .csv & .xlxs only)
+
+  Parameters
+  ----------
+  filenames : list
+     separated file name
+  workers : int
+     number of process reading the files in parallel, default is number of cpu
+  schema : dict
+     column name and its dtype, every file is reconciled to this schema
+  output : str
+     optional .parquet / .feather path to store the combined data
+  cache : bool
+     read the files through their memory-mapped columnar cache (written next to the files
+     or under DATA_WRANGLING_CACHE_DIR), for files that are read again and again
+
+  Returns
+  --------
+  data : dataframe
+      combine data, the rows of the files in the order of the file names
+
+    '''
+
+    supported_files = [] # collecting file with supported format
+    for filename in filenames:
+        if filename.endswith(SUPPORTED_FORMATS):
+            supported_files.append(filename)
+        else:
+          print('format not available, please use .csv or .xlsx only')
+
+    # read all files in parallel and combine them at once
+    data = load_branch_files(supported_files, schema=schema, workers=workers, cache=cache)
+
+    if output is not None:
+        write_columnar(data, output) # store combined data in columnar format
+
+    return data #return data
+
+def ingest_data(filenames, store_dir, workers=None):
+    '''
+  Function to add only new transaction files into a persistent merged store.
+  File already ingested is skipped and transaction with an existing Invoice ID
+  is rejected, thus a run cost is proportional to the new files only.
+
+  Parameters
+  ----------
+  filenames : list
+     separated file name
+  store_dir : str
+     folder of the merged store
+  workers : int
+     number of process reading the new files in parallel
+
+  Returns
+  --------
+  new_data : dataframe
+      newly stored transactions (use BranchStore(store_dir).load() for all data)
+
+    '''
+
+    supported_files = [] # collecting file with supported format
+    for filename in filenames:
+        if filename.endswith(SUPPORTED_FORMATS):
+            supported_files.append(filename)
+        else:
+          print('format not available, please use .csv or .xlsx only')
+
+    store = BranchStore(store_dir)
+    new_data, summary = store.ingest(supported_files, workers=workers)
+
+    # print message contain ingestion summary
+    print(f"Ingested files : {len(summary['ingested'])}, skipped files : {len(summary['skipped'])}")
+    print(f"New rows : {len(new_data)}, rejected duplicates : {summary['duplicates']}, missing Invoice ID : {summary['missing']}")
+    return new_data
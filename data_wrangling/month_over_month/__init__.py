@@ -0,0 +1,15 @@
+'''
+Month-Over-Month Percentage Change in Sales task
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'build_sales_cube': '.monthly_sales_store',
+    'month_over_month': '.monthly_sales_store',
+    'monthly_sales': '.monthly_sales_store',
+    'read_orders': '.monthly_sales_store',
+    'sales_change': '.monthly_sales_store',
+    'to_report': '.monthly_sales_store',
+    'MonthlySalesStore': '.monthly_sales_store',
+})
@@ -0,0 +1,398 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ..column_cache import load_dataset
+from ..instrumentation import instrument
+from ..parallel import partitioned_groupby
+from ..sales_cube import SalesCube
+from ..schemas import read_dataset
+
+'''
+Incremental month-over-month sales aggregation.
+- month is grouped on an integer period key (year * 12 + month - 1) instead of a
+  'YYYY-MM' string, the string is formatted only for the final monthly rows.
+- a large order data is grouped by a process pool over hash partitions of the period
+  key (data_wrangling.parallel), the totals are exactly the same as a single groupby.
+- `MonthlySalesStore` keep the monthly sales totals in a small file. A source file is
+  read from the byte offset where its previous ingestion stopped (the older rows are not
+  read again), the new rows only update their months, then the percentage change is
+  recomputed for those months and the month after each of them. A source file whose
+  already read bytes changed is rebuilt from scratch.
+- week-over-week, quarter-over-quarter or a breakdown by Category / Region are answered
+  from a `SalesCube` (data_wrangling.sales_cube) built once by `build_sales_cube`.
+'''
+
+ORDER_COLUMNS = ['Order Date', 'Sales']
+SIGNATURE_BLOCK = 65_536 # bytes hashed at the start of a source file and before its offset
+STORE_VERSION = 2
+
+def read_orders(filename, offset=0, chunksize=None):
+    '''
+  Read only 'Order Date' & 'Sales' of the superstore data, the whole file is opened
+  from its memory-mapped columnar cache, the rows after a byte offset are parsed with
+  the C parser
+
+  Parameters
+  ----------
+  filename (str)  :   path of Global_Superstore2.csv
+  offset (int)    :   byte offset of the first row to read (the end of the rows already
+                      read, see `appended_rows`), 0 read the whole file
+  chunksize (int) :   if given, return a reader of chunks (optional)
+    '''
+
+    if offset == 0 and chunksize is None: # whole file, open it from the columnar cache
+        return load_dataset('superstore', filename, columns=ORDER_COLUMNS)
+    return read_rows(filename, *row_range(filename, offset), chunksize=chunksize)
+
+class _ByteRange(io.RawIOBase):
+    '''
+  Read-only stream of a prefix (e.g. the header line) followed by `length` bytes of a
+  binary file from its current position
+    '''
+
+    def __init__(self, file, length, prefix=b''):
+        self.file, self.remaining, self.prefix = file, length, prefix
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size], self.prefix = self.prefix[:size], self.prefix[size:]
+            return size
+        size = min(len(buffer), self.remaining)
+        read = self.file.readinto(memoryview(buffer)[:size]) if size else 0
+        self.remaining -= read
+        return read
+
+def _line_end(file, start, stop):
+    '''
+  offset after the last line break in the bytes [start, stop) of a file, start if none
+    '''
+
+    end = stop
+    while end > start:
+        block_start = max(end - SIGNATURE_BLOCK, start)
+        file.seek(block_start)
+        position = file.read(end - block_start).rfind(b'\n')
+        if position >= 0:
+            return block_start + position + 1
+        end = block_start
+    return start
+
+def row_range(filename, offset=0):
+    '''
+  byte range [start, end) of the complete rows after an offset (the header is skipped),
+  a last row without line break (still being written) is left for the next read
+    '''
+
+    with open(filename, 'rb') as file:
+        start = max(offset, len(file.readline()))
+        return start, _line_end(file, start, os.fstat(file.fileno()).st_size)
+
+def read_rows(filename, start, end, chunksize=None):
+    '''
+  Parse 'Order Date' & 'Sales' of the superstore rows in the bytes [start, end), the
+  bytes before start are not read
+
+  Parameters
+  ----------
+  filename (str)   :   path of the superstore data
+  start, end (int) :   byte range of complete rows, see row_range
+  chunksize (int)  :   if given, return an iterator of chunks
+
+  Returns
+  --------
+  data :  dataframe (or iterator of dataframe chunks)
+    '''
+
+    if chunksize is not None:
+        return _read_chunks(filename, start, end, chunksize)
+    with open(filename, 'rb') as file:
+        header = file.readline()
+        file.seek(start)
+        return read_dataset('superstore', io.BufferedReader(_ByteRange(file, end - start, header)), columns=ORDER_COLUMNS)
+
+def _read_chunks(filename, start, end, chunksize):
+    with open(filename, 'rb') as file:
+        header = file.readline()
+        file.seek(start)
+        rows = io.BufferedReader(_ByteRange(file, end - start, header))
+        with read_dataset('superstore', rows, columns=ORDER_COLUMNS, chunksize=chunksize) as reader:
+            yield from reader
+
+def _block_hash(file, start, stop):
+    file.seek(start)
+    return hashlib.sha1(file.read(stop - start)).hexdigest()
+
+def file_signature(filename, offset):
+    '''
+  signature of the first `offset` bytes of a file: its size & modification time, and the
+  hash of the block at its start and of the block ending at the offset
+    '''
+
+    with open(filename, 'rb') as file:
+        status = os.fstat(file.fileno())
+        return {'offset': offset, 'size': status.st_size, 'mtime_ns': status.st_mtime_ns,
+                'head': _block_hash(file, 0, min(offset, SIGNATURE_BLOCK)),
+                'tail': _block_hash(file, max(offset - SIGNATURE_BLOCK, 0), offset)}
+
+def only_appended(filename, signature):
+    '''
+  whether the bytes read at the signature are unchanged, i.e. rows were only appended to
+  the file since then (a truncated, rewritten or replaced file is not)
+    '''
+
+    status = os.stat(filename)
+    if status.st_size < signature['offset']:
+        return False
+    if status.st_size == signature['size'] and status.st_mtime_ns != signature['mtime_ns']: # rewritten in place
+        return False
+    current = file_signature(filename, signature['offset'])
+    return current['head'] == signature['head'] and current['tail'] == signature['tail']
+
+def period_key(order_date):
+    '''
+  integer month key of a datetime series (year * 12 + month - 1)
+    '''
+
+    return (order_date.dt.year * 12 + order_date.dt.month - 1).astype('int64')
+
+def period_label(period):
+    '''
+  'YYYY-MM' label of integer month keys
+    '''
+
+    period = np.asarray(period)
+    return [f'{year:04d}-{month:02d}' for year, month in zip(period // 12, period % 12 + 1)]
+
+@instrument
+def monthly_sales(data, workers=None):
+    '''
+  total sales of each month, grouped on the integer period key
+
+  Parameters
+  ----------
+  data (dataframe) :   orders with 'Order Date' (datetime) and 'Sales' column
+  workers (int)    :   number of process of the partitioned groupby (large data only),
+                       default is the number of cpu
+
+  Returns
+  --------
+  sales :  series of sales total with integer period key as an index
+    '''
+
+    sales = partitioned_groupby(data, [period_key(data['Order Date']).values], {'Sales': ('Sales', 'sum')}, workers=workers)
+    return sales['Sales']
+
+def sales_change(sales):
+    '''
+  month-over-month percentage change (rounded to 2 decimal) of a monthly sales series
+    '''
+
+    return round(sales.pct_change() * 100, 2)
+
+def to_report(sales, change):
+    '''
+  monthly report with the same columns as the MM_Percentage_Change_Sales output
+    '''
+
+    return pd.DataFrame({'Order Date': period_label(sales.index),
+                         'Sales': sales.values,
+                         'Sales Change': change.values})
+
+def month_over_month(filename, workers=None):
+    '''
+  Month-over-month percentage change in sales of the superstore data
+
+  Parameters
+  ----------
+  filename (str) :   path of Global_Superstore2.csv
+  workers (int)  :   number of process of the monthly sales groupby
+
+  Returns
+  --------
+  report :  dataframe of 'Order Date' (YYYY-MM), 'Sales' and 'Sales Change' (in %,
+            rounded to 2 decimal), sorted by 'Order Date'
+    '''
+
+    sales = monthly_sales(read_orders(filename), workers=workers) # total sales of each month
+    return to_report(sales, sales_change(sales))
+
+def build_sales_cube(filename, measures=('Sales', 'Profit'), dimensions=('Category', 'Region'), workers=None):
+    '''
+  Sales cube of the superstore data, day to year periods crossed with the dimensions
+
+  Parameters
+  ----------
+  filename (str)    :   path of Global_Superstore2.csv
+  measures (list)   :   columns summed
+  dimensions (list) :   columns of the breakdowns, e.g. 'Category', 'Region', 'Market'
+  workers (int)     :   number of process of the cube groupby
+
+  Returns
+  --------
+  cube :  SalesCube, e.g. `cube.period_over_period('Sales', 'quarter', by=['Category'])`
+    '''
+
+    columns = ['Order Date'] + list(measures) + list(dimensions)
+    data = load_dataset('superstore', filename, columns=columns) # only the cube columns, from the columnar cache
+    return SalesCube(data, 'Order Date', measures, dimensions, workers=workers)
+
+def _to_json(sales):
+    return {'period': sales.index.tolist(), 'sales': sales.tolist()}
+
+def _from_json(stored):
+    return pd.Series(stored['sales'], index=np.array(stored['period'], dtype='int64'), dtype='float64')
+
+class MonthlySalesStore:
+    '''
+  Persistent monthly sales totals
+
+  The store file (.json) keeps the monthly totals & percentage change, and for every
+  ingested source file: the byte offset after the rows already read, the file signature
+  at that offset (size, modification time and hash of the first block & of the block
+  before the offset, see file_signature) and the monthly sales of its rows. The monthly
+  sales added by `update` are kept apart, the totals are the sum of all of them:
+
+    {"version": 2, "period": [...], "sales": [...], "change": [...],
+     "updates": {"period": [...], "sales": [...]},
+     "sources": {"/abs/path.csv": {"offset": ..., "size": ..., "mtime_ns": ..., "head": ...,
+                                   "tail": ..., "period": [...], "sales": [...]}}}
+
+  Parameters
+  ----------
+  path (str) :   path of the store file (.json), created on the first save
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.sales = pd.Series(dtype='float64')
+        self.change = pd.Series(dtype='float64')
+        self.updates = pd.Series(dtype='float64') # monthly sales added by update()
+        self.sources = {} # source file -> signature at its offset & monthly sales of its rows
+
+        if os.path.exists(path):
+            with open(path) as file:
+                stored = json.load(file)
+            if stored.get('version') != STORE_VERSION:
+                raise ValueError(f'{path} is not a version {STORE_VERSION} sales store, remove it to rebuild the store')
+            self.sales = _from_json(stored)
+            self.change = pd.Series(stored['change'], index=self.sales.index, dtype='float64')
+            self.updates = _from_json(stored['updates'])
+            self.sources = {key: {**{name: value for name, value in source.items() if name not in ('period', 'sales')},
+                                  'sales': _from_json(source)} for key, source in stored['sources'].items()}
+
+    @instrument('sales_store_update')
+    def update(self, data):
+        '''
+  Add new order rows into the monthly totals
+
+  Parameters
+  ----------
+  data (dataframe) :   new orders with 'Order Date' (datetime) and 'Sales' column
+
+  Returns
+  --------
+  affected :  sorted array of period key whose sales or percentage change was updated
+        '''
+
+        new_sales = monthly_sales(data) if len(data) else pd.Series(dtype='float64')
+        self.updates = self.updates.add(new_sales, fill_value=0).sort_index()
+        return self._add(new_sales)
+
+    def _add(self, new_sales):
+        '''
+  add monthly sales into the totals, the change is recomputed only for the updated
+  months and the month after each
+        '''
+
+        if len(new_sales) == 0:
+            return np.empty(0, dtype='int64')
+        self.sales = self.sales.add(new_sales, fill_value=0).sort_index()
+        self.change = self.change.reindex(self.sales.index)
+
+        position = self.sales.index.get_indexer(new_sales.index)
+        position = np.unique(np.concatenate((position, position + 1)))
+        position = position[position < len(self.sales)]
+
+        values = self.sales.to_numpy()
+        previous = np.where(position > 0, values[np.maximum(position - 1, 0)], np.nan)
+        self.change.iloc[position] = np.round((values[position] / previous - 1) * 100, 2)
+        return self.sales.index[position].to_numpy()
+
+    def _rebuild(self):
+        '''
+  recompute the totals & the whole change from the sales of every source and update
+        '''
+
+        parts = [self.updates] + [source['sales'] for _, source in sorted(self.sources.items())]
+        sales = pd.Series(dtype='float64')
+        for part in parts:
+            sales = sales.add(part, fill_value=0)
+        self.sales = sales.sort_index()
+        self.change = sales_change(self.sales)
+        return self.sales.index.to_numpy()
+
+    @instrument('sales_store_ingest')
+    def ingest_csv(self, filename, chunksize=None):
+        '''
+  Read only the rows appended to filename since the previous ingestion: the file is read
+  from the byte offset where the previous ingestion stopped. If the bytes already read
+  changed (truncated, rewritten or replaced file) the sales of the file are rebuilt from
+  the whole file.
+
+  Parameters
+  ----------
+  filename (str)  :   path of the superstore data
+  chunksize (int) :   read the new rows chunk by chunk (optional)
+
+  Returns
+  --------
+  affected :  sorted array of updated period key
+        '''
+
+        key = os.path.abspath(filename)
+        source = self.sources.get(key)
+        rebuild = source is not None and not only_appended(filename, source)
+        offset = 0 if source is None or rebuild else source['offset']
+
+        start, end = row_range(filename, offset)
+        chunks = read_rows(filename, start, end, chunksize=chunksize)
+        if chunksize is None:
+            chunks = [chunks]
+        new_sales = pd.Series(dtype='float64')
+        for chunk in chunks:
+            if len(chunk):
+                new_sales = new_sales.add(monthly_sales(chunk), fill_value=0)
+        new_sales = new_sales.sort_index()
+
+        old_sales = pd.Series(dtype='float64') if source is None or rebuild else source['sales']
+        self.sources[key] = {**file_signature(filename, end), 'sales': old_sales.add(new_sales, fill_value=0).sort_index()}
+        if rebuild:
+            return self._rebuild()
+        return self._add(new_sales)
+
+    def report(self):
+        '''
+  monthly sales & percentage change, sorted by month
+        '''
+
+        return to_report(self.sales, self.change)
+
+    def save(self):
+        stored = {'version': STORE_VERSION,
+                  **_to_json(self.sales),
+                  'change': [None if np.isnan(value) else value for value in self.change.tolist()],
+                  'updates': _to_json(self.updates),
+                  'sources': {key: {**{name: value for name, value in source.items() if name != 'sales'}, **_to_json(source['sales'])}
+                              for key, source in self.sources.items()}}
+        with open(self.path + '.tmp', 'w') as file:
+            json.dump(stored, file)
+        os.replace(self.path + '.tmp', self.path)
@@ -0,0 +1,261 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from .instrumentation import stage
+
+'''
+Multi-core groupby backend of the aggregation tasks.
+The rows are hash-partitioned by group key across a process pool:
+  1. the key & value columns are copied once into shared memory blocks, the workers map
+     them as numpy arrays (only the block names and the small results are pickled)
+  2. every worker hashes the group key of a range of rows into its partition number
+  3. every worker aggregates the rows of one partition with a pandas groupby
+  4. the partial results are concatenated and sorted by group key
+All rows of a group fall into the same partition and keep their order, thus every group
+is aggregated by the same pandas code over the same values in the same order as in the
+single-process groupby, and the result is exactly the same (float sums included).
+String, float & nullable keys are encoded into integer codes first (a categorical key
+use its codes), nullable value columns are shared as their data & mask arrays and a
+string column only counted as its non-missing flags.
+'''
+
+PARALLEL_MIN_ROWS = 1_000_000 # smaller data is aggregated in process, starting the pool costs more than it saves
+MASKED_ARRAYS = (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)
+COUNT_AGGREGATIONS = {'count', 'size'} # only need the missing values of a column
+_MISSING_PARTITION = -1 # partition of the rows with a missing key, dropped like in pandas groupby
+
+def default_workers():
+    '''
+  number of worker process, DATA_WRANGLING_WORKERS environment variable or number of cpu
+    '''
+
+    return int(os.environ.get('DATA_WRANGLING_WORKERS') or 0) or os.cpu_count() or 1
+
+class SharedColumns:
+    '''
+  1-d numpy arrays copied into shared memory blocks, `spec` is what a worker needs to map
+  them again (block name, dtype & length of every array). The blocks are removed on close.
+
+  Parameters
+  ----------
+  arrays (dict) :   name and numpy array
+    '''
+
+    def __init__(self, arrays):
+        self.blocks, self.spec = [], {}
+        try:
+            for name, array in arrays.items():
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self.blocks.append(block)
+                np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+                self.spec[name] = (block.name, array.dtype.str, len(array))
+        except BaseException:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+def _attach(spec, names):
+    '''
+  map shared arrays in a worker, the blocks must be closed by _detach
+    '''
+
+    blocks, arrays = [], {}
+    for name in names:
+        block_name, dtype, length = spec[name]
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray((length,), np.dtype(dtype), buffer=block.buf)
+    return blocks, arrays
+
+def _detach(blocks, arrays):
+    arrays.clear() # the views must be released before closing their block
+    for block in blocks:
+        try:
+            block.close()
+        except BufferError: # a view is still referenced (by an error traceback), unmapped at exit
+            pass
+
+def _hash_partition(keys, coded, partitions):
+    '''
+  partition number of every row, hash of the (combined) group key modulo partitions
+    '''
+
+    hashed = pd.util.hash_array(keys[0])
+    for key in keys[1:]:
+        hashed = hashed * np.uint64(0x100000001B3) ^ pd.util.hash_array(key)
+    partition = (hashed % np.uint64(partitions)).astype(np.int32)
+    for key, is_coded in zip(keys, coded):
+        if is_coded:
+            partition[key < 0] = _MISSING_PARTITION # code -1 is a missing key
+    return partition
+
+def _partition_rows(spec, keys, coded, start, stop, partitions):
+    '''
+  worker task, write the partition number of the rows [start, stop)
+    '''
+
+    blocks, arrays = _attach(spec, keys + ['partition'])
+    try:
+        arrays['partition'][start:stop] = _hash_partition([arrays[key][start:stop] for key in keys], coded, partitions)
+    finally:
+        _detach(blocks, arrays)
+
+def _aggregate_partition(spec, keys, values, aggregations, partition):
+    '''
+  worker task, groupby aggregation of the rows of one partition (in their original order)
+    '''
+
+    names = keys + [name for name, dtype in values.items() for name in ((name, f'{name}.mask') if dtype else (name,))]
+    blocks, arrays = _attach(spec, names + ['partition'])
+    try:
+        rows = np.flatnonzero(arrays['partition'] == partition)
+        frame = {key: arrays[key][rows] for key in keys}
+        for name, dtype in values.items():
+            if dtype: # nullable column, rebuilt from its data & mask
+                frame[name] = pd.api.types.pandas_dtype(dtype).construct_array_type()(arrays[name][rows], arrays[f'{name}.mask'][rows])
+            else:
+                frame[name] = arrays[name][rows]
+        frame = pd.DataFrame(frame, copy=False)
+    finally:
+        _detach(blocks, arrays)
+    return _aggregate(frame, keys, aggregations, sort=False) # sorted once after the merge
+
+def _aggregate(data, by, aggregations, sort=True):
+    '''
+  `data.groupby(by, observed=True).agg(**aggregations)`, one column aggregation at a time
+  (same result without the overhead of the named aggregation)
+    '''
+
+    grouped = data.groupby(by, observed=True, sort=sort)
+    return pd.DataFrame({output: grouped[column].agg(function) for output, (column, function) in aggregations.items()})
+
+def _encode_key(key):
+    '''
+  integer codes of a group key, whether -1 means missing, and the function rebuilding
+  the key values from the codes
+    '''
+
+    dtype = key.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return key.cat.codes.to_numpy(), True, lambda codes: pd.CategoricalIndex(pd.Categorical.from_codes(codes, dtype=dtype))
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iub': # the values are their own codes
+        return key.to_numpy(), False, lambda codes: pd.Index(codes, dtype=dtype)
+    codes, uniques = pd.factorize(key, sort=True)
+    if uniques.dtype == object: # like pandas groupby, the dtype of the key values is inferred (e.g. str)
+        return codes, True, lambda codes: pd.Index(uniques.take(codes).to_numpy())
+    return codes, True, uniques.take
+
+def _shared_value(values, functions):
+    '''
+  numpy data, mask & dtype of a nullable value column, None if the column can not be
+  shared. A column only counted is shared as its non-missing flags (count become sum)
+    '''
+
+    array = values.array
+    if isinstance(array, MASKED_ARRAYS):
+        dtype = array.dtype
+        return array.to_numpy(dtype=dtype.numpy_dtype, na_value=dtype.numpy_dtype.type(0)), array.isna(), str(dtype)
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in 'iufbmM':
+        return values.to_numpy(), None, None
+    if functions <= COUNT_AGGREGATIONS:
+        return values.notna().to_numpy(), None, 'notna'
+    return None
+
+def partitioned_groupby(data, by, aggregations, workers=None, partitions=None, min_rows=PARALLEL_MIN_ROWS):
+    '''
+  `data.groupby(by, observed=True).agg(**aggregations)` computed by a process pool over
+  hash partitions of the rows, the result is exactly the same as the single-process groupby
+  (which is used for small data, one worker or a column that can not be shared)
+
+  Parameters
+  ----------
+  data (dataframe)    :   input rows
+  by (list)           :   group keys, column name or array with one value per row
+  aggregations (dict) :   named aggregations, output column and (column, aggregation),
+                          e.g. {'profit': ('Profit', 'sum')}
+  workers (int)       :   number of process, default is default_workers()
+  partitions (int)    :   number of hash partitions, default is the number of workers
+  min_rows (int)      :   data with fewer rows is aggregated in process
+
+  Returns
+  --------
+  result :  dataframe with the group keys as index (sorted) and one column per aggregation
+    '''
+
+    workers = workers or default_workers()
+    shared_values = None
+    if workers > 1 and len(data) >= max(min_rows, 1):
+        functions = {}
+        for column, function in aggregations.values():
+            functions.setdefault(column, set()).add(function)
+        shared_values = {column: _shared_value(data[column], column_functions) for column, column_functions in functions.items()}
+    if shared_values is None or None in shared_values.values(): # single-process groupby
+        return _aggregate(data, by, aggregations)
+
+    with stage('partitioned_groupby', rows_in=len(data)) as record:
+        keys, names, coded, rebuild = [], [], [], []
+        for key in by:
+            if isinstance(key, str) or not hasattr(key, '__len__'): # column name
+                key = data[key]
+            elif not isinstance(key, pd.Series):
+                key = pd.Series(key, copy=False)
+            codes, is_coded, from_codes = _encode_key(key)
+            keys.append(codes)
+            names.append(key.name)
+            coded.append(is_coded)
+            rebuild.append(from_codes)
+
+        key_names = [f'key{i}' for i in range(len(keys))]
+        value_names = {column: f'value{i}' for i, column in enumerate(shared_values)}
+        arrays = dict(zip(key_names, keys))
+        arrays['partition'] = np.empty(len(data), dtype=np.int32)
+        values = {}
+        for column, (value, mask, dtype) in shared_values.items():
+            arrays[value_names[column]] = value
+            if mask is not None:
+                arrays[f'{value_names[column]}.mask'] = mask
+            values[value_names[column]] = None if dtype == 'notna' else dtype
+        aggregations = {output: (value_names[column], 'sum' if function == 'count' and shared_values[column][2] == 'notna' else function)
+                        for output, (column, function) in aggregations.items()}
+        partitions = partitions or workers
+        bounds = np.linspace(0, len(data), min(workers, len(data)) + 1).astype(int)
+
+        with SharedColumns(arrays) as shared, ProcessPoolExecutor(max_workers=workers) as pool:
+            with stage('partition_rows', rows_in=len(data)):
+                tasks = [pool.submit(_partition_rows, shared.spec, key_names, coded, start, stop, partitions)
+                         for start, stop in zip(bounds[:-1], bounds[1:])]
+                for task in tasks:
+                    task.result()
+            with stage('aggregate_partitions', rows_in=len(data)):
+                tasks = [pool.submit(_aggregate_partition, shared.spec, key_names, values, aggregations, partition)
+                         for partition in range(partitions)]
+                results = [task.result() for task in tasks]
+
+        with stage('merge_partitions'):
+            result = pd.concat([part for part in results if len(part)] or results[:1])
+            codes = [result.index.get_level_values(i).to_numpy() for i in range(len(keys))]
+            order = np.lexsort(codes[::-1]) # sort by the first key, then the second one...
+            result = result.iloc[order]
+            index = [from_codes(level[order]) for level, from_codes in zip(codes, rebuild)]
+            if len(index) == 1:
+                result.index = index[0].rename(names[0])
+            else:
+                result.index = pd.MultiIndex.from_arrays(index, names=names)
+        record.rows_out = len(result)
+    return result
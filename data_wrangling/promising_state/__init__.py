@@ -0,0 +1,13 @@
+'''
+Export the Promising State task, one sales report file per state with a big market share
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'export_promising_state': '.export',
+    'market_share': '.state_partition',
+    'split_by_state': '.state_partition',
+    'stream_partitions': '.state_partition',
+    'write_partitions': '.state_partition',
+})
@@ -0,0 +1,80 @@
+from ..column_cache import load_dataset
+from ..instrumentation import instrument, stage
+from ..parallel import partitioned_groupby
+from ..quality import Normalize, RuleSet
+from .state_partition import (compression_extension, count_states_in_chunks, market_share,
+                              split_by_state, stream_partitions, write_partitions)
+
+'''
+Export the sales data of every promising state (market share >= threshold) of the
+Amazon sales report into one .csv file per state.
+'''
+
+STATE_RULES = RuleSet([Normalize('ship-state', lambda state: state.str.lower())])
+
+@instrument
+def export_promising_state(config_file, thresh, workers=4, compression=None, chunksize=None):
+  '''
+  export a promising state sales data based on its market share to a .csv files,
+  thus each state representatives can analyst the sales data further.
+
+  Parameters
+  ----------
+  config_file (dict) : contains the input and output path
+  thresh (float)     : contains the given market share threshold.
+  workers (int)      : number of thread writing the state files in parallel, and of
+                       process counting the orders of a large data per state
+  compression (str)  : None, 'gzip', 'bz2' or 'xz', the extension is added to the file name
+  chunksize (int)    : if given, stream the sales report chunk by chunk (out-of-core mode)
+                       for a file larger than the memory
+
+  Returns
+  --------
+  none
+  '''
+
+  if chunksize is None:
+    data = load_dataset('amazon_sales', config_file['path']['input'], index_col='index') # import data (columnar cache)
+
+    with stage('count_states', rows_in=len(data)):
+      data, _ = STATE_RULES.apply(data) # remove inconsistency value from 'ship-state' column
+
+      # count order of each state, a large data is counted over hash partitions of the states
+      order_count = partitioned_groupby(data, ['ship-state'], {'Order ID': ('Order ID', 'count')}, workers=workers)['Order ID']
+  else:
+    # first pass, count order of each state chunk by chunk
+    order_count = count_states_in_chunks(config_file['path']['input'], chunksize)
+
+  # define promising state by calculate each state market share and create alist contain
+  # promising state (state with market share above thresh value)
+  states_sales_data = market_share(order_count)
+  promising_state_data = states_sales_data[states_sales_data['market-share'] >= thresh].reset_index()
+  promising_state = list(promising_state_data['ship-state'])
+
+  if len(promising_state) == 0:
+    print('No promising state') # print message if no state had market share value above thresh
+    return
+
+  extension = compression_extension(compression)
+  def path_for(state): # designated file of each promising state
+    return (config_file['path']['output'] + state + '-sales-reports.csv' + extension).lower()
+
+  if chunksize is None:
+    # split the data by state in one pass, then export each promising state in parallel
+    partitions = split_by_state(data, promising_state, drop_columns=['Unnamed: 22'])
+    write_partitions(partitions, path_for, workers=workers, compression=compression)
+    shapes = {state: partitions[state].shape for state in promising_state}
+  else:
+    # second pass, route each chunk rows into its state file
+    shapes = stream_partitions(config_file['path']['input'], promising_state, path_for, chunksize,
+                               compression=compression, drop_columns=['Unnamed: 22'])
+
+  for state in promising_state:
+    # calculate each market share in percentage
+    state_market_share = (states_sales_data.loc[state]['market-share'])*100
+    state_market_share = round(state_market_share, 2)
+
+    # print message contain state data shape & state market share if file succesfully exported
+    print(f'Data of state "{state.lower()}" was successfully exported into "{path_for(state)}"')
+    print(f'  - State market share :  {state_market_share} %')
+    print(f'  - Data shape         :  {shapes[state]}\n')
@@ -0,0 +1,158 @@
+import bz2
+import gzip
+import lzma
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from ..instrumentation import instrument, stage
+from ..schemas import read_dataset
+
+'''
+Partitioning engine for exporting the sales data per state.
+- in-memory mode split the whole data by 'ship-state' with one groupby, then write
+  each state file in parallel with a thread pool.
+- out-of-core mode read the sales report chunk by chunk twice: the first pass count
+  the market share of each state, the second pass route the rows of each chunk into
+  the file of its state. Memory is bounded by the chunk size.
+'''
+
+# supported compression, its file extension and function to open a text file
+COMPRESSION = {
+    None: ('', open),
+    'gzip': ('.gz', gzip.open),
+    'bz2': ('.bz2', bz2.open),
+    'xz': ('.xz', lzma.open),
+}
+
+def compression_extension(compression):
+    if compression not in COMPRESSION:
+        raise ValueError(f'compression must be one of {list(COMPRESSION)}')
+    return COMPRESSION[compression][0]
+
+def market_share(order_count):
+    '''
+  Market share of each state
+
+  Parameters
+  ----------
+  order_count (series) :   number of order for each state
+
+  Returns
+  --------
+  states_sales_data :  dataframe with state as an index, 'Order ID' (order count)
+                       and 'market-share' column
+    '''
+
+    states_sales_data = order_count.sort_index().rename('Order ID').to_frame()
+    states_sales_data['market-share'] = states_sales_data['Order ID'] / states_sales_data['Order ID'].sum()
+    return states_sales_data
+
+def split_by_state(data, states, drop_columns=()):
+    '''
+  Split data into one dataframe per state with a single groupby
+
+  Parameters
+  ----------
+  data (dataframe)     :   sales data with lower case 'ship-state'
+  states (list)        :   states to keep
+  drop_columns (tuple) :   columns removed from every partition (if exist)
+
+  Returns
+  --------
+  partitions :  dict of state and its sales data
+    '''
+
+    with stage('split_by_state', rows_in=len(data)) as record:
+        data = data.drop(columns=[column for column in drop_columns if column in data.columns])
+        wanted = set(states)
+        partitions = {state: group for state, group in data.groupby('ship-state', sort=False) if state in wanted}
+        record.rows_out = sum(len(group) for group in partitions.values())
+    return partitions
+
+@instrument
+def write_partitions(partitions, path_for, workers=4, compression=None):
+    '''
+  Write every partition to its own .csv file using a thread pool
+
+  Parameters
+  ----------
+  partitions (dict)   :   state and its sales data
+  path_for (function) :   return the output path of a state
+  workers (int)       :   number of writer thread
+  compression (str)   :   None, 'gzip', 'bz2' or 'xz'
+    '''
+
+    compression_extension(compression) # validate compression
+
+    def write(state): # writer threads, each state write is a separate root stage
+        with stage(f'write_state[{state}]', rows_in=len(partitions[state])):
+            partitions[state].to_csv(path_for(state), index=False, compression=compression)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        list(executor.map(write, partitions)) # raise the first write error (if any)
+
+@instrument
+def count_states_in_chunks(input_path, chunksize):
+    '''
+  First out-of-core pass, count order of each state without loading the whole file
+
+  Parameters
+  ----------
+  input_path (str) :   path of the sales report
+  chunksize (int)  :   number of rows read at once
+
+  Returns
+  --------
+  order_count :  series of order count with lower case state as an index
+    '''
+
+    order_count = pd.Series(dtype='int64')
+    reader = read_dataset('amazon_sales', input_path, columns=['ship-state', 'Order ID'], chunksize=chunksize)
+    for chunk in reader:
+        chunk_count = chunk.groupby(chunk['ship-state'].str.lower())['Order ID'].count()
+        order_count = order_count.add(chunk_count, fill_value=0)
+    return order_count.astype('int64')
+
+def stream_partitions(input_path, states, path_for, chunksize, compression=None,
+                      drop_columns=(), index_col='index'):
+    '''
+  Second out-of-core pass, route rows of each chunk to the file of its state
+
+  Parameters
+  ----------
+  input_path (str)     :   path of the sales report
+  states (list)        :   states to export
+  path_for (function)  :   return the output path of a state
+  chunksize (int)      :   number of rows read at once
+  compression (str)    :   None, 'gzip', 'bz2' or 'xz'
+  drop_columns (tuple) :   columns removed from the exported data (if exist)
+
+  Returns
+  --------
+  shapes :  dict of state and the shape of its exported data
+    '''
+
+    compression_extension(compression) # validate compression
+    opener = COMPRESSION[compression][1]
+    writers, rows, n_columns = {}, dict.fromkeys(states, 0), None
+    with stage('stream_partitions') as record:
+        try:
+            for state in states:
+                writers[state] = opener(path_for(state), 'wt', newline='')
+
+            for chunk in read_dataset('amazon_sales', input_path, index_col=index_col, chunksize=chunksize):
+                with stage('route_chunk', rows_in=len(chunk)):
+                    chunk['ship-state'] = chunk['ship-state'].str.lower()
+                    chunk = chunk.drop(columns=[column for column in drop_columns if column in chunk.columns])
+                    n_columns = chunk.shape[1]
+                    for state, group in chunk.groupby('ship-state', sort=False):
+                        if state in writers:
+                            group.to_csv(writers[state], index=False, header=rows[state] == 0)
+                            rows[state] += len(group)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        record.rows_out = sum(rows.values())
+
+    return {state: (rows[state], n_columns or 0) for state in states}
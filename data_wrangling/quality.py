@@ -0,0 +1,293 @@
+import numpy as np
+import pandas as pd
+
+from .instrumentation import stage
+
+'''
+Declarative data quality rules of the cleaning steps, e.g.
+
+    rules = RuleSet([
+        Missing(['neighbourhood group', 'price']),
+        MapValues('neighbourhood group', {'brookln': 'Brooklyn'}),
+        Normalize('price', parse_price),
+        Outlier('price', quantile=0.75, factor=1.5, replace='median'),
+        Range('availability 365', 0, 365),
+        Duplicates(),
+    ])
+    data, report = rules.apply(data)
+
+The rules are applied in order, every rule sees the rows kept and the values normalized
+by the rules before it, like the chain of dropna / replace / drop / drop_duplicates it
+replaces. Instead of copying the data at every step the rules are fused:
+  - a filter rule (missing, range, outlier & duplicates) only clears the rows it rejects
+    in one boolean mask over the input rows
+  - a normalization (mapped values, normalize function & replaced outliers) is computed
+    once, for the rows still kept, and kept aside as one column
+  - at the end the rows of the mask are taken once and the normalized columns are written
+    into them in place (no row copy at all when every row is kept)
+The report gives the number of rows rejected and normalized by every rule, a row is
+counted by the first rule rejecting it.
+'''
+
+class _Rows:
+    '''
+  State of a rule set over the input rows: mask of the rows kept so far, and the values
+  of every normalized column (for the rows that were kept when it was normalized)
+    '''
+
+    def __init__(self, data):
+        self.data = data
+        self.keep = np.ones(len(data), dtype=bool)
+        self.normalized = {} # column -> (row positions, values of these rows)
+
+    def values(self, column):
+        '''
+  row positions (None is every row) and current values of a column, including rows
+  rejected since the column was normalized
+        '''
+
+        return self.normalized.get(column, (None, self.data[column]))
+
+    def kept_values(self, column):
+        '''
+  positions of the rows kept and current values of a column for these rows
+        '''
+
+        positions, values = self.values(column)
+        kept = self.keep if positions is None else self.keep[positions]
+        if kept.all():
+            return (np.arange(len(kept)) if positions is None else positions), values
+        return (np.flatnonzero(kept) if positions is None else positions[kept]), values[kept]
+
+    def normalize(self, column, positions, values):
+        self.normalized[column] = (positions, values)
+
+    def reject(self, positions, valid):
+        '''
+  clear the rows at positions (None is every row) which are not valid, returns the
+  number of rows rejected (rows already rejected are not counted again)
+        '''
+
+        valid = np.asarray(valid, dtype=bool)
+        if positions is None:
+            rejected = int(np.count_nonzero(self.keep & ~valid))
+            self.keep &= valid
+        else:
+            rejected_rows = positions[~valid & self.keep[positions]]
+            rejected = len(rejected_rows)
+            self.keep[rejected_rows] = False
+        return rejected
+
+class Missing:
+    '''
+  Reject the rows with a missing value
+
+  Parameters
+  ----------
+  columns (list) :   columns checked, default is all columns
+  name (str)     :   name of the rule in the report
+    '''
+
+    def __init__(self, columns=None, name=None):
+        self.columns = columns
+        self.name = name or ('missing ' + ', '.join(columns) if columns is not None else 'missing')
+
+    def apply(self, rows):
+        columns = rows.data.columns if self.columns is None else self.columns
+        rejected = 0
+        for column in columns:
+            positions, values = rows.values(column)
+            rejected += rows.reject(positions, values.notna())
+        return rejected, 0
+
+def replace_values(values, mapping):
+    '''
+  `values.replace(mapping)`, a categorical series gets the replacement values as new
+  categories when it does not have them yet
+    '''
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        new = [value for value in dict.fromkeys(mapping.values()) if value not in values.cat.categories]
+        if new:
+            values = values.cat.add_categories(new)
+    return values.replace(mapping)
+
+class MapValues:
+    '''
+  Replace values of a column, e.g. unconsistent spelling of a category
+
+  Parameters
+  ----------
+  column (str)   :   column name
+  mapping (dict) :   value and its replacement, like `Series.replace`
+  name (str)     :   name of the rule in the report
+    '''
+
+    def __init__(self, column, mapping, name=None):
+        self.column, self.mapping = column, mapping
+        self.name = name or f'map {column}'
+
+    def apply(self, rows):
+        positions, values = rows.kept_values(self.column)
+        normalized = int(values.isin(list(self.mapping)).sum())
+        rows.normalize(self.column, positions, replace_values(values, self.mapping))
+        return 0, normalized
+
+class Normalize:
+    '''
+  Normalize values of a column with a vectorized function, e.g. lower case or parse a
+  price text into number
+
+  Parameters
+  ----------
+  column (str)        :   column name
+  function (callable) :   function of the column values (series) returning the normalized
+                          values (same length)
+  name (str)          :   name of the rule in the report
+    '''
+
+    def __init__(self, column, function, name=None):
+        self.column, self.function = column, function
+        self.name = name or f'normalize {column}'
+
+    def apply(self, rows):
+        positions, values = rows.kept_values(self.column)
+        rows.normalize(self.column, positions, self.function(values))
+        return 0, len(values)
+
+class Range:
+    '''
+  Reject the rows whose value is outside [low, high] or missing
+
+  Parameters
+  ----------
+  column (str)   :   column name
+  low, high      :   range of the valid values (inclusive)
+  name (str)     :   name of the rule in the report
+    '''
+
+    def __init__(self, column, low, high, name=None):
+        self.column, self.low, self.high = column, low, high
+        self.name = name or f'range {column}'
+
+    def apply(self, rows):
+        positions, values = rows.values(self.column)
+        return rows.reject(positions, values.between(self.low, self.high)), 0
+
+class Outlier:
+    '''
+  Values above quantile * factor of the kept rows are outliers, they are replaced (e.g.
+  with the median) or their rows are rejected
+
+  Parameters
+  ----------
+  column (str)     :   column name
+  quantile (float) :   quantile of the upper limit
+  factor (float)   :   upper limit is the quantile value * factor
+  replace          :   'median', a replacement value or None to reject the rows
+  name (str)       :   name of the rule in the report
+    '''
+
+    def __init__(self, column, quantile=0.75, factor=1.5, replace='median', name=None):
+        self.column, self.quantile, self.factor, self.replace = column, quantile, factor, replace
+        self.name = name or f'outlier {column}'
+
+    def apply(self, rows):
+        positions, values = rows.kept_values(self.column)
+        outlier = (values > values.quantile(q=self.quantile) * self.factor).to_numpy()
+        if self.replace is None:
+            return rows.reject(positions, ~outlier), 0
+
+        replacement = values.median() if isinstance(self.replace, str) and self.replace == 'median' else self.replace
+        values = values.copy()
+        try:
+            values.loc[outlier] = replacement
+        except TypeError: # e.g. a fractional median of int values, the column is upcast
+            values = values.astype(np.result_type(values.dtype, np.asarray(replacement).dtype))
+            values.loc[outlier] = replacement
+        rows.normalize(self.column, positions, values)
+        return 0, int(outlier.sum())
+
+class Duplicates:
+    '''
+  Reject the repeated rows (the first one is kept), compared on the values normalized by
+  the rules before it, like `drop_duplicates` at this step
+
+  Parameters
+  ----------
+  columns (list) :   columns compared, default is all columns
+  name (str)     :   name of the rule in the report
+    '''
+
+    def __init__(self, columns=None, name=None):
+        self.columns = columns
+        self.name = name or 'duplicates'
+
+    def apply(self, rows):
+        columns = rows.data.columns if self.columns is None else self.columns
+        # every column is factorized into codes (missing values are equal, code 0) and the
+        # codes are combined into one group id per kept row, the ids are compressed before
+        # they overflow (if all of them are distinct then no row is repeated)
+        positions = np.flatnonzero(rows.keep)
+        group, size = np.zeros(len(positions), dtype=np.int64), 1
+        for column in columns:
+            stored, values = rows.values(column)
+            codes, uniques = pd.factorize(values)
+            codes = codes[positions] if stored is None else codes[np.searchsorted(stored, positions)]
+            if size * (len(uniques) + 1) >= 2 ** 63:
+                group, group_uniques = pd.factorize(group)
+                size = len(group_uniques)
+                if size == len(positions):
+                    return 0, 0
+            group = group * (len(uniques) + 1) + (codes + 1)
+            size *= len(uniques) + 1
+        return rows.reject(positions, ~pd.Index(group).duplicated(keep='first')), 0
+
+class RuleSet:
+    '''
+  Ordered data quality rules compiled into one row mask and one normalization pass
+
+  Parameters
+  ----------
+  rules (list) :   Missing, MapValues, Normalize, Range, Outlier and Duplicates rules,
+                   applied in order
+    '''
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    def apply(self, data):
+        '''
+  Apply the rules to a dataframe, the input is not modified
+
+  Parameters
+  ----------
+  data (dataframe) :   input rows
+
+  Returns
+  --------
+  data   :  dataframe with the rows kept (original index) and the normalized values
+  report :  dataframe with the number of rows `rejected` and `normalized` by every rule
+        '''
+
+        with stage('quality_rules', rows_in=len(data)) as record:
+            rows, report = _Rows(data), {}
+            for rule in self.rules:
+                rows_in = int(np.count_nonzero(rows.keep))
+                with stage(rule.name, rows_in=rows_in) as rule_record:
+                    report[rule.name] = rule.apply(rows)
+                    rule_record.rows_out = rows_in - report[rule.name][0]
+
+            # the only row copy, then the normalized columns are written in place
+            with stage('take_rows', rows_in=len(data)) as take_record:
+                keep = rows.keep
+                data = data.copy(deep=False) if keep.all() else data[keep]
+                for column, (positions, values) in rows.normalized.items():
+                    if positions is not None and len(positions) != len(data):
+                        values = values[keep[positions]]
+                    data[column] = values.array
+                take_record.rows_out = record.rows_out = len(data)
+
+        report = pd.DataFrame.from_dict(report, orient='index', columns=['rejected', 'normalized'])
+        report.index.name = 'rule'
+        return data, report
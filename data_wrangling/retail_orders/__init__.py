@@ -0,0 +1,15 @@
+'''
+Online Store Retail Orders task, cleaning & business questions report
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'load_data': '.retail_report',
+    'prepare_data': '.retail_report',
+    'build_report': '.retail_report',
+    'plot_report': '.retail_report',
+    'order_cube': '.retail_report',
+    'LoyalCustomerTracker': '.loyal_tracker',
+    'ProductDimension': '.product_dimension',
+})
@@ -0,0 +1,181 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .retail_report import STATUS_MAP, STATUS_RANK, status_proportion
+
+'''
+Incremental detector of the active loyal customers.
+The tracker keep, for every month of a rolling window, the order count and the highest
+status of each customer, plus the running order count of the whole window.
+- `add_orders` aggregate the new orders first, thus an update cost O(new orders).
+- a month older than the window is expired when a newer month arrives, its counts are
+  subtracted from the running total.
+- `loyal_customers` answer "more than K orders in the latest M months" on demand.
+- `save` / `load` persist the tracker as a .npz file of plain arrays (no pickle).
+'''
+
+TRACKER_VERSION = 1 # bump when the saved arrays change
+
+class LoyalCustomerTracker:
+    '''
+  Rolling window of customer order counts
+
+  The saved file (.npz) keeps the version, the window and the latest period (-1 before
+  the first order) and one row per month & customer of the window, the running total is
+  summed again on load:
+
+    version, window_months, latest_period :  int
+    period, customer, orders, rank         :  arrays (int64, customer ID, int64, int8)
+
+  Parameters
+  ----------
+  window_months (int) :   number of latest months kept, queries can use up to this window
+    '''
+
+    def __init__(self, window_months=3):
+        self.window_months = window_months
+        self.months = {} # period -> {customer ID: [order count, highest status rank]}
+        self.total = {} # customer ID -> order count in the whole window
+        self.latest_period = None
+
+    def add_orders(self, customer_id, customer_status, order_date):
+        '''
+  Add a batch of new orders
+
+  Parameters
+  ----------
+  customer_id (array)     :   customer ID of each order
+  customer_status (array) :   customer status of each order
+  order_date (array)      :   datetime of each order
+
+  Returns
+  --------
+  expired :  list of expired period (year * 12 + month - 1)
+        '''
+
+        order_date = pd.to_datetime(pd.Series(order_date)).reset_index(drop=True)
+        batch = pd.DataFrame({
+            'Customer ID': pd.Series(customer_id).reset_index(drop=True),
+            'Status Rank': pd.Series(customer_status).reset_index(drop=True).replace(STATUS_MAP).map(STATUS_RANK),
+            'Period': order_date.dt.year * 12 + order_date.dt.month - 1,
+        }).dropna(subset=['Customer ID', 'Period'])
+        if len(batch) == 0:
+            return []
+
+        # move the window forward first, thus late orders of an expired month are ignored
+        expired = self._advance(int(batch['Period'].max()))
+        batch = batch[batch['Period'] > self.latest_period - self.window_months]
+
+        grouped = batch.groupby(['Period', 'Customer ID'])['Status Rank'].agg(['size', 'max'])
+        for (period, customer), orders, rank in zip(grouped.index, grouped['size'], grouped['max']):
+            month = self.months.setdefault(int(period), {})
+            counts = month.setdefault(customer, [0, 0])
+            counts[0] += int(orders)
+            if pd.notna(rank) and rank > counts[1]: # rank is NaN for an unknown status
+                counts[1] = int(rank)
+            self.total[customer] = self.total.get(customer, 0) + int(orders)
+        return expired
+
+    def _advance(self, period):
+        if self.latest_period is not None and period <= self.latest_period:
+            return []
+        self.latest_period = period
+
+        expired = [month for month in self.months if month <= period - self.window_months]
+        for month in expired:
+            for customer, (orders, _) in self.months.pop(month).items():
+                remaining = self.total[customer] - orders
+                if remaining > 0:
+                    self.total[customer] = remaining
+                else:
+                    del self.total[customer]
+        return expired
+
+    def loyal_customers(self, min_orders=3, months=None):
+        '''
+  Active loyal customers: more than min_orders orders in the latest months
+
+  Parameters
+  ----------
+  min_orders (int) :   customer must order more than this number of times
+  months (int)     :   number of latest months, default is the whole window
+
+  Returns
+  --------
+  loyal, proportion :  dataframe of loyal Customer ID with its highest Customer Status,
+                       and proportion of the status ('Customer ID' count and percentage)
+        '''
+
+        months = self.window_months if months is None else months
+        if months > self.window_months:
+            raise ValueError(f'the tracker only keeps the latest {self.window_months} months')
+
+        periods = [] if self.latest_period is None else \
+            [month for month in self.months if month > self.latest_period - months]
+        if months == self.window_months:
+            counts = self.total
+        else:
+            counts = {}
+            for month in periods:
+                for customer, (orders, _) in self.months[month].items():
+                    counts[customer] = counts.get(customer, 0) + orders
+
+        rank_status = {rank: status for status, rank in STATUS_RANK.items()}
+        loyal = []
+        for customer, orders in counts.items():
+            if orders > min_orders:
+                rank = max(self.months[month].get(customer, (0, 0))[1] for month in periods)
+                loyal.append((customer, rank_status.get(rank)))
+        loyal = pd.DataFrame(loyal, columns=['Customer ID', 'Customer Status'])
+        loyal = loyal.sort_values('Customer ID', ignore_index=True)
+        return loyal, status_proportion(loyal)
+
+    def save(self, path):
+        '''
+  Save the tracker into a .npz file, see the class docstring for its arrays
+
+  Parameters
+  ----------
+  path (str) :   path of the .npz file, written through a temporary file
+        '''
+
+        rows = [(period, customer, orders, rank) for period, month in self.months.items()
+                for customer, (orders, rank) in month.items()]
+        period, customer, orders, rank = zip(*rows) if rows else ((), (), (), ())
+        customer = np.asarray(customer)
+        if customer.dtype == object: # would be pickled
+            raise ValueError('only numeric or text customer IDs of one type can be saved')
+        with open(path + '.tmp', 'wb') as file:
+            np.savez(file, version=TRACKER_VERSION, window_months=self.window_months,
+                     latest_period=-1 if self.latest_period is None else self.latest_period,
+                     period=np.asarray(period, dtype=np.int64), customer=customer,
+                     orders=np.asarray(orders, dtype=np.int64), rank=np.asarray(rank, dtype=np.int8))
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path):
+        '''
+  Load a tracker saved by `save`
+
+  Parameters
+  ----------
+  path (str) :   path of the .npz file
+
+  Returns
+  --------
+  tracker :  LoyalCustomerTracker
+        '''
+
+        with np.load(path, allow_pickle=False) as stored:
+            if int(stored['version']) != TRACKER_VERSION:
+                raise ValueError(f'{path} is not a version {TRACKER_VERSION} loyal customer tracker')
+            tracker = cls(int(stored['window_months']))
+            latest_period = int(stored['latest_period'])
+            tracker.latest_period = None if latest_period < 0 else latest_period
+            for period, customer, orders, rank in zip(stored['period'].tolist(), stored['customer'].tolist(),
+                                                      stored['orders'].tolist(), stored['rank'].tolist()):
+                tracker.months.setdefault(period, {})[customer] = [orders, rank]
+                tracker.total[customer] = tracker.total.get(customer, 0) + orders
+        return tracker
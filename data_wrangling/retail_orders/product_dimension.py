@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+'''
+Dictionary-encoded product dimension.
+Every 12-digit `Product ID` is mapped once into a dense integer code, and every product
+attribute (Product Name, Supplier Name, ...) is stored as a categorical. An order only
+needs its product code, the attributes are attached with a positional take of the small
+categorical codes, thus the long strings are never copied into every order row.
+'''
+
+class ProductDimension:
+    '''
+  Product supplier data encoded as a dimension table
+
+  Parameters
+  ----------
+  data_product (dataframe) :   product supplier data, one row per Product ID. a repeated
+                               Product ID raise ValueError, a merge would repeat its orders
+                               but a product code can only point to one row
+    '''
+
+    def __init__(self, data_product):
+        repeated = data_product['Product ID'][data_product['Product ID'].duplicated()].unique()
+        if len(repeated):
+            raise ValueError(f'Product ID must be unique, {len(repeated)} repeated e.g. {list(repeated[:5])}')
+        data_product = data_product.sort_values('Product ID', kind='stable')
+
+        self.product_ids = data_product['Product ID'].to_numpy() # sorted, position is the product code
+        self.attributes = {column: data_product[column].astype('category').array
+                           for column in data_product.columns if column != 'Product ID'}
+
+    def __len__(self):
+        return len(self.product_ids)
+
+    @property
+    def columns(self):
+        return list(self.attributes)
+
+    def encode(self, product_id):
+        '''
+  dense product code of every Product ID, -1 for an unknown or missing product
+        '''
+
+        product_id = pd.Series(product_id, copy=False)
+        code = np.full(len(product_id), -1, dtype=np.int32)
+        known = product_id.notna().to_numpy()
+        if len(self.product_ids) == 0 or not known.any():
+            return code
+        product_id = product_id[known].to_numpy()
+        position = np.searchsorted(self.product_ids, product_id)
+        position = np.minimum(position, len(self.product_ids) - 1)
+        code[known] = np.where(self.product_ids[position] == product_id, position, -1)
+        return code
+
+    def attribute(self, column, code):
+        '''
+  attribute value of the product codes as categorical (positional take)
+        '''
+
+        return self.attributes[column].take(code)
+
+    def join(self, data_orders, columns=None, code_column='Product Code'):
+        '''
+  Inner join orders with the product dimension
+
+  Parameters
+  ----------
+  data_orders (dataframe) :   orders data with Product ID column
+  columns (list)          :   product attributes to attach, default is all attributes.
+                              an empty list only attach the product code, thus the
+                              attributes can be taken later with `attribute`
+  code_column (str)       :   name of the product code column
+
+  Returns
+  --------
+  data :  orders of known products with the product code and categorical attributes
+        '''
+
+        code = self.encode(data_orders['Product ID'])
+        known = code >= 0
+        data = data_orders[known].copy() if not known.all() else data_orders.copy()
+        code = code[known]
+
+        data[code_column] = code
+        for column in (self.columns if columns is None else columns):
+            data[column] = self.attribute(column, code)
+        return data
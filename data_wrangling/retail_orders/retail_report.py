@@ -0,0 +1,280 @@
+import numpy as np
+import pandas as pd
+
+from ..column_cache import load_dataset
+from ..instrumentation import instrument, stage
+from ..parallel import partitioned_groupby
+from ..quality import Duplicates, MapValues, Missing, RuleSet
+from ..sales_cube import SalesCube
+from .product_dimension import ProductDimension
+
+'''
+Headless report engine of the Online Store Retail Orders case.
+`prepare_data` build the cleaned order x product frame once, `build_report` answer all
+six business questions from a few shared aggregates and return them as data, the
+aggregations of a large data run on a process pool (data_wrangling.parallel).
+Plotting is optional (`plot_report`), seaborn & matplotlib are only imported there.
+'''
+
+STATUS_MAP = {
+    'SILVER' : 'Silver',
+    'GOLD' : 'Gold',
+    'PLATINUM' : 'Platinum'
+}
+CLEANING_RULES = RuleSet([
+    MapValues('Customer Status', STATUS_MAP),
+    Missing(),
+    Duplicates(),
+])
+STATUS_RANK = {
+    'Silver' : 1,
+    'Gold' : 2,
+    'Platinum' : 3
+}
+
+@instrument
+def prepare_data(data_orders, data_product, product_columns=None):
+    '''
+  Clean and combine orders with product supplier data
+
+  Parameters
+  ----------
+  data_orders (dataframe)  :   orders data
+  data_product (dataframe) :   product supplier data, or an already built ProductDimension
+  product_columns (list)   :   product attributes attached to the orders, default is all
+
+  Returns
+  --------
+  data :  combined data with datetime order & delivery date, Period (year * 12 + month - 1),
+          Month, Year, Unit Price, Profit and Profit Percentage column
+    '''
+
+    # convert column Date Order was placed and Delivery Date into datetime64
+    data_orders = data_orders.assign(**{
+        'Date Order was placed': pd.to_datetime(data_orders['Date Order was placed'], dayfirst=True),
+        'Delivery Date': pd.to_datetime(data_orders['Delivery Date'], dayfirst=True),
+    })
+
+    # combine data based on Product ID, product attributes are attached as categorical
+    # through a dense product code instead of copying the strings into every order
+    with stage('join_products', rows_in=len(data_orders)):
+        if not isinstance(data_product, ProductDimension):
+            data_product = ProductDimension(data_product)
+        data = data_product.join(data_orders, columns=product_columns)
+
+    # remove inconsistency from column Customer Status, then drop missing value & duplicates
+    # (one row mask, the kept rows are copied once)
+    data, _ = CLEANING_RULES.apply(data)
+
+    # integer month key, Month and Year for help data selection
+    order_date = data['Date Order was placed']
+    data['Month'] = order_date.dt.month
+    data['Year'] = order_date.dt.year
+    data['Period'] = data['Year'] * 12 + data['Month'] - 1
+
+    # unit price, profit per unit and profit percentage
+    data['Unit Price'] = data['Total Retail Price for This Order'] / data['Quantity Ordered']
+    data['Profit'] = data['Unit Price'] - data['Cost Price Per Unit']
+    data['Profit Percentage'] = data['Profit'] / data['Cost Price Per Unit']*100
+    return data
+
+def load_data(orders_path, product_path, product_columns=('Product Category',)):
+    '''
+  Load orders & product supplier data with the declared compact dtypes (memory-mapped
+  columnar cache) and prepare them, only Product Category is needed by the report
+
+  Parameters
+  ----------
+  orders_path (str)      :   path of orders.csv
+  product_path (str)     :   path of product_supplier.csv
+  product_columns (list) :   product supplier columns attached to the orders
+
+  Returns
+  --------
+  data :  output of prepare_data
+    '''
+
+    data_orders = load_dataset('orders', orders_path)
+    data_product = load_dataset('product_supplier', product_path)
+    return prepare_data(data_orders, data_product, product_columns=list(product_columns))
+
+def status_proportion(loyal):
+    '''
+  proportion of Customer Status among the loyal customers
+    '''
+
+    proportion = loyal.groupby('Customer Status')['Customer ID'].nunique().reset_index()
+    proportion['percentage'] = (proportion['Customer ID'] / proportion['Customer ID'].sum()) * 100
+    return proportion
+
+def loyal_customers(customer_id, customer_status, min_orders=3, workers=None):
+    '''
+  Active loyal customers from the orders of the latest months
+
+  Parameters
+  ----------
+  customer_id (series)     :   customer ID of every order in the window
+  customer_status (series) :   customer status of every order in the window
+  min_orders (int)         :   customer must order more than this number of times
+  workers (int)            :   number of process of the partitioned groupby (large data only)
+
+  Returns
+  --------
+  loyal, proportion :  dataframe of loyal Customer ID with its highest Customer Status,
+                       and proportion of the status ('Customer ID' count and percentage)
+    '''
+
+    window = pd.DataFrame({'Customer ID': customer_id.values,
+                           'Status Rank': customer_status.map(STATUS_RANK).values})
+    per_customer = partitioned_groupby(window, ['Customer ID'], {'size': ('Status Rank', 'size'), 'max': ('Status Rank', 'max')},
+                                       workers=workers)
+    per_customer = per_customer[per_customer['size'] > min_orders]
+
+    rank_status = {rank: status for status, rank in STATUS_RANK.items()}
+    loyal = pd.DataFrame({'Customer ID': per_customer.index,
+                          'Customer Status': per_customer['max'].map(rank_status).values})
+
+    return loyal, status_proportion(loyal)
+
+@instrument
+def build_report(data, latest_months=3, min_orders=3, workers=None):
+    '''
+  Answer the six business questions from the prepared data
+
+  Parameters
+  ----------
+  data (dataframe)    :   output of prepare_data
+  latest_months (int) :   window of the active loyal customer
+  min_orders (int)    :   loyal customer must order more than this number of times
+  workers (int)       :   number of process of the groupby aggregations, a large data is
+                          aggregated over hash partitions of the group keys (default is
+                          the number of cpu)
+
+  Returns
+  --------
+  report :  dict of
+            - 'profit_percentage'  : mean profit percentage of each product category
+            - 'profit_mom'         : total profit of every Year & Month
+            - 'correlation'        : correlation of cost vs profit and unit price vs quantity
+            - 'top_products'       : top 3 product category by quantity in the latest year
+            - 'delivery_length'    : median & longest order-to-delivery length per month of the latest year
+            - 'loyal_customers'    : unique Customer ID of active loyal customers
+            - 'loyal_proportion'   : proportion of the loyal customer status
+    '''
+
+    latest_year = data['Year'].max()
+    latest_period = data['Period'].max()
+
+    # shared aggregate, one groupby per (Period, Product Category)
+    by_period_category = partitioned_groupby(data, ['Period', 'Product Category'], {
+        'profit': ('Profit', 'sum'),
+        'quantity': ('Quantity Ordered', 'sum'),
+        'profit_pct_sum': ('Profit Percentage', 'sum'),
+        'orders': ('Profit Percentage', 'count')}, workers=workers)
+
+    # 1. mean profit percentage of each product category
+    by_category = by_period_category.groupby(level='Product Category').sum()
+    profit_percentage = (by_category['profit_pct_sum'] / by_category['orders']).rename('Profit Percentage')
+    profit_percentage = profit_percentage.sort_values(ascending=False).to_frame()
+
+    # 2. total profit month over month
+    profit_mom = by_period_category['profit'].groupby(level='Period').sum()
+    profit_mom = pd.DataFrame({'Year': profit_mom.index // 12, 'Month': profit_mom.index % 12 + 1,
+                               'Profit': profit_mom.values})
+
+    # 3. does lower cost give higher profit, does cheaper price sell more
+    correlation = pd.Series({
+        'cost_vs_profit': data['Cost Price Per Unit'].corr(data['Profit']),
+        'unit_price_vs_quantity': data['Unit Price'].corr(data['Quantity Ordered']),
+    })
+
+    # 4. top 3 product category with most quantity ordered in the latest year
+    periods = by_period_category.index.get_level_values('Period')
+    quantity_latest = by_period_category.loc[periods // 12 == latest_year, 'quantity']
+    top_products = quantity_latest.groupby(level='Product Category').sum().nlargest(3).rename('Quantity Ordered').to_frame()
+
+    # 5. order-to-delivery length of every month in the latest year
+    latest = data['Year'].values == latest_year
+    length = (data['Delivery Date'] - data['Date Order was placed'])[latest]
+    delivery_length = partitioned_groupby(length.to_frame('length'), [data['Month'][latest].values],
+                                          {'median': ('length', 'median'), 'max': ('length', 'max')}, workers=workers)
+    delivery_length.index = [f'{month:02d}' for month in delivery_length.index]
+    delivery_length.index.name = 'Month'
+    delivery_length.columns = ['order_to_delivery_length', 'the_longest_order_to_delivery_length']
+
+    # 6. active loyal customer, order more than min_orders times in the latest months
+    in_window = data['Period'].values > latest_period - latest_months
+    loyal, proportion = loyal_customers(data['Customer ID'][in_window], data['Customer Status'][in_window], min_orders, workers)
+
+    return {
+        'profit_percentage': profit_percentage,
+        'profit_mom': profit_mom,
+        'correlation': correlation,
+        'top_products': top_products,
+        'delivery_length': delivery_length,
+        'loyal_customers': loyal[['Customer ID']],
+        'loyal_proportion': proportion,
+    }
+
+def order_cube(data, dimensions=('Product Category',), workers=None):
+    '''
+  Profit & quantity cube of the prepared orders, day to year periods crossed with the
+  dimensions, for the variants of the month over month profit (e.g. quarter over
+  quarter profit of every product category)
+
+  Parameters
+  ----------
+  data (dataframe)  :   output of prepare_data
+  dimensions (list) :   columns of the breakdowns, e.g. 'Product Category', 'Customer Status'
+  workers (int)     :   number of process of the cube groupby
+
+  Returns
+  --------
+  cube :  SalesCube, e.g. `cube.period_over_period('Profit', 'quarter', by=['Product Category'])`
+    '''
+
+    return SalesCube(data, 'Date Order was placed', ['Profit', 'Quantity Ordered'], dimensions, workers=workers)
+
+def plot_report(report, data=None):
+    '''
+  Plot the report figures, seaborn & matplotlib are only needed here
+
+  Parameters
+  ----------
+  report (dict)    :   output of build_report
+  data (dataframe) :   prepared data, needed for the correlation scatter plots (optional)
+    '''
+
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # top 5 product category with biggest profit percentage
+    plt.figure(figsize=(8,4))
+    top_profit = report['profit_percentage'].head(5).reset_index()
+    sns.barplot(data=top_profit, x='Product Category', y='Profit Percentage', hue='Product Category')
+    plt.yticks(list(range(0, 201, 25)))
+    plt.show()
+
+    # profit obtained month over month of every year
+    plt.figure(figsize=(6,4))
+    sns.lineplot(data=report['profit_mom'], x='Month', y='Profit', hue='Year')
+    plt.xlabel('Month')
+    plt.ylabel('profit')
+    plt.show()
+
+    # correlation between cost and profit, unit price and unit ordered
+    if data is not None:
+        fig, ax = plt.subplots(nrows = 1, ncols = 2, figsize=(8,4))
+        sns.scatterplot(data=data, x='Cost Price Per Unit', y='Profit', ax=ax[0])
+        sns.scatterplot(data=data, x='Unit Price', y='Quantity Ordered', ax=ax[1])
+        plt.show()
+
+    # top 3 product category with most quantity ordered
+    top_products = report['top_products'].reset_index()
+    sns.barplot(data=top_products, x='Product Category', y='Quantity Ordered', hue='Product Category')
+    plt.show()
+
+    # proportion of active loyal customer status
+    proportion = report['loyal_proportion'].sort_values(by=['Customer ID'], ascending=False)
+    sns.barplot(data=proportion, x='Customer Status', y='percentage', hue='Customer Status')
+    plt.show()
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+
+from .instrumentation import instrument, stage
+from .parallel import partitioned_groupby
+
+'''
+Precomputed multi-granularity sales cube of the period-over-period questions
+(month-over-month sales, quarter-over-quarter profit of a category, week-over-week...).
+The order rows are scanned once: they are grouped by day (integer day number) and the
+selected dimensions (e.g. Category, Region) into the day cells, then the week, month,
+quarter and year cells are rolled up from the day cells (a few thousand rows, not the
+orders). A cell keeps an int32 period key, the dimension values as categorical and the
+sum of every measure, plus the number of orders.
+A query is answered from the cells of its level: the dimensions that are not asked for
+are summed out (memoized per level & dimensions) and the percentage change is computed
+over the period matrix, the raw rows are never read again.
+Period keys are integers, labels are formatted only for the rows of a query result:
+  - day     : days since 1970-01-01, 'YYYY-MM-DD'
+  - week    : Monday-based weeks since 1969-12-29, ISO week 'YYYY-Www'
+  - month   : year * 12 + month - 1, 'YYYY-MM'
+  - quarter : year * 4 + quarter - 1, 'YYYY-Qn'
+  - year    : year, 'YYYY'
+The totals are summed per day then per period, they can differ from a direct groupby of
+the orders in the last digits of the float sums.
+'''
+
+LEVELS = ('day', 'week', 'month', 'quarter', 'year')
+
+def level_key(days, level):
+    '''
+  integer period key of a level from day numbers (days since 1970-01-01)
+    '''
+
+    days = np.asarray(days, dtype='int64')
+    if level == 'day':
+        return days
+    if level == 'week':
+        return (days + 3) // 7 # 1970-01-01 is a Thursday, the weeks start on Monday
+    month = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64') + 1970 * 12
+    if level == 'month':
+        return month
+    if level == 'quarter':
+        return month // 3
+    if level == 'year':
+        return month // 12
+    raise ValueError(f'unknown level {level!r}, expected one of {LEVELS}')
+
+def level_label(keys, level):
+    '''
+  labels of integer period keys of a level
+    '''
+
+    keys = np.asarray(keys, dtype='int64')
+    if level == 'day':
+        return list(np.datetime_as_string(keys.astype('datetime64[D]')))
+    if level == 'week':
+        week = pd.DatetimeIndex((keys * 7 - 3).astype('datetime64[D]')).isocalendar() # Monday of the week
+        return [f'{year:04d}-W{number:02d}' for year, number in zip(week['year'], week['week'])]
+    if level == 'month':
+        return [f'{year:04d}-{month:02d}' for year, month in zip(keys // 12, keys % 12 + 1)]
+    if level == 'quarter':
+        return [f'{year:04d}-Q{quarter}' for year, quarter in zip(keys // 4, keys % 4 + 1)]
+    if level == 'year':
+        return [f'{year:04d}' for year in keys]
+    raise ValueError(f'unknown level {level!r}, expected one of {LEVELS}')
+
+def day_number(dates):
+    '''
+  days since 1970-01-01 of a datetime series (without missing value)
+    '''
+
+    return dates.to_numpy().astype('datetime64[D]').astype('int64')
+
+class SalesCube:
+    '''
+  Rollup cube of order measures, day -> week -> month -> quarter -> year crossed with
+  the dimensions
+
+  Parameters
+  ----------
+  data (dataframe)    :   order rows
+  date (str)          :   datetime column of the orders, e.g. 'Order Date'
+  measures (list)     :   columns summed, e.g. ['Sales', 'Profit']
+  dimensions (list)   :   columns the measures can be broken down by, e.g. ['Category', 'Region']
+  workers (int)       :   number of process of the day cells groupby (large data only),
+                          default is the number of cpu
+    '''
+
+    @instrument('sales_cube_build')
+    def __init__(self, data, date, measures, dimensions=(), workers=None):
+        self.date, self.measures, self.dimensions = date, list(measures), list(dimensions)
+        self.cells = {}
+        self._rollups = {} # (level, dimensions) -> measures summed over the other dimensions
+
+        # the only pass over the orders, one groupby per (day, dimensions)
+        with stage('day_cells', rows_in=len(data)) as record:
+            dates = data[date]
+            if dates.isna().any(): # an order without date is not in any period
+                data, dates = data[dates.notna()], dates[dates.notna()]
+            aggregations = {measure: (measure, 'sum') for measure in self.measures}
+            aggregations['orders'] = (self.measures[0], 'size')
+            cells = partitioned_groupby(data, [day_number(dates)] + [data[dimension] for dimension in self.dimensions],
+                                        aggregations, workers=workers)
+            self.cells['day'] = self._compact(cells.index.get_level_values(0), cells)
+            record.rows_out = len(cells)
+
+        # every coarser level is rolled up from the day cells
+        with stage('rollup_levels', rows_in=len(self.cells['day'])):
+            day = self.cells['day']
+            for level in LEVELS[1:]:
+                key = level_key(day['period'], level)
+                cells = day.groupby([key] + self.dimensions, observed=True, sort=True)[self.measures + ['orders']].sum()
+                self.cells[level] = self._compact(cells.index.get_level_values(0), cells)
+
+    def _compact(self, period, cells):
+        '''
+  cells with int32 period key, categorical dimensions and float64 measures
+        '''
+
+        compact = {'period': np.asarray(period, dtype='int32')}
+        for i, dimension in enumerate(self.dimensions, start=1):
+            values = cells.index.get_level_values(i)
+            compact[dimension] = values if isinstance(values.dtype, pd.CategoricalDtype) else pd.Categorical(values)
+        for measure in self.measures:
+            compact[measure] = cells[measure].to_numpy(dtype='float64', na_value=np.nan)
+        compact['orders'] = cells['orders'].to_numpy(dtype='int64')
+        return pd.DataFrame(compact)
+
+    def rollup(self, level='month', by=()):
+        '''
+  Measures of every period of a level, broken down by some of the dimensions
+
+  Parameters
+  ----------
+  level (str) :   'day', 'week', 'month', 'quarter' or 'year'
+  by (list)   :   dimensions kept, the others are summed out
+
+  Returns
+  --------
+  rollup :  dataframe of the measures & number of orders, indexed by the dimensions
+            and the integer period key (sorted)
+        '''
+
+        by = tuple(by)
+        if level not in self.cells:
+            raise ValueError(f'unknown level {level!r}, expected one of {LEVELS}')
+        unknown = set(by) - set(self.dimensions)
+        if unknown:
+            raise ValueError(f'{sorted(unknown)} are not dimensions of the cube {self.dimensions}')
+        if (level, by) not in self._rollups:
+            self._rollups[level, by] = self.cells[level].groupby(list(by) + ['period'], observed=True, sort=True)[self.measures + ['orders']].sum()
+        return self._rollups[level, by]
+
+    def period_over_period(self, measure, level='month', by=(), periods=1):
+        '''
+  Period-over-period percentage change of a measure, answered from the cube
+
+  Parameters
+  ----------
+  measure (str) :   measure of the cube, e.g. 'Sales'
+  level (str)   :   'day', 'week', 'month', 'quarter' or 'year'
+  by (list)     :   dimensions of the breakdown, e.g. ['Category']
+  periods (int) :   compared with the period this many periods before (e.g. 4 for the
+                    same quarter of the previous year), at least 1
+
+  Returns
+  --------
+  report :  dataframe of the dimensions, the period label (in the date column), the measure
+            and its percentage change (rounded to 2 decimal), sorted by dimensions & period.
+            Every period between the first and the last one of the cube is listed, a period
+            without order has 0, the change is missing for the first `periods` periods
+        '''
+
+        if periods < 1:
+            raise ValueError(f'periods must be at least 1, got {periods!r}')
+        by = list(by)
+        rollup = self.rollup(level, by)[measure]
+        periods_all = self.cells[level]['period']
+        full = np.arange(periods_all.min(), periods_all.max() + 1) if len(periods_all) else np.empty(0, dtype='int64')
+
+        # one row per dimension values, one column per period
+        if by:
+            matrix = rollup.unstack('period').reindex(columns=full).fillna(0)
+            groups, values = matrix.index, matrix.to_numpy()
+        else:
+            groups, values = None, rollup.reindex(full, fill_value=0).to_numpy()[np.newaxis, :]
+
+        previous = np.full_like(values, np.nan)
+        if periods < values.shape[1]:
+            previous[:, periods:] = values[:, :-periods]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = np.round((values / previous - 1) * 100, 2)
+
+        report = {}
+        for dimension in by:
+            report[dimension] = (groups.get_level_values(dimension) if isinstance(groups, pd.MultiIndex) else groups).repeat(len(full))
+        report[self.date] = np.tile(np.asarray(level_label(full, level), dtype=object), values.shape[0])
+        report[measure] = values.ravel()
+        report[f'{measure} Change'] = change.ravel()
+        return pd.DataFrame(report)
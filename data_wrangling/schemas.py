@@ -0,0 +1,220 @@
+import pandas as pd
+
+from .instrumentation import stage
+
+'''
+Declared schema of every input dataset.
+Each dataset pins a compact dtype for its columns:
+- id & count columns are int32 (int64 only when the value does not fit, e.g. 12-digit Product ID),
+  a nullable Int32 is used when the raw data has missing value to clean
+- measurement, rating & money columns stay float64: float32 rounding would show in the reports
+  and break the comparisons with a user value (e.g. float32(25.8) < 25.8), float32 is kept only
+  for values it holds exactly (half-star movie ratings, postal codes)
+- repeated strings (state, status, genres, branch, ...) are categorical
+Date columns are declared as datetime64 and parsed by the csv reader itself, with the declared
+`date_format` when there is one (a file that does not follow it keep the column as string).
+A task reads only the columns it needs with `read_dataset(name, path, columns=[...])`,
+the dtypes of the other columns are ignored.
+'''
+
+DATASETS = {
+    # Get Unwatched Movie
+    'ratings': {
+        'dtype': {'userId': 'int32', 'movieId': 'int32', 'rating': 'float32', 'timestamp': 'int64'},
+    },
+    'movies': {
+        'dtype': {'movieId': 'int32', 'genres': 'category'},
+    },
+
+    # Get the House Recommendation
+    'travelio': {
+        'dtype': {
+            'property_type': 'category',
+            'apartment_name': 'category',
+            'area': 'category',
+            'region': 'category',
+            'city': 'category',
+            'bedrooms': 'category', # contains 'Studio'
+            'bathrooms': 'int8',
+            'size': 'float64',
+            'is_furnished': 'category',
+            'capacity': 'int16',
+            'rating': 'float64',
+            'yearly_price': 'int64',
+            'property_management_type': 'category',
+        },
+    },
+
+    # Export the Promising State
+    'amazon_sales': {
+        'dtype': {
+            'Status': 'category',
+            'Fulfilment': 'category',
+            'Sales Channel': 'category',
+            'ship-service-level': 'category',
+            'Category': 'category',
+            'Size': 'category',
+            'Courier Status': 'category',
+            'Qty': 'int32',
+            'currency': 'category',
+            'Amount': 'float64',
+            'ship-city': 'category',
+            'ship-state': 'category',
+            'ship-postal-code': 'float32',
+            'ship-country': 'category',
+            'fulfilled-by': 'category',
+        },
+    },
+
+    # Merge Transactions Data, branch files are read by branch_loader (.csv & .xlsx)
+    'branch': {
+        'dtype': {
+            'Invoice ID': 'string',
+            'Branch': 'category',
+            'City': 'category',
+            'Customer type': 'category',
+            'Gender': 'category',
+            'Product line': 'category',
+            'Unit price': 'float64',
+            'Quantity': 'Int32',
+            'Tax 5%': 'float64',
+            'Total': 'float64',
+            'Date': 'datetime64[ns]',
+            'Time': 'string',
+            'Payment': 'category',
+            'cogs': 'float64',
+            'gross margin percentage': 'float64',
+            'gross income': 'float64',
+            'Rating': 'float64',
+        },
+        'date_format': '%m/%d/%Y',
+        'options': {'sep': ';'},
+    },
+
+    # Clean AirBnB data
+    'airbnb': {
+        'dtype': {
+            'host_identity_verified': 'category',
+            'neighbourhood group': 'category',
+            'neighbourhood': 'category',
+            'country': 'category',
+            'country code': 'category',
+            'instant_bookable': 'category',
+            'cancellation_policy': 'category',
+            'room type': 'category',
+            'Construction year': 'float64',
+            'minimum nights': 'float64',
+            'number of reviews': 'float64',
+            'reviews per month': 'float64',
+            'review rate number': 'float64',
+            'calculated host listings count': 'float64',
+            'availability 365': 'float64',
+        },
+    },
+
+    # Month-Over-Month Percentage Change in Sales
+    'superstore': {
+        'dtype': {
+            'Ship Mode': 'category',
+            'Segment': 'category',
+            'Market': 'category',
+            'Region': 'category',
+            'Category': 'category',
+            'Sub-Category': 'category',
+            'Order Priority': 'category',
+            'Order Date': 'datetime64[ns]',
+            'Ship Date': 'datetime64[ns]',
+            'Sales': 'float64',
+            'Quantity': 'int32',
+            'Discount': 'float64',
+            'Profit': 'float64',
+            'Shipping Cost': 'float64',
+        },
+        'options': {'encoding': 'cp1252'},
+    },
+
+    # Online Store Retail Orders
+    'orders': {
+        'dtype': {
+            'Customer ID': 'Int32',
+            'Customer Status': 'category',
+            'Date Order was placed': 'datetime64[ns]',
+            'Delivery Date': 'datetime64[ns]',
+            'Order ID': 'Int64',
+            'Product ID': 'Int64',
+            'Quantity Ordered': 'Int32',
+            'Total Retail Price for This Order': 'float64',
+            'Cost Price Per Unit': 'float64',
+        },
+        'date_format': '%d-%b-%y', # e.g. 18-Aug-20
+        'options': {'dayfirst': True},
+    },
+    'product_supplier': {
+        'dtype': {
+            'Product ID': 'int64',
+            'Product Line': 'category',
+            'Product Category': 'category',
+            'Product Group': 'category',
+            'Supplier Country': 'category',
+            'Supplier Name': 'category',
+            'Supplier ID': 'int32',
+        },
+    },
+
+    # Time to Purchase Duration
+    'events': {
+        'dtype': {
+            'event_time': 'datetime64[ns]',
+            'event_type': 'category',
+            'product_id': 'int64',
+            'category_id': 'int64',
+            'category_code': 'category',
+            'brand': 'category',
+            'price': 'float64',
+            'user_id': 'int64',
+        },
+    },
+}
+
+def read_dataset(name, path, columns=None, **kwargs):
+    '''
+  Read a csv input with the declared schema of the dataset
+
+  Parameters
+  ----------
+  name (str)      :   dataset name in DATASETS, e.g. 'ratings'
+  path (str)      :   path of the .csv file
+  columns (list)  :   only read these columns (optional), default is every column
+  kwargs          :   other pandas.read_csv argument (index_col, chunksize, skiprows, ...)
+
+  Returns
+  --------
+  data :  dataframe (or a reader of chunks when chunksize is given) with compact dtypes
+    '''
+
+    if name not in DATASETS:
+        raise KeyError(f'unknown dataset {name}, available: {", ".join(DATASETS)}')
+    schema = DATASETS[name]
+    used = (lambda column: True) if columns is None else (lambda column: column in columns)
+
+    # datetime columns are parsed by the reader, not cast from the dtype mapping
+    dtype = {column: dtype for column, dtype in schema['dtype'].items()
+             if used(column) and not dtype.startswith('datetime64')}
+    dates = [column for column, dtype in schema['dtype'].items()
+             if used(column) and dtype.startswith('datetime64')]
+
+    options = dict(schema.get('options', {}))
+    if dates and columns is None: # whole file, parse only the declared dates it really has
+        header = pd.read_csv(path, nrows=0, **{**options, **kwargs, 'chunksize': None}).columns
+        dates = [column for column in dates if column in header]
+    if dates:
+        options['parse_dates'] = dates
+        if 'date_format' in schema:
+            options['date_format'] = schema['date_format']
+    options.update(kwargs)
+    if options.get('chunksize') is not None or options.get('iterator'): # reader of chunks, parsed by the caller
+        return pd.read_csv(path, usecols=columns, dtype=dtype, **options)
+    with stage(f'read_csv[{name}]') as record:
+        data = pd.read_csv(path, usecols=columns, dtype=dtype, **options)
+        record.rows_out = len(data)
+    return data
@@ -0,0 +1,11 @@
+'''
+Time to Purchase Duration task, view to purchase duration & longer funnels of every user
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'read_events': '.purchase_duration',
+    'time_to_purchase': '.purchase_duration',
+    'run_funnels': '.funnel',
+})
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from ..instrumentation import instrument
+from .purchase_duration import sort_events
+
+'''
+Multi-step funnel engine, generalization of the view -> purchase duration.
+For a funnel [step_1, step_2, ..., step_k] the time of each user is:
+  - step_1 : the user's earliest step_1 event
+  - step_i : the user's earliest step_i event at or after the time of step_(i-1)
+An event is matched by one step only, thus a repeated step (e.g. view, view, purchase)
+needs another event of the user than the one of the previous step.
+The events are encoded & sorted once, then every funnel (any number of funnels and
+steps) is resolved with segmented numpy operations over the same sorted arrays.
+'''
+
+MISSING = np.iinfo(np.int64).min
+
+def _first_at_or_after(user_codes, event_time, is_event, threshold):
+    '''
+  earliest event time (per user) of the masked events that happen at or after the
+  threshold time of the user, and the row of that event (-1 if none), events must be
+  sorted by (user, event_time)
+    '''
+
+    first_time = np.full(len(threshold), MISSING, dtype=np.int64)
+    first_row = np.full(len(threshold), -1, dtype=np.int64)
+    rows = np.flatnonzero(is_event)
+    codes, times = user_codes[rows], event_time[rows]
+    after = (threshold[codes] != MISSING) & (times >= threshold[codes])
+    rows, codes, times = rows[after], codes[after], times[after]
+    if len(codes) == 0:
+        return first_time, first_row
+    start = np.r_[True, codes[1:] != codes[:-1]]
+    first_time[codes[start]] = times[start]
+    first_row[codes[start]] = rows[start]
+    return first_time, first_row
+
+def _step_columns(steps):
+    '''
+  column name of each step, a repeated step get its position as suffix
+    '''
+
+    names = []
+    for position, step in enumerate(steps, start=1):
+        names.append(step if steps.count(step) == 1 else f'{step}_{position}')
+    return names
+
+@instrument
+def run_funnels(events, funnels):
+    '''
+  Compute every funnel over one sorted event log
+
+  Parameters
+  ----------
+  events (dataframe) :   event log with event_time, event_type and user_id column
+  funnels (dict)     :   funnel name and its ordered list of event type,
+                         e.g. {'view-cart-purchase': ['view', 'cart', 'purchase']}
+
+  Returns
+  --------
+  results :  dict of funnel name and (per_user, summary)
+             - per_user : user_id, time of each reached step (NaT if not reached) and
+                          duration in minutes from the previous step
+             - summary  : for every step the number of user, drop-off from the previous
+                          step, conversion from step 1 and median / mean duration
+    '''
+
+    user_codes, users, event_time, event_type = sort_events(events)
+
+    masks = {} # event type mask is computed once and shared by all funnels
+    results = {}
+    for name, steps in funnels.items():
+        if len(steps) == 0:
+            raise ValueError(f'funnel {name} has no step')
+
+        times = []
+        threshold = np.full(len(users), MISSING + 1, dtype=np.int64) # first step can happen at any time
+        used = {} # step -> rows matched by the previous steps of the same event type
+        for step in steps:
+            if step not in masks:
+                masks[step] = np.asarray(event_type == step)
+            is_event = masks[step] if step not in used else masks[step] & ~used[step]
+            threshold, rows = _first_at_or_after(user_codes, event_time, is_event, threshold)
+            times.append(threshold)
+            if steps.count(step) > 1: # a repeated step can not match the same event again
+                used.setdefault(step, np.zeros(len(user_codes), dtype=bool))[rows[rows >= 0]] = True
+
+        started = times[0] != MISSING
+        columns = _step_columns(list(steps))
+        per_user = pd.DataFrame({'user_id': users[started]})
+        for column, step_time in zip(columns, times):
+            per_user[f'{column}_time'] = step_time[started].view('datetime64[ns]') # MISSING is NaT
+
+        summary = []
+        for position, (column, step_time) in enumerate(zip(columns, times)):
+            n_users = int((step_time != MISSING).sum())
+            row = {'step': column, 'users': n_users}
+            if position == 0:
+                row.update({'drop_off': 0, 'conversion': 1.0 if n_users else np.nan,
+                            'median_minutes': np.nan, 'mean_minutes': np.nan})
+            else:
+                previous = times[position - 1]
+                reached = step_time != MISSING
+                duration = (step_time[reached] - previous[reached]) / 60e9 # nanosecond to minute
+                minutes = np.full(len(users), np.nan)
+                minutes[reached] = duration
+                per_user[f'{columns[position - 1]}_{column}_minutes'] = np.round(minutes[started], 3)
+                row.update({'drop_off': summary[-1]['users'] - n_users,
+                            'conversion': n_users / summary[0]['users'] if summary[0]['users'] else np.nan,
+                            'median_minutes': float(np.median(duration)) if len(duration) else np.nan,
+                            'mean_minutes': float(np.mean(duration)) if len(duration) else np.nan})
+            summary.append(row)
+
+        results[name] = (per_user, pd.DataFrame(summary))
+    return results
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from ..column_cache import load_dataset
+from ..instrumentation import instrument
+from ..parallel import partitioned_groupby
+
+'''
+Vectorized time to purchase duration.
+User id is encoded as int32 code and event type kept categorical to keep memory low, then
+the earliest 'purchase' and the earliest 'view' of every user are two min aggregations
+grouped on the user code, over hash partitions across a process pool for a large event
+log (data_wrangling.parallel). The events are not sorted on this path. The view is used
+only if it happened before (or at) the earliest purchase.
+Only the longer funnels (funnel.py) need the events in order: `sort_events` sort them once
+by (user, event_time) for all the funnels.
+'''
+
+EVENT_COLUMNS = ['event_time', 'event_type', 'user_id']
+
+def read_events(filename):
+    '''
+  Read only the columns needed from the event log with compact dtypes, through
+  its memory-mapped columnar cache
+
+  Parameters
+  ----------
+  filename (str) :   path of the event log .csv
+    '''
+
+    return load_dataset('events', filename, columns=EVENT_COLUMNS)
+
+def encode_events(events):
+    '''
+  int32 user code (-1 for a missing user), unique user id (users[code] give the user id)
+  and event time as int64 ns (int64 min for a missing time) of the event log
+    '''
+
+    codes, users = pd.factorize(events['user_id'], sort=True)
+    event_time = pd.to_datetime(events['event_time'], utc=True).dt.tz_localize(None) # e.g. '2020-09-24 11:57:06 UTC'
+    event_time = event_time.to_numpy().astype('datetime64[ns]').view(np.int64)
+    return codes.astype(np.int32), np.asarray(users), event_time
+
+@instrument
+def sort_events(events):
+    '''
+  Encode and sort the event log once by (user, event_time)
+
+  Parameters
+  ----------
+  events (dataframe) :   event log with event_time, event_type and user_id column
+
+  Returns
+  --------
+  user_codes, users, event_time, event_type :  sorted int32 user code, unique user id
+                                               (users[code] give the user id), sorted
+                                               event time (int64 ns) and event type (categorical)
+    '''
+
+    codes, users, event_time = encode_events(events)
+    event_type = events['event_type'].astype('category').array
+
+    valid = (codes >= 0) & (event_time != np.iinfo(np.int64).min) # drop missing user / time
+    order = np.flatnonzero(valid)[np.lexsort((event_time[valid], codes[valid]))]
+    return codes[order], users, event_time[order], event_type[order]
+
+@instrument
+def time_to_purchase(events, workers=None):
+    '''
+  Calculate each user's view to purchase duration
+
+  Parameters
+  ----------
+  events (dataframe) :   event log with event_time, event_type and user_id column
+  workers (int)      :   number of process of the per-user aggregation (large data only),
+                         default is the number of cpu
+
+  Returns
+  --------
+  view_to_purchase :  dataframe with user_id and view_purchase_duration (in minutes),
+                      only for user who viewed before their earliest purchase
+    '''
+
+    codes, users, event_time = encode_events(events)
+    valid = (codes >= 0) & (event_time != np.iinfo(np.int64).min) # drop missing user / time
+    is_purchase = np.asarray(events['event_type'] == 'purchase')[valid]
+    is_view = np.asarray(events['event_type'] == 'view')[valid]
+    event_time = event_time[valid]
+
+    # earliest purchase & view of every user, the other events are ignored (int64 max)
+    never = np.iinfo(np.int64).max
+    times = pd.DataFrame({'purchase': np.where(is_purchase, event_time, never),
+                          'view': np.where(is_view, event_time, never)})
+    first = partitioned_groupby(times, [codes[valid]], {'purchase': ('purchase', 'min'), 'view': ('view', 'min')},
+                                workers=workers)
+    first_purchase, first_view = first['purchase'].to_numpy(), first['view'].to_numpy()
+
+    # keep user with a purchase and an earliest view at or before that purchase
+    keep = (first_purchase != never) & (first_view != never) & (first_view <= first_purchase)
+    duration = (first_purchase[keep] - first_view[keep]) / 60e9 # nanosecond to minute
+
+    return pd.DataFrame({'user_id': users[first.index.to_numpy()[keep]],
+                         'view_purchase_duration': np.round(duration, 3)})
@@ -0,0 +1,16 @@
+'''
+Get Unwatched Movie task, unwatched movies of a user from the MovieLens ratings
+'''
+
+from .._lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'get_unwatched_movie': '.unwatched',
+    'get_unwatched_movies': '.unwatched',
+    'get_top_unwatched_movies': '.unwatched',
+    'load_metadata': '.unwatched',
+    'MovieRanking': '.movie_ranking',
+    'WatchedIndex': '.watched_index',
+    'build_watched_index': '.watched_index',
+    'load_watched_index': '.watched_index',
+})
@@ -0,0 +1,125 @@
+import numpy as np
+
+'''
+Popularity / rating ranking of the movie catalogue.
+- the global ranking and a ranking per genre (split from the `genres` pipe list) are
+  computed once from the rating count & sum stored in the watched movies index.
+- the top-k unwatched movies are taken by walking the ranking block by block and
+  skipping the watched movie id, thus the full catalogue is never copied.
+'''
+
+RANK_BY = ('popularity', 'rating')
+
+class MovieRanking:
+    '''
+  Ranked movie catalogue
+
+  Parameters
+  ----------
+  metadata_df (dataframe) :   movie metadata with movieId as an index and genres column
+  rated_movies (array)    :   sorted movie id that have at least one rating
+  rating_count (array)    :   number of rating of each rated movie
+  rating_sum (array)      :   total rating of each rated movie
+  rank_by (str)           :   'popularity' rank by number of rating (then average rating),
+                              'rating' rank by weighted average rating
+  min_ratings (int)       :   weight of the overall average for 'rating', thus a movie
+                              with only a few ratings does not top the ranking
+    '''
+
+    def __init__(self, metadata_df, rated_movies, rating_count, rating_sum, rank_by='popularity', min_ratings=10):
+        if rank_by not in RANK_BY:
+            raise ValueError(f'rank_by must be one of {RANK_BY}')
+
+        movie_ids = metadata_df.index.to_numpy()
+        rated_movies = np.asarray(rated_movies)
+
+        # rating count & sum of every movie in metadata row order, movie without rating got 0
+        count, total = np.zeros(len(movie_ids)), np.zeros(len(movie_ids))
+        if len(rated_movies) > 0:
+            position = np.minimum(np.searchsorted(rated_movies, movie_ids), len(rated_movies) - 1)
+            found = rated_movies[position] == movie_ids
+            count[found] = np.asarray(rating_count)[position[found]]
+            total[found] = np.asarray(rating_sum)[position[found]]
+        mean = np.divide(total, count, out=np.zeros(len(movie_ids)), where=count > 0)
+
+        if rank_by == 'popularity':
+            primary, secondary = count, mean
+        else:
+            overall_mean = total.sum() / count.sum() if count.sum() > 0 else 0
+            primary = (count * mean + min_ratings * overall_mean) / (count + min_ratings)
+            primary[count == 0] = -np.inf
+            secondary = count
+
+        # metadata row position from the best movie, tie is broken by movie id
+        self.order = np.lexsort((movie_ids, -secondary, -primary))
+        self.movie_ids = movie_ids
+        self.score = primary
+
+        # ranking per genre keep the global order
+        genres = metadata_df['genres'].astype(object).fillna('').to_numpy()[self.order]
+        self.genre_order = {}
+        for rank, genre_list in enumerate(genres):
+            for genre in genre_list.split('|'):
+                if genre:
+                    self.genre_order.setdefault(genre, []).append(self.order[rank])
+        self.genre_order = {genre: np.array(rows) for genre, rows in self.genre_order.items()}
+
+    def iter_unwatched(self, watched, genre=None, block_size=256):
+        '''
+  stream metadata row position of unwatched movies in rank order
+
+  Parameters
+  ----------
+  watched (array)  :   sorted movie id watched by the user
+  genre (str)      :   only stream movie with this genre (optional)
+  block_size (int) :   number of ranked movie checked at once
+
+  Yields
+  --------
+  rows :  array of metadata row position, best movie first
+        '''
+
+        ranked = self.order if genre is None else self.genre_order.get(genre, np.empty(0, dtype=np.int64))
+        watched = np.asarray(watched)
+        for start in range(0, len(ranked), block_size):
+            rows = ranked[start:start + block_size]
+            if len(watched) > 0:
+                ids = self.movie_ids[rows]
+                position = np.minimum(np.searchsorted(watched, ids), len(watched) - 1)
+                rows = rows[watched[position] != ids]
+            if len(rows) > 0:
+                yield rows
+
+    def top_unwatched(self, watched, k=10, page=1, genre=None):
+        '''
+  metadata row position of the top-k unwatched movies on a given page
+
+  Parameters
+  ----------
+  watched (array) :   sorted movie id watched by the user
+  k (int)         :   number of movie per page
+  page (int)      :   page number, start from 1
+  genre (str)     :   only return movie with this genre (optional)
+
+  Returns
+  --------
+  rows :  array of metadata row position, best movie first
+        '''
+
+        if page < 1:
+            raise ValueError('page must start from 1')
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        skip, collected, needed = (page - 1) * k, [], k
+        for rows in self.iter_unwatched(watched, genre, block_size=max(2 * k, 64)):
+            if skip >= len(rows): # whole block belongs to the previous pages
+                skip -= len(rows)
+                continue
+            rows = rows[skip:skip + needed]
+            skip = 0
+            collected.append(rows)
+            needed -= len(rows)
+            if needed == 0:
+                break
+        return np.concatenate(collected) if collected else np.empty(0, dtype=np.int64)
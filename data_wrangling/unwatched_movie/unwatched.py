@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+
+from ..column_cache import load_dataset
+from ..instrumentation import instrument, stage
+from .movie_ranking import MovieRanking
+from .watched_index import load_watched_index
+
+'''
+Unwatched movies of a user (MovieLens ratings.csv & movies.csv).
+The watched movie index is memory-mapped and the metadata is loaded once per process,
+`get_top_unwatched_movies` page through the unwatched movies by popularity or rating.
+'''
+
+_metadata_cache = {} # movie metadata & its sorted movie id for each metadata path
+
+def load_metadata(path):
+    '''
+  Load the movie metadata once and reuse it until the file is modified
+
+  Parameters
+  ----------
+  path (str) :   path of movies.csv
+
+  Returns
+  --------
+  metadata_df, sorted_ids, sorted_position :  metadata dataframe with movieId as an index,
+                                              sorted movie id and its row position
+    '''
+
+    modified_time = os.path.getmtime(path)
+    cached = _metadata_cache.get(path)
+    if cached is None or cached[0] != modified_time:
+        metadata_df = load_dataset('movies', path, index_col='movieId') # create metadata dataframe from its columnar cache
+        movie_ids = metadata_df.index.to_numpy()
+        sorted_position = np.argsort(movie_ids, kind='stable')
+        _metadata_cache[path] = (modified_time, metadata_df, movie_ids[sorted_position], sorted_position)
+    return _metadata_cache[path][1:]
+
+def _unwatched_mask(watched, sorted_ids, sorted_position):
+    '''
+  boolean mask (in metadata row order) of movies not found in watched movie id array
+    '''
+
+    mask = np.ones(len(sorted_ids), dtype=bool)
+    if len(sorted_ids) == 0:
+        return mask
+    position = np.minimum(np.searchsorted(sorted_ids, watched), len(sorted_ids) - 1)
+    found = position[sorted_ids[position] == watched] # watched movie may be missing from metadata
+    mask[sorted_position[found]] = False
+    return mask
+
+def get_unwatched_movie(userId, config):
+    '''
+  Function to get unwatched movie from specific movie
+
+  Parameters
+  ----------
+  userId (int)  :   The targeted user ID
+  config (dict) :   The configuration files where the engineering team store
+                    the user-data and movie metadata
+
+  Returns
+  --------
+  unwatched_movie_df :  pandas DataFrame type with movieId as an index
+                        and two columns of title and genres
+
+    '''
+
+    return get_unwatched_movies([userId], config)[userId]
+
+@instrument
+def get_unwatched_movies(user_ids, config):
+    '''
+  Function to get unwatched movie for many users at once
+
+  Parameters
+  ----------
+  user_ids (list) :   The targeted user IDs
+  config (dict)   :   The configuration files where the engineering team store
+                      the user-data and movie metadata, `path.index` can be used
+                      to choose the folder of watched movie index
+
+  Returns
+  --------
+  unwatched_movies :  dict of user ID and its unwatched_movie_df
+    '''
+
+    # watched movie index is memory-mapped, metadata is loaded once per process
+    index = load_watched_index(config['path']['user_data'], config['path'].get('index'))
+    metadata_df, sorted_ids, sorted_position = load_metadata(config['path']['metadata'])
+
+    unwatched_movies = {}
+    with stage('unwatched_mask', rows_in=len(user_ids)) as record:
+        for user_id in user_ids:
+            watched = index.watched(user_id) # slice of the user watched movie id
+            unwatched_movies[user_id] = metadata_df[_unwatched_mask(watched, sorted_ids, sorted_position)]
+        record.rows_out = sum(len(movies) for movies in unwatched_movies.values())
+    return unwatched_movies
+
+_ranking_cache = {} # movie ranking for each (index folder, metadata path, rank_by)
+
+def load_movie_ranking(config, rank_by='popularity'):
+    '''
+  Build the movie ranking once and reuse it until ratings or metadata is changed
+
+  Parameters
+  ----------
+  config (dict)  :   The configuration files where the engineering team store
+                     the user-data and movie metadata
+  rank_by (str)  :   'popularity' or 'rating'
+
+  Returns
+  --------
+  index, metadata_df, ranking :  WatchedIndex, metadata dataframe and MovieRanking
+    '''
+
+    index = load_watched_index(config['path']['user_data'], config['path'].get('index'))
+    metadata_df, _, _ = load_metadata(config['path']['metadata'])
+
+    key = (config['path']['user_data'], config['path']['metadata'], rank_by)
+    cached = _ranking_cache.get(key)
+    if cached is None or cached[0] is not index or cached[1] is not metadata_df:
+        ranking = MovieRanking(metadata_df, index.rated_movies, index.rating_count, index.rating_sum, rank_by=rank_by)
+        _ranking_cache[key] = (index, metadata_df, ranking)
+    return index, metadata_df, _ranking_cache[key][2]
+
+@instrument
+def get_top_unwatched_movies(userId, config, k=10, page=1, genre=None, rank_by='popularity'):
+    '''
+  Function to get the best ranked unwatched movie from specific user, page by page
+
+  Parameters
+  ----------
+  userId (int)  :   The targeted user ID
+  config (dict) :   The configuration files where the engineering team store
+                    the user-data and movie metadata
+  k (int)       :   number of movie per page
+  page (int)    :   page number, start from 1
+  genre (str)   :   only recommend movie with this genre, e.g. 'Comedy' (optional)
+  rank_by (str) :   'popularity' (number of rating) or 'rating' (weighted average rating)
+
+  Returns
+  --------
+  top_movie_df :  pandas DataFrame type with movieId as an index and two columns
+                  of title and genres, sorted from the best ranked movie
+    '''
+
+    index, metadata_df, ranking = load_movie_ranking(config, rank_by)
+    rows = ranking.top_unwatched(index.watched(userId), k=k, page=page, genre=genre)
+    return metadata_df.iloc[rows]
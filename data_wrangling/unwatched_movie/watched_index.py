@@ -0,0 +1,147 @@
+import json
+import os
+
+import numpy as np
+
+from ..instrumentation import instrument
+from ..schemas import read_dataset
+
+'''
+Persistent index of watched movies for each user (compressed sparse row format).
+- `users`  : sorted unique user id
+- `indptr` : watched movies of users[i] are movies[indptr[i]:indptr[i+1]]
+- `movies` : watched movie id, sorted inside each user
+Rating count & sum of each movie (`rated_movies`, `rating_count`, `rating_sum`) are kept
+in the same folder, they are used to rank the movies by popularity.
+The arrays are saved as .npy files and opened memory-mapped, so a lookup does not
+parse ratings.csv. The index is rebuilt when size or modified time of ratings.csv change.
+'''
+
+INDEX_FILES = ('users', 'indptr', 'movies', 'rated_movies', 'rating_count', 'rating_sum')
+INDEX_VERSION = 2 # bump when the index files change, thus old index is rebuilt
+
+def _source_signature(path):
+    '''
+  size & modified time of the source file, used to detect a changed ratings.csv
+    '''
+
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'version': INDEX_VERSION}
+
+def default_index_dir(ratings_path):
+    return ratings_path + '.csr'
+
+@instrument
+def build_watched_index(ratings_path, index_dir, chunksize=5_000_000):
+    '''
+  Build the user -> watched movies index from ratings file and save it to index_dir
+
+  Parameters
+  ----------
+  ratings_path (str) :   path of ratings.csv (must contain userId & movieId)
+  index_dir (str)    :   folder to store the index files
+  chunksize (int)    :   number of rows parsed at once, keep memory bounded for big file
+    '''
+
+    signature = _source_signature(ratings_path)
+
+    # only userId, movieId & rating are needed, read them with the declared compact dtypes chunk by chunk
+    user_chunks, movie_chunks, rating_chunks = [], [], []
+    reader = read_dataset('ratings', ratings_path, columns=['userId', 'movieId', 'rating'], chunksize=chunksize)
+    for chunk in reader:
+        user_chunks.append(chunk['userId'].to_numpy())
+        movie_chunks.append(chunk['movieId'].to_numpy())
+        rating_chunks.append(chunk['rating'].to_numpy())
+    user_ids = np.concatenate(user_chunks) if user_chunks else np.empty(0, dtype=np.int32)
+    movie_ids = np.concatenate(movie_chunks) if movie_chunks else np.empty(0, dtype=np.int32)
+    ratings = np.concatenate(rating_chunks) if rating_chunks else np.empty(0, dtype=np.float32)
+
+    # number of rating & total rating of each movie
+    rated_movies, movie_position = np.unique(movie_ids, return_inverse=True)
+    rating_count = np.bincount(movie_position, minlength=len(rated_movies)).astype(np.int64)
+    rating_sum = np.bincount(movie_position, weights=ratings, minlength=len(rated_movies))
+    del ratings, movie_position
+
+    # sort by user then movie, a user rating the same movie twice is kept once
+    order = np.lexsort((movie_ids, user_ids))
+    user_ids, movie_ids = user_ids[order], movie_ids[order]
+    if len(user_ids) > 0:
+        keep = np.ones(len(user_ids), dtype=bool)
+        keep[1:] = (user_ids[1:] != user_ids[:-1]) | (movie_ids[1:] != movie_ids[:-1])
+        user_ids, movie_ids = user_ids[keep], movie_ids[keep]
+
+    users, counts = np.unique(user_ids, return_counts=True)
+    indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    # write into temporary names first, thus a reader never open a half written index
+    os.makedirs(index_dir, exist_ok=True)
+    for name, array in zip(INDEX_FILES, (users, indptr, movie_ids, rated_movies, rating_count, rating_sum)):
+        np.save(os.path.join(index_dir, name + '.tmp.npy'), array)
+    for name in INDEX_FILES:
+        os.replace(os.path.join(index_dir, name + '.tmp.npy'), os.path.join(index_dir, name + '.npy'))
+    with open(os.path.join(index_dir, 'source.json'), 'w') as file:
+        json.dump(signature, file)
+
+class WatchedIndex:
+    '''
+  Memory-mapped user -> watched movies index
+
+  Parameters
+  ----------
+  index_dir (str) :   folder that contains the index files
+    '''
+
+    def __init__(self, index_dir):
+        arrays = [np.load(os.path.join(index_dir, name + '.npy'), mmap_mode='r') for name in INDEX_FILES]
+        self.users, self.indptr, self.movies, self.rated_movies, self.rating_count, self.rating_sum = arrays
+
+    def __contains__(self, user_id):
+        position = np.searchsorted(self.users, user_id)
+        return position < len(self.users) and self.users[position] == user_id
+
+    def watched(self, user_id):
+        '''
+  sorted array of movie id watched by a user, raise KeyError for unknown user
+        '''
+
+        position = np.searchsorted(self.users, user_id)
+        if position == len(self.users) or self.users[position] != user_id:
+            raise KeyError(user_id)
+        return self.movies[self.indptr[position]:self.indptr[position + 1]]
+
+_index_cache = {} # opened index for each ratings path
+
+def load_watched_index(ratings_path, index_dir=None):
+    '''
+  Open the watched movies index of a ratings file, (re)build it first when it does
+  not exist yet or the ratings file was changed
+
+  Parameters
+  ----------
+  ratings_path (str) :   path of ratings.csv
+  index_dir (str)    :   folder of the index files, default is `<ratings_path>.csr`
+
+  Returns
+  --------
+  index :  WatchedIndex
+    '''
+
+    index_dir = index_dir or default_index_dir(ratings_path)
+    signature = _source_signature(ratings_path)
+
+    cached = _index_cache.get(index_dir)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(os.path.join(index_dir, 'source.json')) as file:
+            stored_signature = json.load(file)
+    except (OSError, ValueError):
+        stored_signature = None
+
+    if stored_signature != signature:
+        build_watched_index(ratings_path, index_dir)
+
+    index = WatchedIndex(index_dir)
+    _index_cache[index_dir] = (signature, index)
+    return index
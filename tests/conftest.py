@@ -0,0 +1,25 @@
+import pytest
+
+from data_wrangling.benchmark.generators import generate
+
+'''
+Shared fixtures of the tests, small seeded synthetic datasets (benchmark generators)
+written once per test session.
+'''
+
+@pytest.fixture(scope='session')
+def dataset(tmp_path_factory):
+    '''
+  dataset(name, rows, seed=42) generate a dataset once and return its paths
+  (dict of file name and path, see data_wrangling.benchmark.generators.generate)
+    '''
+
+    generated = {}
+
+    def make(name, rows, seed=42):
+        if (name, rows, seed) not in generated:
+            directory = tmp_path_factory.mktemp(f'{name}_{rows}_{seed}')
+            generated[name, rows, seed] = generate(name, str(directory), rows=rows, seed=seed)
+        return generated[name, rows, seed]
+
+    return make
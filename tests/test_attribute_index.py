@@ -0,0 +1,80 @@
+from math import atan2, cos, radians, sin, sqrt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.house_recommendation.attribute_index import ListingAttributeIndex
+from data_wrangling.house_recommendation.recommendation import get_user_recommendation
+
+def haversine(lat1, lon1, lat2, lon2):
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return 2 * atan2(sqrt(a), sqrt(1 - a)) * 6371
+
+def reference_filter(data, preferences):
+    '''
+  the preference filters of the original recommendation, one pandas mask per preference
+    '''
+
+    for key, value in preferences.items():
+        if value is not None:
+            if key == 'property_type' or key == 'is_furnished':
+                data = data[data[key] == value]
+            elif key == 'size' or key == 'capacity':
+                data = data[data[key] >= value]
+            elif key == 'yearly_price':
+                data = data[data[key] <= value]
+    return data
+
+def reference_recommendation(n, user_config, path):
+    '''
+  the original recommendation, the distance sort is stable (equal distance in data order)
+    '''
+
+    data = pd.read_csv(path)
+    location = user_config['location']
+    distance = [haversine(location['latitude'], location['longitude'], lat, lon)
+                for lat, lon in zip(data['latitude'], data['longitude'])]
+    data = data.assign(distance=distance).sort_values('distance', kind='stable').drop(columns='distance')
+    return reference_filter(data, user_config['preferences']).head(n)
+
+PREFERENCES = [
+    {},
+    {'property_type': None, 'size': None},
+    {'property_type': 'apartment'},
+    {'property_type': 'castle'}, # unknown value
+    {'is_furnished': 'Full Furnished', 'capacity': 2},
+    {'size': 30.0, 'capacity': 4, 'yearly_price': 50_000_000},
+    {'property_type': 'house', 'is_furnished': 'Unfurnished', 'size': 50.0, 'yearly_price': 100_000_000},
+    {'yearly_price': 0}, # nothing matches
+    {'bedrooms': 'Studio', 'capacity': 2}, # not an indexed preference, ignored like the original
+]
+
+@pytest.fixture(scope='module')
+def travelio(dataset):
+    path = dataset('travelio', 2000)['travelio']
+    data = pd.read_csv(path)
+    # missing values never match a preference
+    data.loc[data.index[::50], ['size', 'is_furnished']] = np.nan
+    return path, data
+
+@pytest.mark.parametrize('preferences', PREFERENCES)
+def test_candidates_match_pandas_filters(travelio, preferences):
+    _, data = travelio
+    candidates = ListingAttributeIndex(data).candidates(preferences)
+    expected = reference_filter(data, preferences).index.to_numpy()
+    if candidates is None:
+        assert len(expected) == len(data)
+    else:
+        np.testing.assert_array_equal(candidates, expected)
+
+@pytest.mark.parametrize('preferences', PREFERENCES)
+@pytest.mark.parametrize('n', [1, 10, 300])
+def test_recommendation_matches_original(travelio, preferences, n):
+    path, _ = travelio
+    user_config = {'preferences': preferences, 'location': {'latitude': -6.2734, 'longitude': 106.7364}}
+    result = get_user_recommendation(n, user_config, {'path': path})
+    expected = reference_recommendation(n, user_config, path)
+    assert result.index.tolist() == expected.index.tolist()
+    assert result['apartment_name'].astype(str).tolist() == expected['apartment_name'].astype(str).tolist()
@@ -0,0 +1,120 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.benchmark import generators, suite
+
+def read_files(paths):
+    contents = {}
+    for key, path in paths.items():
+        with open(path, 'rb') as file:
+            contents[key] = file.read()
+    return contents
+
+@pytest.mark.parametrize('name', sorted(generators.GENERATORS))
+def test_generator_is_deterministic_across_chunks(tmp_path, name):
+    # 250 rows in chunks of 100, the last chunk is partial
+    first = generators.generate(name, str(tmp_path / 'first'), rows=250, seed=7, chunk_rows=100)
+    second = generators.generate(name, str(tmp_path / 'second'), rows=250, seed=7, chunk_rows=100)
+    other_seed = generators.generate(name, str(tmp_path / 'other_seed'), rows=250, seed=8, chunk_rows=100)
+
+    assert list(first) == list(second) == list(other_seed)
+    assert read_files(first) == read_files(second)
+    assert read_files(first) != read_files(other_seed)
+
+def test_chunks_are_written_once(tmp_path):
+    paths = generators.generate('events', str(tmp_path), rows=250, seed=7, chunk_rows=100)
+    events = pd.read_csv(paths['events'])
+    assert len(events) == 250
+    # a header is written only on the first chunk, and every chunk has its own random rows
+    assert not events.iloc[:, 0].astype(str).eq(events.columns[0]).any()
+    assert not events.iloc[:100].reset_index(drop=True).equals(events.iloc[100:200].reset_index(drop=True))
+
+def counting_generate(monkeypatch):
+    calls = []
+    def generate(name, directory, rows=None, seed=42, chunk_rows=1_000_000):
+        calls.append((name, rows, seed))
+        return generators.generate(name, directory, rows=rows, seed=seed, chunk_rows=chunk_rows)
+    monkeypatch.setattr(suite, 'generate', generate)
+    return calls
+
+def test_ensure_datasets_reuses_manifest(tmp_path, monkeypatch):
+    calls = counting_generate(monkeypatch)
+    data_dir = str(tmp_path)
+
+    manifest = suite.ensure_datasets(data_dir, ['events', 'orders'], rows=60)
+    assert calls == [('events', 60, 42), ('orders', 60, 42)]
+    assert manifest['events']['rows'] == 60 and manifest['events']['version'] == generators.GENERATOR_VERSION
+    with open(os.path.join(data_dir, 'manifest.json')) as file:
+        assert json.load(file) == manifest
+
+    files = read_files(manifest['orders']['paths'])
+    assert suite.ensure_datasets(data_dir, ['orders', 'events'], rows=60) == manifest
+    assert len(calls) == 2 and read_files(manifest['orders']['paths']) == files
+
+def test_ensure_datasets_regenerates(tmp_path, monkeypatch):
+    calls = counting_generate(monkeypatch)
+    data_dir = str(tmp_path)
+    manifest = suite.ensure_datasets(data_dir, ['events'], rows=60)
+
+    # other rows or seed
+    assert suite.ensure_datasets(data_dir, ['events'], rows=70)['events']['rows'] == 70
+    assert suite.ensure_datasets(data_dir, ['events'], rows=70, seed=1)['events']['seed'] == 1
+    assert calls == [('events', 60, 42), ('events', 70, 42), ('events', 70, 1)]
+
+    # generator output changed
+    monkeypatch.setattr(suite, 'GENERATOR_VERSION', generators.GENERATOR_VERSION + 1)
+    manifest = suite.ensure_datasets(data_dir, ['events'], rows=70, seed=1)
+    assert len(calls) == 4 and manifest['events']['version'] == generators.GENERATOR_VERSION + 1
+    suite.ensure_datasets(data_dir, ['events'], rows=70, seed=1)
+    assert len(calls) == 4
+
+    # a generated file was removed, or the manifest is unreadable
+    os.remove(manifest['events']['paths']['events'])
+    suite.ensure_datasets(data_dir, ['events'], rows=70, seed=1)
+    assert len(calls) == 5 and os.path.exists(manifest['events']['paths']['events'])
+    with open(os.path.join(data_dir, 'manifest.json'), 'w') as file:
+        file.write('{"events": ')
+    suite.ensure_datasets(data_dir, ['events'], rows=70, seed=1)
+    assert len(calls) == 6
+
+def result(stages):
+    return {'tasks': {task: {'stages': {stage: {'wall_s': wall, 'peak_mb': peak}
+                                        for stage, (wall, peak) in task_stages.items()}}
+                      for task, task_stages in stages.items()}}
+
+def test_compare_flags_regressions():
+    old = result({
+        'retail_orders': {'load': (1.0, 100.0), 'report': (2.0, 50.0), 'removed': (1.0, 10.0)},
+        'clean_airbnb': {'in_memory': (0.002, 10.0), 'streaming': (0.5, 40.0)},
+        'removed_task': {'stage': (1.0, 1.0)},
+    })
+    new = result({
+        'retail_orders': {'load': (1.2, 100.0), 'report': (1.0, 56.0), 'added': (9.0, 1.0)},
+        'clean_airbnb': {'in_memory': (0.008, 10.0), 'streaming': (0.54, 43.0)},
+        'added_task': {'stage': (1.0, 1.0)},
+    })
+    comparison = suite.compare(old, new, threshold=0.10).set_index(['task', 'stage'])
+
+    # only the stages of both results
+    assert list(comparison.index) == [('retail_orders', 'load'), ('retail_orders', 'report'),
+                                      ('clean_airbnb', 'in_memory'), ('clean_airbnb', 'streaming')]
+    np.testing.assert_allclose(comparison['wall_s_ratio'], [1.2, 0.5, 4.0, 1.08])
+    np.testing.assert_allclose(comparison['peak_mb_ratio'], [1.0, 1.12, 1.0, 43 / 40])
+    # 20% slower, 12% more memory, 4x slower but under min_seconds, within the threshold
+    assert list(comparison['regression']) == [True, True, False, False]
+
+    assert list(suite.compare(old, new, threshold=0.25)['regression']) == [False, False, False, False]
+    assert list(suite.compare(old, new, threshold=0.05, min_seconds=0.001)['regression']) == [True, True, True, True]
+
+def test_compare_missing_measures():
+    old = result({'task': {'stage': (0.0, None), 'other': (1.0, 10.0)}})
+    new = result({'task': {'stage': (1.0, 10.0), 'other': (2.0, None)}})
+    comparison = suite.compare(old, new)
+    assert comparison['wall_s_ratio'].isna().tolist() == [True, False]
+    assert comparison['peak_mb_ratio'].isna().tolist() == [True, True]
+    # a stage measured from zero is not a ratio, the other one is 2x slower
+    assert list(comparison['regression']) == [False, True]
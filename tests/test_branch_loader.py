@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.merge_transactions.branch_loader import BRANCH_SCHEMA, read_branch_file
+from data_wrangling.merge_transactions.merge import import_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED = [os.path.join(ROOT, 'Merge Transactions Data', name) for name in ('branch_A.xlsx', 'branch_B.csv', 'branch_C.csv')]
+
+def reference_import(filenames):
+    '''
+  the original import_data: every .xlsx file then every .csv file, concatenated
+    '''
+
+    data_csv, data_excel = [], []
+    for filename in filenames:
+        if '.csv' in filename:
+            data_csv.append(pd.read_csv(filename, sep=';'))
+        elif '.xlsx' in filename:
+            data_excel.append(pd.read_excel(filename))
+        else:
+            print('format not available, please use .csv or .xlsx only')
+    return pd.concat([pd.concat(data_excel, ignore_index=True), pd.concat(data_csv, ignore_index=True)])
+
+def run(function, filenames, **options):
+    printed = io.StringIO()
+    with contextlib.redirect_stdout(printed):
+        data = function(filenames, **options)
+    return data, printed.getvalue()
+
+def assert_same_data(result, expected):
+    assert list(result.columns) == list(expected.columns)
+    assert len(result) == len(expected)
+    for column in expected.columns:
+        if column == 'Date': # text in the .csv files, a date cell in the .xlsx file
+            expected_values = [pd.Timestamp(value) for value in expected[column]]
+            assert result[column].tolist() == expected_values
+        elif BRANCH_SCHEMA[column] in ('float64', 'Int32'):
+            np.testing.assert_array_equal(result[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+                                          err_msg=column)
+        else:
+            assert result[column].astype(str).tolist() == expected[column].astype(str).tolist(), column
+
+@pytest.fixture
+def generated(dataset, tmp_path):
+    paths = dataset('branch', 600)
+    notes = tmp_path / 'notes.txt'
+    notes.write_text('not a branch file')
+    return [paths['branch_A'], paths['branch_B'], paths['branch_C'], str(notes)]
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_matches_original_import(generated, workers):
+    expected, expected_printed = run(reference_import, generated)
+    result, printed = run(import_data, generated, workers=workers)
+    assert printed == expected_printed == 'format not available, please use .csv or .xlsx only\n'
+    assert_same_data(result, expected)
+    assert result.index.equals(pd.RangeIndex(len(result)))
+    assert not [name for name in os.listdir(os.path.dirname(generated[0])) if name.endswith('.cols')]
+
+def test_matches_original_import_on_bundled_files():
+    expected, _ = run(reference_import, BUNDLED)
+    result, _ = run(import_data, BUNDLED, workers=1)
+    assert_same_data(result, expected)
+
+def test_rows_follow_the_file_names(generated):
+    filenames = [generated[1], generated[0], generated[2]] # a .csv before the .xlsx file
+    result, _ = run(import_data, filenames, workers=1)
+    expected = pd.concat([pd.read_excel(filename) if filename.endswith('.xlsx') else pd.read_csv(filename, sep=';')
+                          for filename in filenames], ignore_index=True)
+    assert_same_data(result, expected)
+
+def test_cache_is_opt_in(generated, tmp_path, monkeypatch):
+    monkeypatch.setenv('DATA_WRANGLING_CACHE_DIR', str(tmp_path / 'caches'))
+    plain, _ = run(import_data, generated, workers=1)
+    assert not os.path.exists(tmp_path / 'caches')
+
+    first, _ = run(import_data, generated, workers=1, cache=True)
+    cached, _ = run(import_data, generated, workers=1, cache=True)
+    assert len(os.listdir(tmp_path / 'caches')) == 3
+    assert not [name for name in os.listdir(os.path.dirname(generated[0])) if name.endswith('.cols')]
+    pd.testing.assert_frame_equal(first, plain)
+    pd.testing.assert_frame_equal(cached, plain)
+
+def test_no_supported_file(tmp_path):
+    data, printed = run(import_data, [str(tmp_path / 'branch_D.json')], workers=1)
+    assert printed == 'format not available, please use .csv or .xlsx only\n'
+    assert len(data) == 0 and list(data.columns) == list(BRANCH_SCHEMA)
+    with pytest.raises(ValueError):
+        read_branch_file(str(tmp_path / 'branch_D.json'))
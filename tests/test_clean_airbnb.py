@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.clean_airbnb.cleaning import clean_airbnb
+from data_wrangling.clean_airbnb.streaming_cleaner import clean_airbnb_streaming
+
+@pytest.mark.parametrize('chunksize', [700, 100_000])
+def test_streaming_matches_in_memory(dataset, tmp_path, chunksize):
+    path = dataset('airbnb', 5000)['airbnb']
+    expected = clean_airbnb(path)
+    report = clean_airbnb_streaming(path, str(tmp_path / 'clean.csv'), chunksize=chunksize)
+    result = pd.read_csv(tmp_path / 'clean.csv')
+
+    assert report['rows_out'] == len(expected)
+    assert result['id'].tolist() == expected['id'].tolist()
+    assert result['neighbourhood group'].tolist() == expected['neighbourhood group'].astype(str).tolist()
+    np.testing.assert_array_equal(result['availability 365'], expected['availability 365'])
+    # the outliers are replaced with the approximate median of the sketch
+    outlier = result['price'].to_numpy() != expected['price'].to_numpy()
+    assert outlier.sum() <= report['price_outliers']
+    np.testing.assert_allclose(result['price'][outlier], expected['price'][outlier], rtol=0.02)
+
+def test_duplicates_compared_on_cleaned_values(tmp_path):
+    rows = ['id,neighbourhood group,price,Construction year,availability 365',
+            '1,Brooklyn,"$1,060 ",2010,10',
+            '2,Queens,$50,2011,20',
+            '1,brookln,$1060,2010.0,10.0', # the first row written differently, in the next chunk
+            '3,Queens,$50,2011,400']
+    (tmp_path / 'airbnb.csv').write_text('\n'.join(rows) + '\n')
+
+    expected = clean_airbnb(str(tmp_path / 'airbnb.csv'))
+    report = clean_airbnb_streaming(str(tmp_path / 'airbnb.csv'), str(tmp_path / 'clean.csv'), chunksize=2)
+    assert report['duplicates'] == 1
+    assert pd.read_csv(tmp_path / 'clean.csv')['id'].tolist() == expected['id'].tolist() == [1, 2]
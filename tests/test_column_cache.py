@@ -0,0 +1,148 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling import column_cache
+from data_wrangling.column_cache import load_cached, read_cache, write_cache
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({
+        'id': np.arange(6),
+        'group': pd.Categorical(list('abcabc')),
+        'count': pd.array([1, None, 3, 4, None, 6], dtype='Int32'),
+        'name': ['x', None, 'y', 'z', 'x', 'y'],
+        'day': pd.date_range('2020-01-01', periods=6),
+    }).to_csv(path, index=False)
+    return str(path)
+
+def reader(path, calls):
+    def read():
+        calls.append(path)
+        return pd.read_csv(path, dtype={'group': 'category', 'count': 'Int32'}, parse_dates=['day'])
+    return read
+
+def test_roundtrip(source):
+    calls = []
+    first = load_cached(source, reader(source, calls))
+    second = load_cached(source, reader(source, calls))
+
+    pd.testing.assert_frame_equal(first, reader(source, [])())
+    pd.testing.assert_frame_equal(second, first)
+    pd.testing.assert_frame_equal(load_cached(source, reader(source, calls), columns=['name', 'id']), first[['name', 'id']])
+    assert len(calls) == 1
+    cache_dir = source + '.cols'
+    assert not [name for name in os.listdir(cache_dir) if name.endswith('.tmp')]
+    with open(os.path.join(cache_dir, 'columns.json')) as file, open(os.path.join(cache_dir, 'source.json')) as other:
+        assert json.load(file)['build'] == json.load(other)['build']
+
+def test_modified_source_is_rebuilt(source):
+    calls = []
+    load_cached(source, reader(source, calls))
+    with open(source, 'a') as file:
+        file.write('6,a,7,w,2020-01-07\n')
+    data = load_cached(source, reader(source, calls))
+    assert len(calls) == 2
+    assert data['id'].tolist() == list(range(7))
+
+def test_touched_source_is_not_rebuilt(source):
+    calls = []
+    load_cached(source, reader(source, calls))
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_cached(source, reader(source, calls))
+    assert len(calls) == 1
+    with open(source + '.cols/source.json') as file:
+        assert json.load(file)['mtime_ns'] == stat.st_mtime_ns + 10**9
+
+def test_source_changed_while_parsed_is_not_cached(source):
+    calls = []
+    def read_then_append():
+        data = reader(source, calls)()
+        with open(source, 'a') as file:
+            file.write('6,a,7,w,2020-01-07\n')
+        return data
+
+    assert len(load_cached(source, read_then_append)) == 6
+    assert not os.path.exists(source + '.cols/source.json')
+    assert len(load_cached(source, reader(source, calls))) == 7
+
+def test_failed_build_is_not_used(source, monkeypatch):
+    calls = []
+    load_cached(source, reader(source, calls))
+    with open(source, 'a') as file:
+        file.write('6,a,7,w,2020-01-07\n')
+
+    # the build stops after the first column file, before the manifest & source signature
+    write_file = column_cache._write_file
+    def fail_after_first_column(path, write, mode='w'):
+        if path.endswith('.npy') and not path.endswith('0.values.npy'):
+            raise OSError('disk full')
+        write_file(path, write, mode)
+    monkeypatch.setattr(column_cache, '_write_file', fail_after_first_column)
+    data = load_cached(source, reader(source, calls)) # the parsed data, not cached
+    pd.testing.assert_frame_equal(data, reader(source, [])())
+    assert not os.path.exists(source + '.cols/source.json')
+
+    monkeypatch.setattr(column_cache, '_write_file', write_file)
+    assert load_cached(source, reader(source, calls))['id'].tolist() == list(range(7))
+    assert len(calls) == 3
+
+def test_read_cache_checks_the_build(source, tmp_path):
+    data = pd.read_csv(source)
+    build = write_cache(data, str(tmp_path / 'cache'), {'size': 0})
+    pd.testing.assert_frame_equal(read_cache(str(tmp_path / 'cache'), build=build), data)
+    write_cache(data, str(tmp_path / 'cache'), {'size': 0}) # rebuilt meanwhile
+    with pytest.raises(ValueError):
+        read_cache(str(tmp_path / 'cache'), build=build)
+
+def test_cache_that_can_not_be_written(source, tmp_path):
+    (tmp_path / 'file').write_text('') # e.g. a read-only data folder
+    calls = []
+    data = load_cached(source, reader(source, calls), cache_dir=str(tmp_path / 'file' / 'cache'))
+    pd.testing.assert_frame_equal(data, reader(source, [])())
+    data = load_cached(source, reader(source, calls), columns=['id'], cache_dir=str(tmp_path / 'file' / 'cache'))
+    assert data['id'].tolist() == list(range(6)) and len(calls) == 2
+
+def test_cache_dir_from_environment(source, tmp_path, monkeypatch):
+    monkeypatch.setenv('DATA_WRANGLING_CACHE_DIR', str(tmp_path / 'caches'))
+    calls = []
+    load_cached(source, reader(source, calls))
+    load_cached(source, reader(source, calls))
+    assert len(calls) == 1
+    assert not os.path.exists(source + '.cols')
+    assert [name.startswith('data.csv.') and name.endswith('.cols') for name in os.listdir(tmp_path / 'caches')] == [True]
+
+def rebuild_while_opened(source, monkeypatch):
+    '''
+  np.load of the cache rewrites the source with other values (same rows) and rebuilds the
+  cache, like another process, once the first column is opened
+    '''
+
+    load = np.load
+    def load_then_rebuild(*args, **kwargs):
+        array = load(*args, **kwargs)
+        monkeypatch.setattr(column_cache.np, 'load', load)
+        changed = reader(source, [])().assign(id=lambda data: data['id'] + 100, name='new')
+        changed.to_csv(source, index=False)
+        write_cache(reader(source, [])(), source + '.cols', column_cache._source_signature(source, ''))
+        return array
+    monkeypatch.setattr(column_cache.np, 'load', load_then_rebuild)
+
+def test_rebuild_while_columns_are_opened(source, monkeypatch):
+    build = write_cache(reader(source, [])(), source + '.cols', column_cache._source_signature(source, ''))
+    rebuild_while_opened(source, monkeypatch)
+    with pytest.raises(ValueError):
+        read_cache(source + '.cols', build=build)
+
+def test_load_never_mixes_two_builds(source, monkeypatch):
+    calls = []
+    load_cached(source, reader(source, calls))
+    rebuild_while_opened(source, monkeypatch)
+    data = load_cached(source, reader(source, calls)) # parsed again after the rebuild
+    pd.testing.assert_frame_equal(data, reader(source, [])())
+    assert data['id'].tolist() == list(range(100, 106)) and (data['name'] == 'new').all()
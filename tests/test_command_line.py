@@ -0,0 +1,53 @@
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_python(code_or_args, tmp_path):
+    '''
+  run python in another folder than the repository, the package is found like an
+  installed one (PYTHONPATH)
+    '''
+
+    env = {**os.environ, 'PYTHONPATH': ROOT}
+    return subprocess.run([sys.executable] + code_or_args, cwd=tmp_path, env=env, capture_output=True, text=True)
+
+def test_import_does_not_load_pandas(tmp_path):
+    result = run_python(['-c', 'import sys, data_wrangling, data_wrangling.merge_transactions; '
+                               'print(sorted({"numpy", "pandas"} & set(sys.modules)))'], tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '[]'
+
+@pytest.mark.parametrize('module', ['data_wrangling', 'data_wrangling.benchmark'])
+def test_module_help(tmp_path, module):
+    result = run_python(['-m', module, '--help'], tmp_path)
+    assert result.returncode == 0, result.stderr
+    assert 'usage:' in result.stdout
+
+def scripts():
+    tomllib = pytest.importorskip('tomllib')
+    with open(os.path.join(ROOT, 'pyproject.toml'), 'rb') as file:
+        return tomllib.load(file)['project']['scripts']
+
+def test_scripts_help(monkeypatch, capsys):
+    entries = scripts()
+    assert 'data-wrangling' in entries and 'data-wrangling-benchmark' in entries
+    for name, target in entries.items():
+        module, function = target.split(':')
+        monkeypatch.setattr(sys, 'argv', [name, '--help'])
+        with pytest.raises(SystemExit) as exit:
+            getattr(importlib.import_module(module), function)()
+        assert exit.value.code == 0, name
+        assert 'usage:' in capsys.readouterr().out, name
+
+def test_task_script_runs_its_command(monkeypatch, capsys):
+    from data_wrangling import __main__
+
+    monkeypatch.setattr(sys, 'argv', ['data-wrangling-merge-transactions', '--help'])
+    with pytest.raises(SystemExit):
+        __main__.merge_transactions()
+    assert 'usage: data-wrangling merge_transactions' in capsys.readouterr().out
@@ -0,0 +1,80 @@
+import contextlib
+import gzip
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from data_wrangling.promising_state.export import export_promising_state
+from data_wrangling.promising_state.state_partition import split_by_state
+
+def reference_export(config_file, thresh):
+    '''
+  the original export, one mask per promising state
+    '''
+
+    data = pd.read_csv(config_file['path']['input'], index_col='index')
+    data['ship-state'] = data['ship-state'].str.lower()
+    states_sales_data = data[['ship-state', 'Order ID']].groupby('ship-state').count()
+    states_sales_data['market-share'] = states_sales_data['Order ID'] / states_sales_data['Order ID'].sum()
+    promising_state = list(states_sales_data[states_sales_data['market-share'] >= thresh].reset_index()['ship-state'])
+
+    if len(promising_state) == 0:
+        print('No promising state')
+    for state in promising_state:
+        path_file = config_file['path']['output'] + state + '-sales-reports.csv'
+        state_data = data[data['ship-state'] == state].drop(['Unnamed: 22'], axis=1)
+        state_data.to_csv(path_file.lower(), index=False)
+        state_market_share = round(states_sales_data.loc[state]['market-share'] * 100, 2)
+        print(f'Data of state "{state.lower()}" was successfully exported into "{path_file.lower()}"')
+        print(f'  - State market share :  {state_market_share} %')
+        print(f'  - Data shape         :  {state_data.shape}\n')
+
+def run(export, tmp_path, name, input_path, thresh, **options):
+    output = str(tmp_path / name) + os.sep
+    os.makedirs(output)
+    printed = io.StringIO()
+    with contextlib.redirect_stdout(printed):
+        export({'path': {'input': input_path, 'output': output}}, thresh, **options)
+    return output, printed.getvalue().replace(output, '<output>/')
+
+def read_text(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='') as file:
+        return file.read()
+
+@pytest.fixture(scope='module')
+def sales(dataset):
+    return dataset('amazon_sales', 3000)['amazon_sales']
+
+@pytest.mark.parametrize('options', [{}, {'workers': 1}, {'chunksize': 37}, {'chunksize': 1000, 'workers': 1},
+                                     {'compression': 'gzip'}, {'chunksize': 37, 'compression': 'gzip'}])
+@pytest.mark.parametrize('thresh', [0.05, 0.10])
+def test_matches_original_export(sales, tmp_path, options, thresh):
+    expected_dir, expected_printed = run(reference_export, tmp_path, 'expected', sales, thresh)
+    output_dir, printed = run(export_promising_state, tmp_path, 'output', sales, thresh, **options)
+
+    extension = '.gz' if options.get('compression') else ''
+    assert printed == expected_printed.replace('-sales-reports.csv"', f'-sales-reports.csv{extension}"')
+    expected_files = sorted(os.listdir(expected_dir))
+    assert sorted(os.listdir(output_dir)) == [name + extension for name in expected_files]
+    assert len(expected_files) > 1
+    for name in expected_files:
+        assert read_text(os.path.join(output_dir, name + extension)) == read_text(os.path.join(expected_dir, name)), name
+
+@pytest.mark.parametrize('options', [{}, {'chunksize': 37}])
+def test_no_promising_state(sales, tmp_path, options):
+    _, expected_printed = run(reference_export, tmp_path, 'expected', sales, 1.01)
+    output_dir, printed = run(export_promising_state, tmp_path, 'output', sales, 1.01, **options)
+    assert printed == expected_printed == 'No promising state\n'
+    assert os.listdir(output_dir) == []
+
+def test_split_by_state(sales):
+    data = pd.read_csv(sales, index_col='index')
+    data['ship-state'] = data['ship-state'].str.lower()
+    states = ['maharashtra', 'goa', 'atlantis'] # a state without any row is not a partition
+    partitions = split_by_state(data, states, drop_columns=['Unnamed: 22', 'not a column'])
+    assert sorted(partitions) == ['goa', 'maharashtra']
+    for state, partition in partitions.items():
+        pd.testing.assert_frame_equal(partition, data[data['ship-state'] == state].drop(columns='Unnamed: 22'))
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.time_to_purchase.funnel import run_funnels
+
+def reference_funnel(events, steps):
+    '''
+  per user step times computed event by event: the earliest event of the step at or after
+  the previous step time, an event is matched by one step only
+    '''
+
+    events = events.assign(event_time=pd.to_datetime(events['event_time'], utc=True).dt.tz_localize(None))
+    events = events.dropna(subset=['user_id', 'event_time']).sort_values(['user_id', 'event_time'], kind='stable')
+    result = {}
+    for user, user_events in events.groupby('user_id', sort=True):
+        used, previous, times = set(), None, []
+        for step in steps:
+            match = None
+            for row, (event_time, event_type) in enumerate(zip(user_events['event_time'], user_events['event_type'])):
+                if event_type == step and row not in used and (previous is None or event_time >= previous):
+                    match = row
+                    break
+            if match is None:
+                times.extend([pd.NaT] * (len(steps) - len(times)))
+                break
+            used.add(match)
+            previous = user_events['event_time'].iloc[match]
+            times.append(previous)
+        if times[0] is not pd.NaT:
+            result[user] = times
+    return result
+
+def event_log(rows):
+    return pd.DataFrame(rows, columns=['event_time', 'event_type', 'user_id'])
+
+def step_times(per_user, columns):
+    return {user: [row[f'{column}_time'] for column in columns] for user, row in per_user.set_index('user_id').iterrows()}
+
+def test_repeated_step_needs_another_event():
+    events = event_log([
+        ('2020-01-01 10:00:00 UTC', 'view', 1), # one view only
+        ('2020-01-01 10:05:00 UTC', 'purchase', 1),
+        ('2020-01-01 10:00:00 UTC', 'view', 2),
+        ('2020-01-01 10:03:00 UTC', 'view', 2),
+        ('2020-01-01 10:04:00 UTC', 'purchase', 2),
+        ('2020-01-01 11:00:00 UTC', 'view', 3), # two views at the same time
+        ('2020-01-01 11:00:00 UTC', 'view', 3),
+    ])
+    per_user, summary = run_funnels(events, {'vv': ['view', 'view', 'purchase']})['vv']
+    per_user = per_user.set_index('user_id')
+
+    assert pd.isna(per_user.loc[1, 'view_2_time'])
+    assert pd.isna(per_user.loc[1, 'view_1_view_2_minutes'])
+    assert per_user.loc[2, 'view_1_view_2_minutes'] == 3.0
+    assert per_user.loc[2, 'view_2_purchase_minutes'] == 1.0
+    assert per_user.loc[3, 'view_1_view_2_minutes'] == 0.0
+    assert pd.isna(per_user.loc[3, 'purchase_time'])
+    assert summary['users'].tolist() == [3, 2, 1]
+
+def test_missing_step_stops_the_funnel():
+    events = event_log([
+        ('2020-01-01 10:00:00 UTC', 'view', 1),
+        ('2020-01-01 10:05:00 UTC', 'purchase', 1), # never in cart
+        ('2020-01-01 10:00:00 UTC', 'cart', 2), # no view
+        ('2020-01-01 10:01:00 UTC', 'purchase', 2),
+    ])
+    per_user, summary = run_funnels(events, {'vcp': ['view', 'cart', 'purchase']})['vcp']
+
+    assert per_user['user_id'].tolist() == [1]
+    assert pd.isna(per_user.loc[0, 'cart_time']) and pd.isna(per_user.loc[0, 'purchase_time'])
+    assert summary['users'].tolist() == [1, 0, 0]
+    assert summary['drop_off'].tolist() == [0, 1, 0]
+
+def test_out_of_order_events():
+    events = event_log([
+        ('2020-01-01 10:09:00 UTC', 'purchase', 1),
+        ('2020-01-01 10:07:00 UTC', 'cart', 1),
+        ('2020-01-01 10:01:00 UTC', 'view', 1),
+        ('2020-01-01 10:08:00 UTC', 'view', 1),
+        ('2020-01-01 09:00:00 UTC', 'purchase', 1), # before the first view, not in the funnel
+    ])
+    per_user, _ = run_funnels(events, {'vcp': ['view', 'cart', 'purchase']})['vcp']
+
+    assert per_user.loc[0, 'view_time'] == pd.Timestamp('2020-01-01 10:01:00')
+    assert per_user.loc[0, 'view_cart_minutes'] == 6.0
+    assert per_user.loc[0, 'cart_purchase_minutes'] == 2.0
+
+@pytest.mark.parametrize('steps', [['view', 'purchase'], ['view', 'cart', 'purchase'], ['view', 'view', 'purchase'],
+                                   ['cart', 'view', 'cart']])
+def test_matches_reference(dataset, steps):
+    events = pd.read_csv(dataset('events', 3000)['events'])
+    events = events.sample(frac=1.0, random_state=0) # order of the rows does not matter
+    per_user, _ = run_funnels(events, {'funnel': steps})['funnel']
+
+    columns = [step if steps.count(step) == 1 else f'{step}_{position}' for position, step in enumerate(steps, start=1)]
+    expected = reference_funnel(events, steps)
+    got = step_times(per_user, columns)
+    assert got.keys() == expected.keys()
+    for user, times in expected.items():
+        assert [np.datetime64(t) if t is not pd.NaT else None for t in times] == \
+               [np.datetime64(t) if not pd.isna(t) else None for t in got[user]], user
@@ -0,0 +1,113 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.merge_transactions import incremental_store
+from data_wrangling.merge_transactions.incremental_store import BranchStore
+
+def reference_merge(filenames):
+    '''
+  the original merge of the branch files (pandas read_excel / read_csv & concat), then
+  the first row of every Invoice ID
+    '''
+
+    frames = [pd.read_excel(filename) if filename.endswith('.xlsx') else pd.read_csv(filename, sep=';')
+              for filename in filenames]
+    data = pd.concat(frames, ignore_index=True)
+    data = data[data['Invoice ID'].notna()]
+    return data.drop_duplicates(subset='Invoice ID', keep='first').reset_index(drop=True)
+
+def assert_same_rows(result, expected):
+    assert result['Invoice ID'].astype(str).tolist() == expected['Invoice ID'].tolist()
+    np.testing.assert_allclose(result['Total'].to_numpy(dtype=float), expected['Total'].to_numpy(dtype=float))
+    assert result['Quantity'].astype(int).tolist() == expected['Quantity'].astype(int).tolist()
+    assert result['Branch'].astype(str).tolist() == expected['Branch'].tolist()
+
+@pytest.fixture
+def branches(dataset, tmp_path):
+    paths = dataset('branch', 600)
+    names = [paths[name] for name in sorted(paths)] # branch_A.xlsx, branch_B.csv, branch_C.csv
+
+    # a late file repeating some transactions of branch B & with missing Invoice ID
+    late = pd.read_csv(names[1], sep=';').head(40)
+    late.loc[20:, 'Invoice ID'] = [f'999-00-{number:04d}' for number in range(20)]
+    late.loc[30:34, 'Invoice ID'] = np.nan
+    late.to_csv(tmp_path / 'branch_B_late.csv', sep=';', index=False)
+    return names + [str(tmp_path / 'branch_B_late.csv')]
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_increments_match_full_merge(branches, tmp_path, workers):
+    store = BranchStore(str(tmp_path / 'store'))
+    first, summary = store.ingest(branches[:1], workers=workers)
+    assert summary['ingested'] == branches[:1]
+
+    # reopened from the disk, the file already ingested is skipped
+    store = BranchStore(str(tmp_path / 'store'))
+    new_data, summary = store.ingest(branches, workers=workers)
+    assert summary['skipped'] == branches[:1]
+    assert summary['duplicates'] == 20 and summary['missing'] == 5
+
+    expected = reference_merge(branches)
+    assert_same_rows(store.load(), expected)
+    assert_same_rows(pd.concat([first, new_data], ignore_index=True), expected)
+
+def test_renamed_file_is_skipped(branches, tmp_path):
+    store = BranchStore(str(tmp_path / 'store'))
+    store.ingest(branches[1:2], workers=1)
+    shutil.copy(branches[1], tmp_path / 'renamed.csv')
+    new_data, summary = store.ingest([str(tmp_path / 'renamed.csv')], workers=1)
+    assert len(new_data) == 0
+    assert summary['skipped'] == [str(tmp_path / 'renamed.csv')]
+
+def test_ingested_file_is_not_hashed_again(branches, tmp_path, monkeypatch):
+    store = BranchStore(str(tmp_path / 'store'))
+    store.ingest(branches[1:3], workers=1)
+
+    hashed = []
+    file_hash = incremental_store.file_hash
+    monkeypatch.setattr(incremental_store, 'file_hash', lambda filename: hashed.append(filename) or file_hash(filename))
+    store = BranchStore(str(tmp_path / 'store'))
+    new_data, summary = store.ingest(branches, workers=1)
+    assert hashed == [branches[0], branches[3]] # only the files not ingested yet
+    assert summary['skipped'] == branches[1:3] and summary['duplicates'] == 20
+
+    # touched file, hashed again but its content is known
+    stat = os.stat(branches[1])
+    os.utime(branches[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    new_data, summary = store.ingest(branches[1:2], workers=1)
+    assert hashed[-1] == branches[1] and summary['skipped'] == branches[1:2] and len(new_data) == 0
+    assert_same_rows(store.load(), reference_merge(branches[1:3] + branches[:1] + branches[3:]))
+
+def test_invoice_index_is_rebuilt(branches, tmp_path):
+    store = BranchStore(str(tmp_path / 'store'))
+    store.ingest(branches[1:3], workers=1)
+    # index of a part lost, e.g. a store written before the part indexes
+    os.remove(tmp_path / 'store' / 'part-00000.ids.npy')
+
+    store = BranchStore(str(tmp_path / 'store'))
+    new_data, summary = store.ingest(branches[3:], workers=1)
+    assert summary['duplicates'] == 20
+    assert_same_rows(store.load(), reference_merge(branches[1:]))
+
+def test_empty_store(tmp_path):
+    store = BranchStore(str(tmp_path / 'store'))
+    data = store.load()
+    assert len(data) == 0
+    assert list(data.columns) == list(store.schema)
+    assert store.ingest([], workers=1)[1] == {'ingested': [], 'skipped': [], 'duplicates': 0, 'missing': 0}
+
+def test_invoice_ids_of_other_lengths(branches, tmp_path):
+    store = BranchStore(str(tmp_path / 'store'))
+    store.ingest(branches[1:2], workers=1)
+
+    # prefixes & extensions of stored Invoice ID are new transactions, the stored ones are not
+    data = pd.read_csv(branches[1], sep=';').head(30)
+    ids = data['Invoice ID'].tolist()
+    data['Invoice ID'] = [ids[i][:-1] for i in range(10)] + [ids[i] + '0' for i in range(10, 20)] + ids[20:]
+    data.to_csv(tmp_path / 'other.csv', sep=';', index=False)
+    new_data, summary = store.ingest([str(tmp_path / 'other.csv')], workers=1)
+    assert summary['duplicates'] == 10
+    assert new_data['Invoice ID'].astype(str).tolist() == data['Invoice ID'].head(20).tolist()
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.retail_orders.loyal_tracker import LoyalCustomerTracker
+from data_wrangling.retail_orders.retail_report import STATUS_MAP, STATUS_RANK
+
+@pytest.fixture
+def orders(dataset):
+    orders = pd.read_csv(dataset('orders', 3000)['orders'])
+    orders['Order Date'] = pd.to_datetime(orders['Date Order was placed'], format='%d-%b-%y')
+    return orders.sort_values('Order Date', kind='stable', ignore_index=True)
+
+def add_months(tracker, orders, months):
+    for _, batch in orders[orders['Order Date'].dt.to_period('M').isin(months)].groupby(orders['Order Date'].dt.to_period('M')):
+        tracker.add_orders(batch['Customer ID'], batch['Customer Status'], batch['Order Date'])
+
+def reference_loyal(received, min_orders, months):
+    '''
+  loyal customers computed from scratch over the latest months of every order received
+    '''
+
+    period = received['Order Date'].dt.year * 12 + received['Order Date'].dt.month - 1
+    window = received[period > period.max() - months]
+    rank = window['Customer Status'].replace(STATUS_MAP).map(STATUS_RANK)
+    per_customer = rank.groupby(window['Customer ID']).agg(['size', 'max'])
+    per_customer = per_customer[per_customer['size'] > min_orders]
+    rank_status = {rank: status for status, rank in STATUS_RANK.items()}
+    return [(customer, rank_status[rank]) for customer, rank in zip(per_customer.index, per_customer['max'])]
+
+@pytest.mark.parametrize('window_months', [1, 3])
+def test_daily_batches_match_full_computation(orders, window_months):
+    orders = orders[orders['Order Date'] < orders['Order Date'].min() + pd.Timedelta(days=420)] # 14 months of daily batches
+    # every 5th order arrives 10 to 80 days late, after newer orders (even of a newer month)
+    delay = np.where(np.arange(len(orders)) % 5 == 0, 10 + np.arange(len(orders)) % 71, 0)
+    orders = orders.assign(Arrival=orders['Order Date'] + pd.to_timedelta(delay, unit='D'))
+
+    tracker = LoyalCustomerTracker(window_months=window_months)
+    late_checked, loyal_checked = 0, 0
+    for number, (day, batch) in enumerate(orders.groupby('Arrival', sort=True)):
+        tracker.add_orders(batch['Customer ID'], batch['Customer Status'], batch['Order Date'])
+        if number % 30 != 0 and day != orders['Arrival'].max():
+            continue
+        received = orders[orders['Arrival'] <= day]
+        late_checked += int((received['Order Date'] < day - pd.Timedelta(days=31)).any())
+        for months in range(1, window_months + 1):
+            for min_orders in (0, 1, 2):
+                loyal, proportion = tracker.loyal_customers(min_orders, months)
+                expected = reference_loyal(received, min_orders, months)
+                assert list(zip(loyal['Customer ID'], loyal['Customer Status'])) == expected
+                loyal_checked += min_orders > 0 and len(expected) > 0
+
+                counts = pd.Series([status for _, status in expected], dtype=object).value_counts()
+                assert dict(zip(proportion['Customer Status'], proportion['Customer ID'])) == counts.to_dict()
+                np.testing.assert_allclose(proportion['percentage'].to_numpy(),
+                                           (counts[proportion['Customer Status']] / len(expected) * 100).to_numpy())
+    assert late_checked > 0 and loyal_checked > 0
+
+def assert_same_tracker(tracker, loaded):
+    assert loaded.window_months == tracker.window_months
+    assert loaded.latest_period == tracker.latest_period
+    assert loaded.total == tracker.total
+    for min_orders in (0, 1, 3):
+        for months in range(1, tracker.window_months + 1):
+            expected, expected_proportion = tracker.loyal_customers(min_orders, months)
+            got, got_proportion = loaded.loyal_customers(min_orders, months)
+            pd.testing.assert_frame_equal(got, expected)
+            pd.testing.assert_frame_equal(got_proportion, expected_proportion)
+
+def test_round_trip(orders, tmp_path):
+    months = orders['Order Date'].dt.to_period('M').unique()
+    tracker = LoyalCustomerTracker(window_months=4)
+    add_months(tracker, orders, months[:30])
+    path = str(tmp_path / 'tracker.npz')
+    tracker.save(path)
+    loaded = LoyalCustomerTracker.load(path)
+    assert_same_tracker(tracker, loaded)
+
+    # the loaded tracker goes on like the saved one, months expire from the loaded counts
+    add_months(tracker, orders, months[30:])
+    add_months(loaded, orders, months[30:])
+    assert_same_tracker(tracker, loaded)
+
+def test_saved_arrays(orders, tmp_path):
+    tracker = LoyalCustomerTracker()
+    add_months(tracker, orders, orders['Order Date'].dt.to_period('M').unique()[:5])
+    path = str(tmp_path / 'tracker.npz')
+    tracker.save(path)
+
+    with np.load(path, allow_pickle=False) as stored: # plain arrays, no pickled object
+        assert int(stored['version']) == 1
+        assert stored['period'].dtype == np.int64 and stored['rank'].dtype == np.int8
+        assert int(stored['orders'].sum()) == sum(tracker.total.values())
+
+def test_empty_tracker(tmp_path):
+    path = str(tmp_path / 'tracker.npz')
+    LoyalCustomerTracker(window_months=2).save(path)
+    loaded = LoyalCustomerTracker.load(path)
+    assert loaded.window_months == 2 and loaded.latest_period is None
+    assert loaded.months == {} and loaded.total == {}
+    assert len(loaded.loyal_customers()[0]) == 0
+
+def test_other_version(tmp_path):
+    path = str(tmp_path / 'tracker.npz')
+    np.savez(path, version=0)
+    with pytest.raises(ValueError, match='not a version 1'):
+        LoyalCustomerTracker.load(path)
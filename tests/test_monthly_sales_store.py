@@ -0,0 +1,76 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.month_over_month.monthly_sales_store import (MonthlySalesStore, monthly_sales, sales_change,
+                                                                 to_report)
+from data_wrangling.schemas import read_dataset
+
+@pytest.fixture
+def superstore_lines(dataset):
+    with open(dataset('superstore', 3000)['superstore'], 'rb') as file:
+        return file.readlines()
+
+def write(path, lines, mode='wb'):
+    with open(path, mode) as file:
+        file.writelines(lines)
+
+def full_report(path):
+    sales = monthly_sales(read_dataset('superstore', str(path), columns=['Order Date', 'Sales']))
+    return to_report(sales, sales_change(sales))
+
+def assert_same_report(report, expected):
+    assert report['Order Date'].tolist() == expected['Order Date'].tolist()
+    np.testing.assert_allclose(report['Sales'], expected['Sales'], rtol=1e-12)
+    np.testing.assert_allclose(report['Sales Change'], expected['Sales Change'], atol=0.01 + 1e-9)
+
+@pytest.mark.parametrize('chunksize', [None, 500])
+def test_appended_rows_match_full_recompute(tmp_path, superstore_lines, chunksize):
+    header, rows = superstore_lines[0], superstore_lines[1:]
+    source, store_path = tmp_path / 'orders.csv', str(tmp_path / 'store.json')
+
+    write(source, [header] + rows[:1000])
+    store = MonthlySalesStore(store_path)
+    store.ingest_csv(str(source), chunksize=chunksize)
+    store.save()
+
+    for part in (rows[1000:1800], rows[1800:]):
+        write(source, part, mode='ab')
+        store = MonthlySalesStore(store_path) # reloaded from the file
+        store.ingest_csv(str(source), chunksize=chunksize)
+        store.save()
+        assert store.sources[os.path.abspath(source)]['offset'] == os.path.getsize(source)
+
+    assert_same_report(store.report(), full_report(source))
+
+def test_incomplete_last_row_is_read_next_time(tmp_path, superstore_lines):
+    header, rows = superstore_lines[0], superstore_lines[1:]
+    source = tmp_path / 'orders.csv'
+    write(source, [header] + rows[:500] + [rows[500][:10]]) # a row being written
+    store = MonthlySalesStore(str(tmp_path / 'store.json'))
+    store.ingest_csv(str(source))
+
+    write(source, [rows[500][10:]] + rows[501:1000], mode='ab')
+    store.ingest_csv(str(source))
+    assert_same_report(store.report(), full_report(source))
+
+@pytest.mark.parametrize('change', ['truncated', 'rewritten'])
+def test_changed_file_is_rebuilt(tmp_path, superstore_lines, change):
+    header, rows = superstore_lines[0], superstore_lines[1:]
+    source, other = tmp_path / 'orders.csv', tmp_path / 'other.csv'
+    write(source, [header] + rows[:1500])
+    write(other, [header] + rows[2000:])
+    store = MonthlySalesStore(str(tmp_path / 'store.json'))
+    store.ingest_csv(str(source))
+    store.ingest_csv(str(other))
+
+    if change == 'truncated':
+        write(source, [header] + rows[:700])
+    else: # same size, different rows
+        write(source, [header] + rows[1500:1000:-1] + rows[1:1001])
+    store.ingest_csv(str(source))
+
+    write(tmp_path / 'both.csv', [header] + superstore_lines[1:][:0] + open(source, 'rb').readlines()[1:] + rows[2000:])
+    assert_same_report(store.report(), full_report(tmp_path / 'both.csv'))
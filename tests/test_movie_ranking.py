@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.unwatched_movie.movie_ranking import MovieRanking
+from data_wrangling.unwatched_movie.unwatched import get_top_unwatched_movies
+
+GENRES = ['Comedy', 'Drama', 'Action', 'Comedy|Drama', 'Action|Comedy|Romance', '(no genres listed)', None]
+
+@pytest.fixture(scope='module')
+def movielens(tmp_path_factory):
+    '''
+  300 movies (metadata not sorted by movie id) with 0 to 4 half-star ratings, thus many
+  equal rating counts & averages, user 1 watched every movie and a few rated movies are
+  missing from the metadata
+    '''
+
+    directory = tmp_path_factory.mktemp('movielens_ties')
+    rng = np.random.default_rng(7)
+    movie_ids = rng.permutation(np.arange(1, 301) * 3)
+    metadata = pd.DataFrame({'movieId': movie_ids, 'title': [f'Movie {movie}' for movie in movie_ids],
+                             'genres': rng.choice(np.array(GENRES, dtype=object), size=len(movie_ids))})
+
+    rows = [(1, movie, 3.0) for movie in movie_ids]
+    for movie in list(movie_ids) + [1, 2, 4]: # movie 1, 2 & 4 are not in the metadata
+        for _ in range(rng.integers(0, 5)):
+            rows.append((int(rng.integers(2, 40)), movie, rng.integers(1, 11) / 2))
+    ratings = pd.DataFrame(rows, columns=['userId', 'movieId', 'rating'])
+    ratings['timestamp'] = 1_000_000_000
+
+    paths = {'ratings': str(directory / 'ratings.csv'), 'movies': str(directory / 'movies.csv')}
+    ratings.to_csv(paths['ratings'], index=False)
+    metadata.to_csv(paths['movies'], index=False)
+    config = {'path': {'user_data': paths['ratings'], 'metadata': paths['movies'], 'index': str(directory / 'index')}}
+    return config, ratings, metadata.set_index('movieId')
+
+def reference_ranking(ratings, metadata, rank_by, min_ratings=10):
+    '''
+  movie id of the whole catalogue from the best movie, computed with a pandas sort
+    '''
+
+    stats = ratings.groupby('movieId')['rating'].agg(['count', 'sum']).reindex(metadata.index, fill_value=0)
+    mean = (stats['sum'] / stats['count']).where(stats['count'] > 0, 0.0)
+    if rank_by == 'popularity':
+        primary, secondary = stats['count'].astype(float), mean
+    else:
+        overall_mean = stats['sum'].sum() / stats['count'].sum()
+        primary = (stats['count'] * mean + min_ratings * overall_mean) / (stats['count'] + min_ratings)
+        primary[stats['count'] == 0] = -np.inf
+        secondary = stats['count']
+    table = pd.DataFrame({'primary': primary, 'secondary': secondary, 'movie': metadata.index}, index=metadata.index)
+    return table.sort_values(['primary', 'secondary', 'movie'], ascending=[False, False, True])['movie'].tolist()
+
+def reference_top(ratings, metadata, user_id, rank_by, genre=None):
+    watched = set(ratings.loc[ratings['userId'] == user_id, 'movieId'])
+    genres = metadata['genres'].fillna('').str.split('|')
+    return [movie for movie in reference_ranking(ratings, metadata, rank_by)
+            if movie not in watched and (genre is None or genre in genres[movie])]
+
+@pytest.mark.parametrize('rank_by', ['popularity', 'rating'])
+@pytest.mark.parametrize('genre', [None, 'Comedy', 'Romance', '(no genres listed)'])
+@pytest.mark.parametrize('k', [1, 7, 40, 1000])
+def test_pages_match_brute_force(movielens, rank_by, genre, k):
+    config, ratings, metadata = movielens
+    assert ratings.groupby('movieId').size().duplicated().any() # equal rating counts
+
+    for user_id in (2, 5, 17):
+        expected = reference_top(ratings, metadata, user_id, rank_by, genre)
+        pages = []
+        for page in range(1, len(expected) // k + 3): # one more page than needed is empty
+            result = get_top_unwatched_movies(user_id, config, k=k, page=page, genre=genre, rank_by=rank_by)
+            assert result.index.tolist() == expected[(page - 1) * k:page * k], (user_id, page)
+            pages.extend(result.index)
+        assert pages == expected
+        assert len(result) == 0 and list(result.columns) == list(metadata.columns) # page after the last one
+
+def test_larger_k_than_unwatched_movies(movielens):
+    config, ratings, metadata = movielens
+    expected = reference_top(ratings, metadata, 3, 'popularity')
+    result = get_top_unwatched_movies(3, config, k=len(metadata) + 10)
+    assert result.index.tolist() == expected
+    assert result['title'].tolist() == metadata.loc[expected, 'title'].tolist()
+
+@pytest.mark.parametrize('genre', ['Western', ''])
+def test_unknown_or_empty_genre(movielens, genre):
+    config, _, metadata = movielens
+    result = get_top_unwatched_movies(2, config, k=10, genre=genre)
+    assert len(result) == 0 and list(result.columns) == list(metadata.columns)
+
+@pytest.mark.parametrize('rank_by', ['popularity', 'rating'])
+def test_user_who_watched_everything(movielens, rank_by):
+    config, _, _ = movielens
+    assert len(get_top_unwatched_movies(1, config, k=10, rank_by=rank_by)) == 0
+    assert len(get_top_unwatched_movies(1, config, k=10, genre='Comedy', rank_by=rank_by)) == 0
+
+def test_invalid_arguments(movielens):
+    config, _, metadata = movielens
+    with pytest.raises(ValueError):
+        get_top_unwatched_movies(2, config, page=0)
+    with pytest.raises(ValueError):
+        MovieRanking(metadata, [], [], [], rank_by='views')
+    assert len(get_top_unwatched_movies(2, config, k=0)) == 0
+    with pytest.raises(KeyError): # user without rating
+        get_top_unwatched_movies(999, config)
+
+def test_small_blocks(movielens):
+    config, ratings, metadata = movielens
+    stats = ratings.groupby('movieId')['rating'].agg(['count', 'sum'])
+    ranking = MovieRanking(metadata, stats.index.to_numpy(), stats['count'].to_numpy(), stats['sum'].to_numpy())
+    watched = np.unique(ratings.loc[ratings['userId'] == 5, 'movieId'])
+    streamed = np.concatenate(list(ranking.iter_unwatched(watched, block_size=3)))
+    assert metadata.index[streamed].tolist() == reference_top(ratings, metadata, 5, 'popularity')
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.parallel import partitioned_groupby
+
+ROWS = 3000
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    store = rng.choice(['north', 'south', 'east', None], size=ROWS, p=[0.4, 0.3, 0.2, 0.1])
+    return pd.DataFrame({
+        'user': rng.integers(0, 50, size=ROWS),
+        'store': store,
+        'category': pd.Categorical(rng.choice(['a', 'b', 'c'], size=ROWS), categories=['a', 'b', 'c', 'unused']),
+        'sales': rng.gamma(1.5, 100, size=ROWS),
+        'quantity': pd.array(np.where(rng.random(ROWS) < 0.1, None, rng.integers(1, 10, size=ROWS)), dtype='Int32'),
+        'when': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 10**6, size=ROWS), unit='s'),
+        'name': np.where(rng.random(ROWS) < 0.2, None, 'x').astype(object),
+    })
+
+CASES = {
+    'int key': (['user'], {'sales': ('sales', 'sum'), 'mean': ('sales', 'mean'), 'rows': ('sales', 'size')}),
+    'string key with missing': (['store'], {'sales': ('sales', 'sum'), 'max': ('sales', 'max')}),
+    'categorical key with empty group': (['category'], {'sales': ('sales', 'sum'), 'first': ('when', 'min')}),
+    'several keys': (['store', 'category', 'user'], {'sales': ('sales', 'sum'), 'quantity': ('quantity', 'sum')}),
+    'nullable values': (['user'], {'quantity': ('quantity', 'sum'), 'count': ('quantity', 'count'),
+                                   'min': ('quantity', 'min')}),
+    'counted string column': (['category'], {'names': ('name', 'count'), 'rows': ('name', 'size')}),
+}
+
+@pytest.mark.parametrize('case', list(CASES))
+@pytest.mark.parametrize('workers, partitions', [(1, None), (2, None), (3, 8)])
+def test_matches_pandas_groupby(data, case, workers, partitions):
+    by, aggregations = CASES[case]
+    expected = data.groupby(by, observed=True).agg(**aggregations)
+    result = partitioned_groupby(data, by, aggregations, workers=workers, partitions=partitions, min_rows=0)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+def test_array_key(data):
+    # a key given as an array (e.g. the day number of a date column) is not a column
+    day = data['when'].to_numpy().astype('datetime64[D]').astype('int64')
+    expected = data.groupby([day, data['category']], observed=True).agg(sales=('sales', 'sum'))
+    result = partitioned_groupby(data, [day, data['category']], {'sales': ('sales', 'sum')}, workers=2, min_rows=0)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+def test_more_partitions_than_groups(data):
+    small = data[data['store'] == 'north']
+    expected = small.groupby(['store']).agg(sales=('sales', 'sum'))
+    result = partitioned_groupby(small, ['store'], {'sales': ('sales', 'sum')}, workers=2, partitions=16, min_rows=0)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+def test_every_key_missing(data):
+    missing = data.assign(store=None)
+    result = partitioned_groupby(missing, ['store'], {'sales': ('sales', 'sum')}, workers=2, min_rows=0)
+    assert len(result) == 0
+    assert list(result.columns) == ['sales']
+
+def test_small_data_is_aggregated_in_process(data):
+    # below min_rows the pool is not started, same result
+    expected = data.groupby(['user']).agg(sales=('sales', 'sum'))
+    pd.testing.assert_frame_equal(partitioned_groupby(data, ['user'], {'sales': ('sales', 'sum')}, workers=4), expected)
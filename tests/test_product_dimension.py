@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.retail_orders.product_dimension import ProductDimension
+
+@pytest.fixture
+def tables(dataset):
+    paths = dataset('orders', 2000)
+    orders = pd.read_csv(paths['orders'])
+    products = pd.read_csv(paths['product_supplier'])
+
+    # orders of a missing & an unknown Product ID, and a product without any order
+    orders['Product ID'] = orders['Product ID'].astype('Int64')
+    orders.loc[::97, 'Product ID'] = pd.NA
+    orders.loc[5::101, 'Product ID'] = products['Product ID'].max() + 1
+    products = products[products['Product ID'] != orders['Product ID'].iloc[3]]
+    return orders, products
+
+def joined(orders, products, columns=None):
+    data = ProductDimension(products).join(orders, columns=columns).drop(columns='Product Code')
+    return data.astype({column: object for column in products.columns if column in data and column != 'Product ID'})
+
+def test_join_matches_merge(tables):
+    orders, products = tables
+    expected = pd.merge(orders, products, on='Product ID')
+    assert orders['Product ID'].isna().any() and len(expected) < len(orders)
+
+    data = joined(orders, products)
+    pd.testing.assert_frame_equal(data.reset_index(drop=True),
+                                  expected.astype({column: object for column in products.columns if column != 'Product ID'}))
+
+def test_join_selected_columns(tables):
+    orders, products = tables
+    expected = pd.merge(orders, products[['Product ID', 'Product Category']], on='Product ID')
+    data = joined(orders, products, columns=['Product Category'])
+    pd.testing.assert_frame_equal(data.reset_index(drop=True), expected.astype({'Product Category': object}))
+
+def test_codes_and_attributes():
+    products = pd.DataFrame({'Product ID': [30, 10, 20], 'Product Category': ['c', 'a', 'b']})
+    dimension = ProductDimension(products)
+    assert len(dimension) == 3 and dimension.columns == ['Product Category']
+
+    code = dimension.encode(pd.array([20, None, 40, 10, 30, 5], dtype='Int64'))
+    assert list(code) == [1, -1, -1, 0, 2, -1]
+    assert list(dimension.attribute('Product Category', code[code >= 0])) == ['b', 'a', 'c']
+    assert list(dimension.encode(np.array([np.nan, 10.0]))) == [-1, 0]
+    assert list(ProductDimension(products.iloc[:0]).encode([10, 20])) == [-1, -1]
+
+    # only the product code is attached
+    data = dimension.join(pd.DataFrame({'Product ID': [10, 99, 30]}), columns=[])
+    assert list(data.columns) == ['Product ID', 'Product Code'] and list(data['Product Code']) == [0, 2]
+
+def test_repeated_product_id_is_rejected():
+    products = pd.DataFrame({'Product ID': [1, 2, 2, 3, 3, 3], 'Product Category': list('abcdef')})
+    with pytest.raises(ValueError, match='2 repeated'):
+        ProductDimension(products)
@@ -0,0 +1,77 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling import parallel
+from data_wrangling.time_to_purchase import purchase_duration
+from data_wrangling.time_to_purchase.purchase_duration import time_to_purchase
+
+def reference_durations(events):
+    '''
+  per user duration computed event by event: the earliest purchase, and the earliest view
+  when it is at or before that purchase
+    '''
+
+    purchase, view = {}, {}
+    for event_time, event_type, user in zip(events['event_time'], events['event_type'], events['user_id']):
+        if pd.isna(user) or pd.isna(event_time):
+            continue
+        event_time = pd.Timestamp(event_time).tz_localize(None) if pd.Timestamp(event_time).tz else pd.Timestamp(event_time)
+        first = purchase if event_type == 'purchase' else view if event_type == 'view' else None
+        if first is not None and (user not in first or event_time < first[user]):
+            first[user] = event_time
+    return {user: round((purchase[user] - view[user]) / pd.Timedelta(minutes=1), 3)
+            for user in sorted(purchase) if user in view and view[user] <= purchase[user]}
+
+def durations(result):
+    return dict(zip(result['user_id'].tolist(), result['view_purchase_duration'].tolist()))
+
+def event_log(rows):
+    return pd.DataFrame(rows, columns=['event_time', 'event_type', 'user_id'])
+
+def test_cases():
+    events = event_log([
+        ('2020-01-01 10:30:00 UTC', 'view', 1), # views before & after the purchase
+        ('2020-01-01 10:10:00 UTC', 'view', 1),
+        ('2020-01-01 10:40:00 UTC', 'purchase', 1),
+        ('2020-01-01 10:20:00 UTC', 'purchase', 1), # earliest purchase
+        ('2020-01-01 11:00:00 UTC', 'view', 1),
+        ('2020-01-01 10:00:00 UTC', 'purchase', 2), # only viewed after the purchase
+        ('2020-01-01 10:05:00 UTC', 'view', 2),
+        ('2020-01-01 10:00:00 UTC', 'view', 3), # view & purchase at the same time
+        ('2020-01-01 10:00:00 UTC', 'purchase', 3),
+        ('2020-01-01 10:00:00 UTC', 'view', 4), # no purchase
+        ('2020-01-01 10:00:00 UTC', 'cart', 4),
+        ('2020-01-01 09:00:00 UTC', 'view', None), # missing user
+        ('2020-01-01 09:30:00 UTC', 'purchase', None),
+        (None, 'view', 5), # missing time, thus no view before the purchase
+        ('2020-01-01 10:00:00 UTC', 'purchase', 5),
+        ('2020-01-01 10:00:00 UTC', 'view', 6),
+        (None, 'purchase', 6), # missing time, the purchase is ignored
+        ('2020-01-01 10:00:30 UTC', 'purchase', 6),
+    ])
+    result = time_to_purchase(events, workers=1)
+
+    assert durations(result) == {1: 10.0, 3: 0.0, 6: 0.5}
+    assert durations(result) == reference_durations(events)
+    assert list(result.columns) == ['user_id', 'view_purchase_duration']
+
+@pytest.mark.parametrize('rows', [300, 5000])
+def test_matches_reference(dataset, rows):
+    events = pd.read_csv(dataset('events', rows)['events'])
+    events.loc[events.index[::97], 'user_id'] = np.nan
+    events.loc[events.index[::89], 'event_time'] = np.nan
+    assert durations(time_to_purchase(events, workers=1)) == reference_durations(events)
+
+def test_workers_match_single_process(dataset, monkeypatch):
+    events = pd.read_csv(dataset('events', 5000)['events'])
+    single = time_to_purchase(events, workers=1)
+
+    # every size is aggregated by the process pool, like a log above PARALLEL_MIN_ROWS
+    monkeypatch.setattr(purchase_duration, 'partitioned_groupby',
+                        functools.partial(parallel.partitioned_groupby, min_rows=0))
+    pooled = time_to_purchase(events, workers=2)
+    pd.testing.assert_frame_equal(pooled, single)
+    assert durations(pooled) == reference_durations(events)
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.clean_airbnb.cleaning import AIRBNB_RULES, AVAILABILITY_RANGE, MAP_VALUE_NG
+from data_wrangling.quality import Duplicates, MapValues, Missing, Normalize, Outlier, Range, RuleSet
+from data_wrangling.schemas import read_dataset
+
+def reference_cleaning(data):
+    '''
+  the AirBnB cleaning as the chain of pandas steps the rules replace
+    '''
+
+    data = data.dropna(subset=['neighbourhood group', 'price'])
+    data = data.assign(**{'neighbourhood group': data['neighbourhood group'].replace(MAP_VALUE_NG)})
+    price = data['price'].str.replace('$', '').str.replace(',', '').astype('int')
+    outlier = price > price.quantile(q=0.75) * 1.5
+    data = data.assign(price=price.where(~outlier, price.median()) if outlier.any() else price)
+    data = data[data['availability 365'].between(*AVAILABILITY_RANGE)]
+    return data.drop_duplicates(keep='first')
+
+@pytest.mark.parametrize('rows, seed', [(2000, 1), (5000, 42), (5001, 7)])
+def test_airbnb_rules_match_pandas(dataset, rows, seed):
+    data = read_dataset('airbnb', dataset('airbnb', rows, seed)['airbnb'])
+    result, report = AIRBNB_RULES.apply(data)
+    expected = reference_cleaning(data)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+    assert report['rejected'].sum() == len(data) - len(result)
+    assert len(data) == len(read_dataset('airbnb', dataset('airbnb', rows, seed)['airbnb'])) # input not modified
+
+def test_fractional_median_of_int_values():
+    data = pd.DataFrame({'price': [10, 11, 12, 100]})
+    result, report = RuleSet([Outlier('price', quantile=0.5, factor=1.5)]).apply(data)
+    assert result['price'].tolist() == [10, 11, 12, 11.5]
+    assert report.loc['outlier price', 'normalized'] == 1
+
+def test_rules_see_the_previous_rules():
+    data = pd.DataFrame({
+        'group': ['a', 'A', 'b', None, 'a', 'a'],
+        'value': [' 1', '1', '2', '3', '1 ', '900'],
+        'other': [1.0, 1.0, np.nan, 2.0, 1.0, np.nan],
+    })
+    rules = RuleSet([
+        Missing(['group']),
+        MapValues('group', {'A': 'a'}),
+        Normalize('value', lambda value: value.str.strip().astype(int)),
+        Range('value', 0, 100),
+        Duplicates(),
+    ])
+    result, report = rules.apply(data)
+
+    # rows 1 & 4 are row 0 once normalized, a missing value is equal to a missing value
+    assert result.index.tolist() == [0, 2]
+    assert result['group'].tolist() == ['a', 'b']
+    assert result['value'].tolist() == [1, 2]
+    assert report['rejected'].tolist() == [1, 0, 0, 1, 2]
+    assert report['normalized'].tolist() == [0, 1, 5, 0, 0]
+
+@pytest.mark.parametrize('columns', [None, ['group'], ['group', 'other']])
+def test_duplicates_match_drop_duplicates(columns):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'group': pd.Categorical(rng.choice(['x', 'y', None], size=500)),
+        'value': rng.integers(0, 4, size=500),
+        'other': np.where(rng.random(500) < 0.3, np.nan, rng.integers(0, 3, size=500)),
+    })
+    result, _ = RuleSet([Duplicates(columns)]).apply(data)
+    pd.testing.assert_frame_equal(result, data.drop_duplicates(subset=columns, keep='first'))
+
+def test_no_rule_keeps_every_row():
+    data = pd.DataFrame({'a': [1, 2, 3]})
+    result, report = RuleSet([]).apply(data)
+    pd.testing.assert_frame_equal(result, data)
+    assert len(report) == 0
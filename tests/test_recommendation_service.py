@@ -0,0 +1,73 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from data_wrangling.house_recommendation.recommendation import get_user_recommendation
+from data_wrangling.house_recommendation.recommendation_service import RecommendationService
+
+def user_config(latitude, longitude, **preferences):
+    return {'preferences': preferences, 'location': {'latitude': latitude, 'longitude': longitude}}
+
+@pytest.fixture
+def travelio(dataset):
+    return {'path': dataset('travelio', 400)['travelio']}
+
+def test_stop_answers_pending_requests(travelio):
+    async def run():
+        service = RecommendationService(travelio, max_batch=1, max_wait=0.2)
+        await service.start()
+        # the first request is in the batch waiting for max_wait, the others are still queued
+        requests = [asyncio.ensure_future(service.recommend(5, user_config(-6.2 - i / 100, 106.8)))
+                    for i in range(3)]
+        await asyncio.sleep(0.01)
+        await service.stop()
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), timeout=2)
+        with pytest.raises(RuntimeError):
+            await service.recommend(5, user_config(-6.2, 106.8))
+        return results
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+def test_batch_matches_single_request(travelio):
+    configs = [user_config(-6.2 + i / 50, 106.75 + i / 40) for i in range(6)]
+    configs += [user_config(-6.25, 106.8, property_type='apartment'), user_config(-6.15, 106.9, capacity=4)]
+    configs.append(configs[0]) # same request twice in a batch is computed once
+
+    async def run():
+        async with RecommendationService(travelio, max_wait=0.05) as service:
+            results = await asyncio.gather(*(service.recommend(5, config) for config in configs))
+            return results, dict(service.stats)
+
+    results, stats = asyncio.run(run())
+    assert stats['batches'] == 1
+    assert stats['computed'] == len(configs) - 1
+    for config, result in zip(configs, results):
+        expected = get_user_recommendation(5, config, travelio)
+        pd.testing.assert_frame_equal(result, expected)
+
+def test_answer_for_rounded_location(travelio):
+    async def run():
+        async with RecommendationService(travelio, precision=2) as service:
+            return await service.recommend(5, user_config(-6.20123, 106.80456))
+
+    result = asyncio.run(run())
+    pd.testing.assert_frame_equal(result, get_user_recommendation(5, user_config(-6.20, 106.80), travelio))
+
+def test_lru_eviction(travelio):
+    a, b, c = (user_config(-6.2, 106.7 + i / 10) for i in range(3))
+
+    async def run():
+        async with RecommendationService(travelio, cache_size=2) as service:
+            for config in (a, b, a, c, b):
+                await service.recommend(5, config)
+            return dict(service.stats), list(service._cache)
+
+    stats, keys = asyncio.run(run())
+    # a is used again before c is added, thus b is the least recently used and is evicted
+    assert stats['hits'] == 1
+    assert stats['misses'] == 4
+    assert stats['evictions'] == 2 # b by c, then a by b
+    assert [key[1] for key in keys] == [106.9, 106.8]
@@ -0,0 +1,104 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling import parallel
+from data_wrangling.retail_orders import retail_report
+from data_wrangling.retail_orders.retail_report import build_report, prepare_data
+
+PRODUCTS = pd.DataFrame({
+    'Product ID': [1, 2, 3],
+    'Product Category': ['Bikes', 'Shoes', 'Tents'],
+    'Supplier Name': ['Cycle Co', 'Run Co', 'Camp Co'],
+})
+
+ORDER_COLUMNS = ['Order ID', 'Customer ID', 'Customer Status', 'Date Order was placed', 'Delivery Date',
+                 'Product ID', 'Quantity Ordered', 'Total Retail Price for This Order', 'Cost Price Per Unit']
+# profit percentage of every order is written after it
+ORDERS = pd.DataFrame([
+    # November 2021, out of the latest 3 months
+    (1, 30, 'Silver', '05-Nov-21', '09-Nov-21', 1, 1, 150, 100),   # 50
+    (2, 30, 'Silver', '20-Nov-21', '22-Nov-21', 2, 2, 60, 20),     # 50
+    # December 2021
+    (3, 10, 'SILVER', '03-Dec-21', '08-Dec-21', 1, 2, 240, 100),   # 20
+    (4, 20, 'Gold', '04-Dec-21', '05-Dec-21', 2, 1, 30, 20),       # 50
+    (5, 30, 'Silver', '10-Dec-21', '12-Dec-21', 3, 1, 80, 40),     # 100
+    (6, 40, 'Silver', '15-Dec-21', '18-Dec-21', 2, 3, 75, 20),     # 25
+    # January 2022
+    (7, 10, 'Gold', '02-Jan-22', '04-Jan-22', 2, 1, 25, 20),       # 25
+    (8, 10, 'Platinum', '09-Jan-22', '10-Jan-22', 3, 1, 60, 40),   # 50
+    (9, 20, 'GOLD', '11-Jan-22', '15-Jan-22', 1, 1, 130, 100),     # 30
+    (10, 30, 'Silver', '12-Jan-22', '14-Jan-22', 1, 1, 150, 100),  # 50
+    (10, 30, 'Silver', '12-Jan-22', '14-Jan-22', 1, 1, 150, 100),  # duplicate, dropped
+    (11, 40, 'Silver', '20-Jan-22', '27-Jan-22', 3, 4, 200, 40),   # 25
+    (12, 50, 'Gold', '21-Jan-22', '23-Jan-22', 1, 1, 110, 100),    # 10
+    # February 2022
+    (13, 10, 'Silver', '01-Feb-22', '03-Feb-22', 1, 1, 140, 100),  # 40
+    (14, 20, 'Silver', '02-Feb-22', '05-Feb-22', 2, 2, 50, 20),    # 25
+    (15, 20, 'Gold', '03-Feb-22', '04-Feb-22', 3, 1, 50, 40),      # 25
+    (16, 30, 'Silver', '05-Feb-22', None, 2, 1, 30, 20),           # missing Delivery Date, dropped
+    (17, 40, 'Silver', '06-Feb-22', '08-Feb-22', 1, 1, 120, 100),  # 20
+    (18, 40, 'SILVER', '07-Feb-22', '10-Feb-22', 2, 1, 24, 20),    # 20
+    (19, 50, 'Gold', '08-Feb-22', '09-Feb-22', 2, 1, 23, 20),      # 15
+    (20, 50, 'Gold', '10-Feb-22', '15-Feb-22', 3, 1, 48, 40),      # 20
+    (21, 50, 'Silver', '12-Feb-22', '13-Feb-22', 1, 1, 100, 100),  # 0
+    (22, 30, 'Gold', '14-Feb-22', '16-Feb-22', 9, 1, 30, 20),      # unknown product, dropped
+], columns=ORDER_COLUMNS)
+# dates are parsed as load_dataset does with the orders schema
+ORDERS[['Date Order was placed', 'Delivery Date']] = ORDERS[['Date Order was placed', 'Delivery Date']].apply(
+    pd.to_datetime, format='%d-%b-%y')
+
+@pytest.fixture(params=['serial', 'partitioned'])
+def report(request, monkeypatch):
+    if request.param == 'partitioned':
+        monkeypatch.setattr(retail_report, 'partitioned_groupby', functools.partial(parallel.partitioned_groupby, min_rows=0))
+    data = prepare_data(ORDERS, PRODUCTS)
+    workers = 2 if request.param == 'partitioned' else 1
+    return lambda **kwargs: build_report(data, workers=workers, **kwargs)
+
+def test_cleaned_orders():
+    data = prepare_data(ORDERS, PRODUCTS)
+    assert sorted(data['Order ID']) == [order for order in range(1, 22) if order != 16]
+    assert set(data['Customer Status']) == {'Silver', 'Gold', 'Platinum'}
+
+def test_profit_percentage(report):
+    profit_percentage = report()['profit_percentage']['Profit Percentage']
+    # Tents (100 + 50 + 25 + 25 + 20) / 5, Shoes (50 + 50 + 25 + 25 + 25 + 20 + 15) / 7,
+    # Bikes (50 + 20 + 30 + 50 + 10 + 40 + 20 + 0) / 8
+    assert list(profit_percentage.index) == ['Tents', 'Shoes', 'Bikes']
+    np.testing.assert_allclose(profit_percentage.to_numpy(), [44.0, 30.0, 27.5])
+
+def test_top_products_of_latest_year(report):
+    top_products = report()['top_products']['Quantity Ordered']
+    assert list(top_products.index) == ['Tents', 'Bikes', 'Shoes']
+    assert list(top_products) == [7, 6, 5]
+
+def test_loyal_customers_of_latest_three_months(report):
+    result = report()
+    # December 2021 to February 2022 (the window crosses the year), customer 30 has only
+    # orders 5 & 10 left after the cleaning, its November orders are out of the window
+    assert list(result['loyal_customers']['Customer ID']) == [10, 20, 40, 50]
+
+    # status is the highest rank of the window, customer 10 is Platinum (not 'Silver',
+    # the greatest string of Silver, Gold, Platinum)
+    proportion = result['loyal_proportion']
+    assert list(proportion['Customer Status']) == ['Gold', 'Platinum', 'Silver']
+    assert list(proportion['Customer ID']) == [2, 1, 1]
+    np.testing.assert_allclose(proportion['percentage'].to_numpy(), [50.0, 25.0, 25.0])
+
+def test_loyal_customers_of_wider_window(report):
+    result = report(latest_months=4)
+    # November 2021 is in the window, customer 30 has orders 1, 2, 5 & 10
+    assert list(result['loyal_customers']['Customer ID']) == [10, 20, 30, 40, 50]
+    proportion = result['loyal_proportion']
+    assert list(proportion['Customer Status']) == ['Gold', 'Platinum', 'Silver']
+    assert list(proportion['Customer ID']) == [2, 1, 2]
+    np.testing.assert_allclose(proportion['percentage'].to_numpy(), [40.0, 20.0, 40.0])
+
+def test_loyal_customers_min_orders(report):
+    result = report(min_orders=1)
+    # more than one order in the window, every customer
+    assert list(result['loyal_customers']['Customer ID']) == [10, 20, 30, 40, 50]
+    assert list(report(min_orders=4)['loyal_customers']['Customer ID']) == []
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.sales_cube import SalesCube
+from data_wrangling.schemas import read_dataset
+
+FREQUENCIES = {'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+
+@pytest.fixture(scope='module')
+def orders(dataset):
+    return read_dataset('superstore', dataset('superstore', 4000)['superstore'],
+                        columns=['Order Date', 'Sales', 'Category'])
+
+@pytest.fixture(scope='module')
+def cube(orders):
+    return SalesCube(orders, 'Order Date', ['Sales'], ['Category'])
+
+def expected_change(orders, level, periods, by=()):
+    '''
+  percentage change of the sales per period with pandas pct_change, every period between
+  the first and the last order is listed
+    '''
+
+    period = orders['Order Date'].dt.to_period(FREQUENCIES[level])
+    full = pd.period_range(period.min(), period.max(), freq=FREQUENCIES[level])
+    if not by:
+        sales = orders.groupby(period)['Sales'].sum().reindex(full, fill_value=0)
+        return sales, (sales.pct_change(periods=periods, fill_method=None) * 100).round(2)
+    sales = orders.groupby([period] + list(by), observed=True)['Sales'].sum().unstack(list(by)).reindex(full).fillna(0)
+    change = (sales.pct_change(periods=periods, fill_method=None) * 100).round(2)
+    return sales.T.stack(), change.T.stack(future_stack=True)
+
+@pytest.mark.parametrize('level', ['month', 'quarter', 'year'])
+@pytest.mark.parametrize('periods', [1, 2, 4])
+def test_matches_pct_change(orders, cube, level, periods):
+    report = cube.period_over_period('Sales', level=level, periods=periods)
+    sales, change = expected_change(orders, level, periods)
+
+    assert report['Order Date'].tolist() == [str(period).replace('Q', '-Q') for period in sales.index]
+    np.testing.assert_allclose(report['Sales'], sales.to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(report['Sales Change'], change.to_numpy(), atol=0.01 + 1e-9)
+
+@pytest.mark.parametrize('level', ['month', 'quarter', 'year'])
+def test_matches_pct_change_by_category(orders, cube, level):
+    report = cube.period_over_period('Sales', level=level, by=['Category'])
+    sales, change = expected_change(orders, level, 1, by=['Category'])
+
+    assert report['Category'].tolist() == sales.index.get_level_values('Category').tolist()
+    np.testing.assert_allclose(report['Sales'], sales.to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(report['Sales Change'], change.to_numpy(), atol=0.01 + 1e-9)
+
+@pytest.mark.parametrize('level', ['quarter', 'year'])
+def test_periods_beyond_the_data(cube, level):
+    number = len(cube.period_over_period('Sales', level=level))
+    for periods in (number, number + 5):
+        report = cube.period_over_period('Sales', level=level, periods=periods)
+        assert len(report) == number
+        assert report['Sales Change'].isna().all()
+
+@pytest.mark.parametrize('periods', [0, -1])
+def test_periods_must_be_positive(cube, periods):
+    with pytest.raises(ValueError):
+        cube.period_over_period('Sales', level='month', periods=periods)
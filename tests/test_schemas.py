@@ -0,0 +1,42 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.house_recommendation.attribute_index import ListingAttributeIndex
+from data_wrangling.house_recommendation.recommendation import get_user_recommendation
+from data_wrangling.schemas import DATASETS, read_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRAVELIO = os.path.join(ROOT, 'Get the House Recommendation', 'travelio_dki_jakarta.csv')
+BRANCHES = [os.path.join(ROOT, 'Merge Transactions Data', name) for name in ('branch_B.csv', 'branch_C.csv')]
+
+def fractional_sizes():
+    sizes = pd.read_csv(TRAVELIO)['size'].dropna().unique()
+    sizes = np.sort(sizes[sizes != np.round(sizes)])
+    return [25.8] + sizes[::max(len(sizes) // 40, 1)].tolist()
+
+@pytest.mark.parametrize('size', fractional_sizes())
+def test_size_threshold_keeps_equal_listings(size):
+    data = read_dataset('travelio', TRAVELIO)
+    expected = pd.read_csv(TRAVELIO)
+    expected = expected.index[expected['size'] >= size].to_numpy()
+    np.testing.assert_array_equal(ListingAttributeIndex(data).candidates({'size': size}), expected)
+
+def test_recommendation_with_fractional_size(tmp_path):
+    path = str(tmp_path / 'travelio.csv')
+    shutil.copy(TRAVELIO, path)
+    user_config = {'preferences': {'size': 25.8}, 'location': {'latitude': -6.2, 'longitude': 106.8}}
+    result = get_user_recommendation(3000, user_config, {'path': path})
+    assert len(result) == int((pd.read_csv(TRAVELIO)['size'] >= 25.8).sum())
+
+@pytest.mark.parametrize('name, path', [('travelio', TRAVELIO)] + [('branch', path) for path in BRANCHES])
+def test_float_columns_keep_their_values(name, path):
+    data = read_dataset(name, path)
+    raw = pd.read_csv(path, **DATASETS[name].get('options', {}))
+    for column in data.columns:
+        if data[column].dtype.kind == 'f':
+            assert data[column].dtype == np.float64, column
+            np.testing.assert_array_equal(data[column].to_numpy(), raw[column].to_numpy(dtype=float), err_msg=column)
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from data_wrangling.house_recommendation.spatial_index import BallTree, haversine_np
+
+def brute_force(latitude, longitude, lat_user, lon_user, k, mask=None):
+    '''
+  k nearest rows by haversine distance, equal distance in data order
+    '''
+
+    dist = haversine_np(lat_user, lon_user, latitude, longitude)
+    rows = np.arange(len(latitude)) if mask is None else np.flatnonzero(mask)
+    rows = rows[np.lexsort((rows, dist[rows]))][:k]
+    return rows, dist[rows]
+
+@pytest.fixture(scope='module')
+def locations():
+    rng = np.random.default_rng(0)
+    return rng.uniform(-6.4, -6.1, size=3000), rng.uniform(106.6, 107.0, size=3000)
+
+@pytest.mark.parametrize('leaf_size', [1, 8, 40])
+def test_matches_brute_force(locations, leaf_size):
+    latitude, longitude = locations
+    tree = BallTree(latitude, longitude, leaf_size=leaf_size)
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        lat_user, lon_user, k = rng.uniform(-6.5, -6.0), rng.uniform(106.5, 107.1), int(rng.integers(1, 50))
+        rows, distance = tree.query(lat_user, lon_user, k=k)
+        expected_rows, expected_distance = brute_force(latitude, longitude, lat_user, lon_user, k)
+        np.testing.assert_array_equal(rows, expected_rows)
+        np.testing.assert_allclose(distance, expected_distance, rtol=1e-9, atol=1e-9)
+
+def test_mask(locations):
+    latitude, longitude = locations
+    tree = BallTree(latitude, longitude)
+    rng = np.random.default_rng(2)
+    for ratio in (0.5, 0.01, 0.0):
+        mask = rng.random(len(latitude)) < ratio
+        rows, _ = tree.query(-6.25, 106.8, k=10, mask=mask)
+        np.testing.assert_array_equal(rows, brute_force(latitude, longitude, -6.25, 106.8, 10, mask)[0])
+
+def test_ties_keep_the_data_order():
+    # listings of the same building have the same location, k cut through them
+    rng = np.random.default_rng(3)
+    latitude = np.repeat(rng.uniform(-6.3, -6.1, size=50), 20)
+    longitude = np.repeat(rng.uniform(106.7, 106.9, size=50), 20)
+    order = rng.permutation(len(latitude))
+    latitude, longitude = latitude[order], longitude[order]
+    tree = BallTree(latitude, longitude, leaf_size=8)
+    for _ in range(100):
+        lat_user, lon_user, k = rng.uniform(-6.3, -6.1), rng.uniform(106.7, 106.9), int(rng.integers(1, 60))
+        rows, _ = tree.query(lat_user, lon_user, k=k)
+        np.testing.assert_array_equal(rows, brute_force(latitude, longitude, lat_user, lon_user, k)[0])
+
+def test_small_and_empty():
+    tree = BallTree([-6.2, -6.3], [106.8, 106.9])
+    rows, distance = tree.query(-6.2, 106.8, k=5)
+    assert rows.tolist() == [0, 1]
+    assert distance[0] == 0
+    assert len(tree.query(-6.2, 106.8, k=0)[0]) == 0
+    assert len(BallTree([], []).query(-6.2, 106.8, k=3)[0]) == 0
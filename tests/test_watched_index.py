@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_wrangling.unwatched_movie.unwatched import get_unwatched_movie, get_unwatched_movies
+from data_wrangling.unwatched_movie.watched_index import WatchedIndex, build_watched_index, load_watched_index
+
+def reference_unwatched(user_id, ratings, metadata):
+    '''
+  the original unwatched movies: the metadata without the movies rated by the user
+    '''
+
+    watched = ratings.loc[ratings['userId'] == user_id, 'movieId']
+    return metadata.drop(watched[watched.isin(metadata.index)].unique())
+
+@pytest.fixture
+def movielens(dataset, tmp_path):
+    paths = dataset('movielens', 3000)
+    config = {'path': {'user_data': paths['ratings'], 'metadata': paths['movies'], 'index': str(tmp_path / 'index')}}
+    return config, pd.read_csv(paths['ratings']), pd.read_csv(paths['movies'], index_col='movieId')
+
+def test_index_matches_ratings(movielens, tmp_path):
+    config, ratings, _ = movielens
+    build_watched_index(config['path']['user_data'], str(tmp_path / 'csr'), chunksize=700) # several chunks
+    index = WatchedIndex(str(tmp_path / 'csr'))
+
+    np.testing.assert_array_equal(index.users, np.unique(ratings['userId']))
+    for user_id, movies in ratings.groupby('userId')['movieId']:
+        np.testing.assert_array_equal(index.watched(user_id), np.unique(movies))
+    counts = ratings.groupby('movieId')['rating'].agg(['count', 'sum'])
+    np.testing.assert_array_equal(index.rated_movies, counts.index)
+    np.testing.assert_array_equal(index.rating_count, counts['count'])
+    np.testing.assert_allclose(index.rating_sum, counts['sum'], rtol=1e-6)
+
+def test_unwatched_matches_original(movielens):
+    config, ratings, metadata = movielens
+    users = ratings['userId'].unique()
+    result = get_unwatched_movies(list(users), config)
+    for user_id in users:
+        expected = reference_unwatched(user_id, ratings, metadata)
+        assert result[user_id].index.tolist() == expected.index.tolist()
+        assert result[user_id]['title'].tolist() == expected['title'].tolist()
+    pd.testing.assert_frame_equal(get_unwatched_movie(users[0], config), result[users[0]])
+
+def test_unknown_user(movielens):
+    config, ratings, _ = movielens
+    unknown = int(ratings['userId'].max()) + 1
+    index = load_watched_index(config['path']['user_data'], config['path']['index'])
+    assert unknown not in index
+    with pytest.raises(KeyError):
+        index.watched(unknown)
+    with pytest.raises(KeyError):
+        get_unwatched_movie(unknown, config)
+
+def test_duplicated_and_unknown_movies(tmp_path):
+    pd.DataFrame({'userId': [1, 1, 1, 2], 'movieId': [10, 10, 99, 20], 'rating': [4.0, 5.0, 3.0, 1.0],
+                  'timestamp': [0, 1, 2, 3]}).to_csv(tmp_path / 'ratings.csv', index=False)
+    pd.DataFrame({'movieId': [10, 20, 30], 'title': ['a', 'b', 'c'],
+                  'genres': ['Drama', 'Comedy', 'Drama']}).to_csv(tmp_path / 'movies.csv', index=False)
+    config = {'path': {'user_data': str(tmp_path / 'ratings.csv'), 'metadata': str(tmp_path / 'movies.csv')}}
+
+    # the movie rated twice is watched once, a movie missing from the metadata is ignored
+    assert get_unwatched_movie(1, config).index.tolist() == [20, 30]
+    index = load_watched_index(config['path']['user_data'])
+    assert index.watched(1).tolist() == [10, 99]
+    assert index.rating_count.tolist() == [2, 1, 1]
+
+def test_index_is_rebuilt_when_ratings_change(tmp_path):
+    ratings = pd.DataFrame({'userId': [1, 2], 'movieId': [10, 20], 'rating': [4.0, 1.0], 'timestamp': [0, 1]})
+    ratings.to_csv(tmp_path / 'ratings.csv', index=False)
+    assert load_watched_index(str(tmp_path / 'ratings.csv')).watched(1).tolist() == [10]
+
+    ratings.assign(movieId=[30, 20]).to_csv(tmp_path / 'ratings.csv', index=False, mode='a', header=False)
+    assert load_watched_index(str(tmp_path / 'ratings.csv')).watched(1).tolist() == [10, 30]
+
+def test_empty_ratings(tmp_path):
+    (tmp_path / 'ratings.csv').write_text('userId,movieId,rating,timestamp\n')
+    index = load_watched_index(str(tmp_path / 'ratings.csv'))
+    assert len(index.users) == 0 and len(index.rated_movies) == 0
+    with pytest.raises(KeyError):
+        index.watched(1)